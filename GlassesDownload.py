@@ -5,7 +5,12 @@ import pathlib
 import shutil
 import os
 import zipfile
+import zlib
+import struct
 import sys
+import threading
+import json
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 from datetime import date
 from dateutil.parser import parse
 from pytz import timezone
@@ -14,6 +19,22 @@ from urllib.parse import urlencode
 
 load_dotenv()
 
+PUPIL_API_URL = os.environ.get("PUPIL_API_URL", "https://api.cloud.pupil-labs.com/v2")
+
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+DEFAULT_WORKERS = 4
+DEFAULT_RETRIES = 5
+DEFAULT_EXTRACT_WORKERS = os.cpu_count() or 4
+
+ZIP_LOCAL_HEADER = struct.Struct("<IHHHHHIIIHH")
+ZIP_LOCAL_SIGNATURE = 0x04034B50
+ZIP_DESCRIPTOR_SIGNATURE = 0x08074B50
+ZIP_STORED = 0
+ZIP_DEFLATED = 8
+ZIP64_EXTRA = 0x0001
+ZIP64_LIMIT = 0xFFFFFFFF
+COMPLETE_MARKER = ".extracted"
+
 
 def ensure_dir_exists(dir_path):
     """Create directory if it doesn't exist and verify creation"""
@@ -26,27 +47,136 @@ def ensure_dir_exists(dir_path):
         raise Exception(f"Error creating directory {dir_path}: {e}")
 
 
-def download_file(url, filename, headers):
-    """Download a file from a URL to a specified filename"""
-    try:
-        with requests.get(url, headers=headers, stream=True) as response:
+class Downloader:
+    """
+    Download engine sharing one pooled requests.Session between all downloads.
+
+    Files are written to "<filename>.part" and renamed into place once complete, so an
+    interrupted download is resumed with an HTTP Range request on the next attempt (or the
+    next run) instead of starting again from zero.
+    """
+
+    def __init__(
+        self,
+        headers=None,
+        workers=DEFAULT_WORKERS,
+        chunk_size=DEFAULT_CHUNK_SIZE,
+        retries=DEFAULT_RETRIES,
+        timeout=60,
+        session=None,
+    ):
+        self.workers = max(1, workers)
+        self.chunk_size = chunk_size
+        self.retries = retries
+        self.timeout = timeout
+        self.session = session if session is not None else requests.Session()
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=self.workers, pool_maxsize=self.workers
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        if headers:
+            self.session.headers.update(headers)
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def get(self, url, **kwargs):
+        return self.session.get(url, timeout=self.timeout, **kwargs)
+
+    def download(self, url, filename, on_progress=None):
+        """
+        Download url to filename, resuming from any partial file left by an earlier attempt
+        Args:
+            url: URL to fetch
+            filename: Final location of the file
+            on_progress: Optional callable, given the number of bytes on disk after each chunk,
+                and 0 if the download has to start again from zero
+        Returns:
+            True if the file is complete on disk
+        """
+        partial = f"{filename}.part"
+
+        for attempt in range(1, self.retries + 1):
+            offset = os.path.getsize(partial) if os.path.exists(partial) else 0
+            try:
+                if self._fetch(url, partial, offset, on_progress):
+                    os.replace(partial, filename)
+                    return True
+            except (requests.exceptions.RequestException, IOError) as e:
+                print(f"Download of {url} interrupted ({e}), attempt {attempt}/{self.retries}")
+
+        print(f"Download failed after {self.retries} attempts: {url}")
+        return False
+
+    def _fetch(self, url, partial, offset, on_progress):
+        headers = {"Range": f"bytes={offset}-"} if offset else {}
+
+        with self.get(url, headers=headers, stream=True) as response:
+            if offset and response.status_code == 416:
+                # Range starts at (or past) the end - the partial file is already complete, unless
+                # it is longer than the file on the server, in which case it can't be resumed
+                total = _total_length(response)
+                if total in (None, offset):
+                    return True
+                print(f"Partial download of {url} is {offset} bytes, but the file is {total}, restarting from zero")
+                os.remove(partial)
+                return False
+
             response.raise_for_status()
-            with open(filename, "wb") as f:
-                for chunk in response.iter_content(chunk_size=8192):
+
+            if offset and response.status_code != 206:
+                print(f"Server does not support resuming {url}, restarting from zero")
+                offset = 0
+
+            expected = response.headers.get("Content-Length")
+            expected = offset + int(expected) if expected is not None else None
+
+            if on_progress and not offset:
+                on_progress(0)
+
+            written = offset
+            with open(partial, "ab" if offset else "wb") as f:
+                for chunk in response.iter_content(chunk_size=self.chunk_size):
                     f.write(chunk)
+                    written += len(chunk)
+                    if on_progress:
+                        # readers of the file use their own handle - the bytes must be there first
+                        f.flush()
+                        on_progress(written)
+
+            if expected is not None and written < expected:
+                raise IOError(f"Connection closed after {written} of {expected} bytes")
+
         return True
-    except Exception as e:
-        print(f"Download failed: {e}")
-        return False
 
 
-def download_aria(input_file, output_dir, extra=None):
-    """Process Aria data files"""
-    print(f"Getting eye gaze data from {input_file}")
+def _total_length(response):
+    """Total size from a 'Content-Range: bytes */1234' style header, if the server sent one"""
+    content_range = response.headers.get("Content-Range", "")
+    total = content_range.rpartition("/")[2]
+    return int(total) if total.isdigit() else None
 
-    base_name = os.path.basename(input_file)
-    input_dir = os.path.dirname(input_file)
 
+def _move(source, destination):
+    """Move a file or directory, renaming in place when both are on the same filesystem"""
+    if os.path.isdir(destination) and not os.path.islink(destination):
+        shutil.rmtree(destination)
+    try:
+        os.replace(source, destination)
+    except OSError:
+        # different filesystems - rename isn't possible
+        shutil.move(source, destination)
+
+
+def run_aria_mps(input_file, extra=None):
+    """Request eye gaze and hand tracking from the Aria Machine Perception Services"""
     command = [
         "aria_mps",
         "single",
@@ -70,14 +200,20 @@ def download_aria(input_file, output_dir, extra=None):
         return False
 
     print("Download complete")
+    return True
+
+
+def move_aria_mps_outputs(input_file, output_dir):
+    """Move the json and mps_ directory aria_mps writes next to the VRS file into output_dir"""
+    base_name = os.path.basename(input_file)
+    input_dir = os.path.dirname(input_file)
 
     try:
         json_file = os.path.join(input_dir, f"{base_name}.json")
         if os.path.exists(json_file):
             output_json = os.path.join(output_dir, f"{base_name}.json")
             print(f"Moving {json_file} to {output_json}")
-            shutil.copy2(json_file, output_json)
-            os.remove(json_file)
+            _move(json_file, output_json)
 
         mps_dir = os.path.join(input_dir, f"mps_{base_name.replace('.', '_')}")
         if os.path.exists(mps_dir):
@@ -85,15 +221,19 @@ def download_aria(input_file, output_dir, extra=None):
                 output_dir, f"mps_{base_name.replace('.', '_')}"
             )
             print(f"Moving {mps_dir} to {output_mps_dir}")
-            if os.path.exists(output_mps_dir):
-                shutil.rmtree(output_mps_dir)
-            shutil.copytree(mps_dir, output_mps_dir)
-            shutil.rmtree(mps_dir)
+            _move(mps_dir, output_mps_dir)
 
     except Exception as e:
         print(f"Error moving files: {e}")
         return False
 
+    return True
+
+
+def vrs_to_mp4(input_file, output_dir):
+    """Convert the RGB stream of a VRS file to mp4"""
+    base_name = os.path.basename(input_file)
+
     print(f"Downloading video for {input_file} and saving it as {base_name}.mp4")
     command = [
         "vrs_to_mp4",
@@ -115,7 +255,443 @@ def download_aria(input_file, output_dir, extra=None):
     return True
 
 
-def download_pupil_zip(zip_file, output_dir):
+def download_aria(input_file, output_dir, extra=None):
+    """Process Aria data files"""
+    print(f"Getting eye gaze data from {input_file}")
+
+    if not run_aria_mps(input_file, extra):
+        return False
+
+    if not move_aria_mps_outputs(input_file, output_dir):
+        return False
+
+    return vrs_to_mp4(input_file, output_dir)
+
+
+class BatchState:
+    """
+    Completed and failed stages per input file, saved as json so an interrupted batch can be rerun.
+    Completed stages are skipped on the next run, failed ones are tried again.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._state = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                self._state = json.load(f)
+
+    def _entry(self, key):
+        return self._state.setdefault(key, {"done": [], "failed": {}})
+
+    def done(self, key, stage):
+        with self._lock:
+            return stage in self._state.get(key, {}).get("done", [])
+
+    def failure(self, key, stage):
+        """Why stage failed for key, or None if it hasn't"""
+        with self._lock:
+            return self._state.get(key, {}).get("failed", {}).get(stage)
+
+    def failed(self):
+        """Keys with a failed stage"""
+        with self._lock:
+            return [key for key, entry in self._state.items() if entry["failed"]]
+
+    def mark(self, key, stage):
+        with self._lock:
+            entry = self._entry(key)
+            if stage not in entry["done"]:
+                entry["done"].append(stage)
+            entry["failed"].pop(stage, None)
+            self._save()
+
+    def fail(self, key, stage, reason):
+        with self._lock:
+            self._entry(key)["failed"][stage] = str(reason)
+            self._save()
+
+    def _save(self):
+        temporary = f"{self.path}.tmp"
+        with open(temporary, "w") as f:
+            json.dump(self._state, f, indent=4)
+        os.replace(temporary, self.path)
+
+
+def find_vrs_files(inputs):
+    """Expand directories in inputs to the .vrs files they contain"""
+    files = []
+    for item in inputs:
+        if os.path.isdir(item):
+            files.extend(sorted(str(p) for p in pathlib.Path(item).glob("*.vrs")))
+        else:
+            files.append(str(item))
+    return files
+
+
+def download_aria_batch(input_files, output_dir, extra=None, workers=DEFAULT_WORKERS):
+    """
+    Process many Aria VRS files.
+
+    aria_mps runs for one file at a time, while the local vrs_to_mp4 conversions run in a
+    process pool alongside it. Completed stages are recorded in output_dir so rerunning the
+    same batch only repeats the work that didn't finish.
+    """
+    input_files = [os.path.abspath(f) for f in find_vrs_files(input_files)]
+    if not input_files:
+        print("No VRS files found")
+        return False
+
+    state = BatchState(os.path.join(output_dir, "aria_batch_state.json"))
+
+    def record(input_file, stage, outcome):
+        """outcome is the stage's result, or the exception it raised"""
+        if outcome is True:
+            state.mark(input_file, stage)
+        else:
+            state.fail(input_file, stage, outcome if isinstance(outcome, Exception) else f"{stage} failed")
+
+    conversions = {}
+    with ProcessPoolExecutor(max_workers=max(1, workers)) as pool:
+        for input_file in input_files:
+            if state.done(input_file, "mp4"):
+                print(f"Video for {input_file} already converted, skipping...")
+            else:
+                conversions[input_file] = pool.submit(vrs_to_mp4, input_file, str(output_dir))
+
+        for idx, input_file in enumerate(input_files, 1):
+            if state.done(input_file, "mps"):
+                print(f"MPS data for {input_file} already downloaded, skipping...")
+                continue
+
+            print(f"\nGetting eye gaze data {idx}/{len(input_files)} from {input_file}")
+            try:
+                outcome = run_aria_mps(input_file, extra) and move_aria_mps_outputs(input_file, output_dir)
+            except Exception as e:
+                # e.g. aria_mps isn't installed
+                print(f"Error: {e}")
+                outcome = e
+            record(input_file, "mps", outcome)
+
+    # the pool has finished - anything a conversion raised (a missing vrs_to_mp4, a broken pool) is here
+    for input_file, future in conversions.items():
+        try:
+            outcome = future.result()
+        except Exception as e:
+            print(f"Error converting {input_file}: {e}")
+            outcome = e
+        record(input_file, "mp4", outcome)
+
+    failed = [f for f in input_files if f in state.failed()]
+    for input_file in failed:
+        print(f"Failed to process {input_file}")
+
+    return not failed
+
+
+def _member_path(output_dir, name):
+    """Location for a zip member under output_dir, ignoring absolute paths and '..' like ZipFile does"""
+    parts = [p for p in name.replace("\\", "/").split("/") if p not in ("", ".", "..")]
+    return os.path.join(output_dir, *parts)
+
+
+def _extract_members(zip_ref, members, output_dir, workers):
+    """Extract members with a thread pool, largest first - zlib releases the GIL while inflating"""
+    members = sorted(members, key=lambda info: info.file_size, reverse=True)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        list(pool.map(lambda info: zip_ref.extract(info, output_dir), members))
+
+
+class DownloadProgress:
+    """
+    Number of bytes of a download that are on disk, for readers following the file as it grows.
+    restarts counts the times the download went back to zero, when anything read before is stale.
+    """
+
+    def __init__(self, written=0):
+        self._written = written
+        self._restarts = 0
+        self._finished = False
+        self._condition = threading.Condition()
+
+    @property
+    def written(self):
+        with self._condition:
+            return self._written
+
+    @property
+    def restarts(self):
+        with self._condition:
+            return self._restarts
+
+    def update(self, written):
+        with self._condition:
+            if written < self._written:
+                self._restarts += 1
+            self._written = written
+            self._condition.notify_all()
+
+    def finish(self):
+        with self._condition:
+            self._finished = True
+            self._condition.notify_all()
+
+    def wait_for(self, offset, restarts=None):
+        """
+        Block until offset bytes are on disk. Returns False if the download ended before then, or,
+        if restarts is given, if the download has restarted since then.
+        """
+        with self._condition:
+            def restarted():
+                return restarts is not None and self._restarts != restarts
+
+            self._condition.wait_for(lambda: self._written >= offset or self._finished or restarted())
+            return self._written >= offset and not restarted()
+
+
+class StreamingZipExtractor:
+    """
+    Extracts a zip file while it is still being downloaded.
+
+    Local file headers are read as they arrive. Members whose compressed size is known are
+    handed to a thread pool as soon as their data is on disk, so large members inflate in
+    parallel with each other and with the download. Deflated members written with a data
+    descriptor (size unknown up front, usual for zips the server streams) can only be found
+    to end by inflating them, so they are inflated on the scanning thread as the bytes arrive -
+    one at a time, overlapping the download but not each other. Anything that can't be
+    streamed (encrypted, other compression methods) is left for finish(), which checks the
+    central directory once the download is complete.
+
+    If the download starts again from zero, whatever was extracted is forgotten, and the scan
+    starts again from the new file.
+    """
+
+    def __init__(self, filename, output_dir, progress, workers=DEFAULT_EXTRACT_WORKERS, chunk_size=DEFAULT_CHUNK_SIZE):
+        self.filename = filename
+        self.output_dir = output_dir
+        self.progress = progress
+        self.chunk_size = chunk_size
+        self.extracted = set()
+        self._file = None
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max(1, workers))
+        self._jobs = []
+        self._thread = threading.Thread(target=self._scan, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _open(self):
+        # the download is renamed from .part when complete, an open handle survives that
+        for candidate in (f"{self.filename}.part", self.filename):
+            try:
+                return open(candidate, "rb")
+            except FileNotFoundError:
+                continue
+        raise FileNotFoundError(self.filename)
+
+    def _read_at(self, offset, size):
+        with self._lock:
+            self._file.seek(offset)
+            return self._file.read(size)
+
+    def _read_available(self, offset, size):
+        """Wait for exactly size bytes at offset to arrive, or None if the download stopped short or restarted"""
+        if not self.progress.wait_for(offset + size, self._generation):
+            return None
+        data = self._read_at(offset, size)
+        return data if len(data) == size else None
+
+    def _scan(self):
+        while True:
+            self._generation = self.progress.restarts
+            self._scan_once()
+
+            # wait for the download to end - if it restarted instead, scan the new file
+            self.progress.wait_for(float("inf"), self._generation)
+            if self.progress.restarts == self._generation:
+                return
+            print(f"Download of {self.filename} restarted, extracting it again")
+            self._reset()
+
+    def _scan_once(self):
+        try:
+            if not self.progress.wait_for(ZIP_LOCAL_HEADER.size, self._generation):
+                return
+            self._file = self._open()
+
+            offset = 0
+            while offset is not None:
+                offset = self._next_member(offset)
+        except Exception as e:
+            print(f"Streaming extraction stopped, will finish from the central directory: {e}")
+
+    def _reset(self):
+        """Forget everything from before a restart - members being extracted then are read from stale data"""
+        for job in self._jobs:
+            try:
+                job.result()
+            except Exception:
+                pass
+        self._jobs = []
+        self.extracted.clear()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _next_member(self, offset):
+        header = self._read_available(offset, ZIP_LOCAL_HEADER.size)
+        if header is None:
+            return None
+
+        (signature, _, flags, method, _, _, crc, csize, usize, name_len, extra_len) = ZIP_LOCAL_HEADER.unpack(header)
+        if signature != ZIP_LOCAL_SIGNATURE:
+            # central directory reached - all members seen
+            return None
+
+        variable = self._read_available(offset + ZIP_LOCAL_HEADER.size, name_len + extra_len)
+        if variable is None:
+            return None
+
+        name = variable[:name_len].decode("utf-8" if flags & 0x800 else "cp437")
+        zip64 = False
+        if csize == ZIP64_LIMIT or usize == ZIP64_LIMIT:
+            usize, csize = self._zip64_sizes(variable[name_len:], usize, csize)
+            zip64 = True
+
+        data_offset = offset + ZIP_LOCAL_HEADER.size + name_len + extra_len
+
+        if name.endswith("/"):
+            os.makedirs(_member_path(self.output_dir, name), exist_ok=True)
+            self.extracted.add(name)
+            return data_offset + csize + (self._descriptor_length(data_offset + csize, zip64) if flags & 0x8 else 0)
+
+        if flags & 0x1 or method not in (ZIP_STORED, ZIP_DEFLATED):
+            if flags & 0x8:
+                return None
+            return data_offset + csize
+
+        if flags & 0x8 and csize == 0:
+            if method != ZIP_DEFLATED:
+                # stored data with a trailing descriptor has no way of finding its end
+                return None
+            return self._inflate_streaming(name, data_offset, zip64)
+
+        if not self.progress.wait_for(data_offset + csize, self._generation):
+            return None
+
+        self._jobs.append(self._pool.submit(self._extract_range, name, method, data_offset, csize, crc))
+        return data_offset + csize + (self._descriptor_length(data_offset + csize, zip64) if flags & 0x8 else 0)
+
+    @staticmethod
+    def _zip64_sizes(extra, usize, csize):
+        position = 0
+        while position + 4 <= len(extra):
+            header_id, size = struct.unpack_from("<HH", extra, position)
+            if header_id == ZIP64_EXTRA:
+                values = list(struct.unpack_from(f"<{size // 8}Q", extra, position + 4))
+                if usize == ZIP64_LIMIT:
+                    usize = values.pop(0)
+                if csize == ZIP64_LIMIT:
+                    csize = values.pop(0)
+                break
+            position += 4 + size
+        return usize, csize
+
+    def _descriptor_length(self, offset, zip64):
+        sizes = 16 if zip64 else 8
+        signature = self._read_available(offset, 4)
+        if signature is not None and struct.unpack("<I", signature)[0] == ZIP_DESCRIPTOR_SIGNATURE:
+            return 4 + 4 + sizes
+        return 4 + sizes
+
+    def _extract_range(self, name, method, offset, csize, crc):
+        decompressor = zlib.decompressobj(-15) if method == ZIP_DEFLATED else None
+        path = _member_path(self.output_dir, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        actual = 0
+        with open(path, "wb") as out:
+            end = offset + csize
+            while offset < end:
+                data = self._read_at(offset, min(self.chunk_size, end - offset))
+                if not data:
+                    raise IOError(f"{self.filename} ends at {offset}, before the end of {name}")
+                offset += len(data)
+                if decompressor:
+                    data = decompressor.decompress(data)
+                actual = zlib.crc32(data, actual)
+                out.write(data)
+            if decompressor:
+                data = decompressor.flush()
+                actual = zlib.crc32(data, actual)
+                out.write(data)
+
+        if actual != crc:
+            raise zipfile.BadZipFile(f"CRC mismatch extracting {name}")
+        self.extracted.add(name)
+
+    def _inflate_streaming(self, name, offset, zip64):
+        decompressor = zlib.decompressobj(-15)
+        path = _member_path(self.output_dir, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        actual = 0
+        with open(path, "wb") as out:
+            while not decompressor.eof:
+                if not self.progress.wait_for(offset + 1, self._generation):
+                    return None
+                data = self._read_available(offset, min(self.chunk_size, max(1, self.progress.written - offset)))
+                if data is None:
+                    return None
+                offset += len(data)
+                data = decompressor.decompress(data)
+                actual = zlib.crc32(data, actual)
+                out.write(data)
+
+        # the read may have run past the end of the compressed data
+        offset -= len(decompressor.unused_data)
+        length = self._descriptor_length(offset, zip64)
+        descriptor = self._read_available(offset, length)
+        if descriptor is None:
+            return None
+        crc, = struct.unpack_from("<I", descriptor, length - (20 if zip64 else 12))
+        if actual != crc:
+            raise zipfile.BadZipFile(f"CRC mismatch extracting {name}")
+        self.extracted.add(name)
+        return offset + length
+
+    def close(self):
+        """Wait for the scan and any queued members"""
+        self._thread.join()
+        try:
+            for job in self._jobs:
+                try:
+                    job.result()
+                except Exception as e:
+                    print(f"Streaming extraction of a member failed: {e}")
+        finally:
+            self._pool.shutdown()
+            if self._file is not None:
+                self._file.close()
+
+    def finish(self, workers=DEFAULT_EXTRACT_WORKERS):
+        """Wait for streaming extraction, then extract anything it missed using the central directory"""
+        # members only count as extracted once their CRC matched, so failures are retried here
+        self.close()
+
+        with zipfile.ZipFile(self.filename, "r") as zip_ref:
+            remaining = [info for info in zip_ref.infolist() if info.filename not in self.extracted]
+            if remaining:
+                print(f"Extracting {len(remaining)} remaining members from {self.filename}")
+                _extract_members(zip_ref, remaining, self.output_dir, workers)
+
+
+def download_pupil_zip(zip_file, output_dir, workers=DEFAULT_EXTRACT_WORKERS, delete_zip=False):
     """Extract Pupil zip file to output directory"""
     print(f"Extracting Pupil data from {zip_file} to {output_dir}")
 
@@ -124,15 +700,62 @@ def download_pupil_zip(zip_file, output_dir):
 
     try:
         with zipfile.ZipFile(zip_file, "r") as zip_ref:
-            zip_ref.extractall(output_dir)
+            _extract_members(zip_ref, zip_ref.infolist(), output_dir, workers)
         print("Extraction complete")
-        return True
     except Exception as e:
         print(f"Error extracting zip file: {e}")
         return False
 
+    open(os.path.join(output_dir, COMPLETE_MARKER), "w").close()
+
+    if delete_zip:
+        os.remove(zip_file)
+    return True
+
+
+def download_and_extract_pupil(downloader, url, filename, extract_dir, workers=DEFAULT_EXTRACT_WORKERS, delete_zip=False):
+    """Download a Pupil export, extracting members while the rest of the zip is still arriving"""
+    os.makedirs(extract_dir, exist_ok=True)
+
+    partial = f"{filename}.part"
+    progress = DownloadProgress(os.path.getsize(partial) if os.path.exists(partial) else 0)
+    extractor = StreamingZipExtractor(filename, extract_dir, progress, workers=workers).start()
+
+    try:
+        success = downloader.download(url, filename, on_progress=progress.update)
+    finally:
+        progress.finish()
+
+    if not success:
+        print(f"Failed to download raw data from {url}")
+        extractor.close()
+        return False
+
+    print(f"Successfully downloaded to {filename}")
+
+    try:
+        extractor.finish(workers)
+    except Exception as e:
+        print(f"Error extracting zip file: {e}")
+        return False
+
+    open(os.path.join(extract_dir, COMPLETE_MARKER), "w").close()
+    print(f"Extraction complete: {extract_dir}")
+
+    if delete_zip:
+        os.remove(filename)
+    return True
+
 
-def download_pupil_by_date(date_str, output_dir):
+def download_pupil_by_date(
+    date_str,
+    output_dir,
+    workers=DEFAULT_WORKERS,
+    chunk_size=DEFAULT_CHUNK_SIZE,
+    base_url=PUPIL_API_URL,
+    extract_workers=DEFAULT_EXTRACT_WORKERS,
+    delete_zip=False,
+):
     """Download Pupil data for a specific date"""
     try:
         given_date = date.fromisoformat(date_str)
@@ -148,78 +771,91 @@ def download_pupil_by_date(date_str, output_dir):
 
     headers = {"api-key": api_key, "workspace-id": workspace_id}
 
-    base_url = "https://api.cloud.pupil-labs.com/v2"
     recordings_url = f"{base_url}/workspaces/{workspace_id}/recordings/"
 
-    try:
-        response = requests.get(recordings_url, headers=headers)
-        response.raise_for_status()
-    except requests.exceptions.RequestException as e:
-        print(f"Failed to fetch recordings: {e}")
-        return False
-
-    recordings = response.json().get("result", [])
-
-    matching_recordings = []
-    for recording in recordings:
-        recorded_at_str = recording.get("recorded_at")
-        if not recorded_at_str:
-            continue
+    with Downloader(headers=headers, workers=workers, chunk_size=chunk_size) as downloader:
         try:
-            dt = parse(recorded_at_str)
-            utc_dt = dt.astimezone(timezone("UTC"))
-            if utc_dt.date() == given_date:
-                if recording.get("is_processed", False) and recording.get(
-                    "download_url"
-                ):
-                    matching_recordings.append(recording)
-        except Exception as e:
-            print(f"Error parsing date {recorded_at_str}: {e}")
-            continue
-
-    if not matching_recordings:
-        print(f"No processed recordings found for {date_str}.")
-        return False
-
-    print(f"Found {len(matching_recordings)} recordings for {date_str}")
-
-    os.makedirs(output_dir, exist_ok=True)
-    print(f"Saving files to: {output_dir}")
-
-    for idx, recording in enumerate(matching_recordings, 1):
-        recording_id = recording["id"]
-        recording_name = recording.get("name", recording_id)
-
-        params = {
-            "ids": recording_id,
-        }
-        export_url = f"{base_url}/workspaces/{workspace_id}/recordings:raw-data-export?{urlencode(params, doseq=True)}"
-
-        filename = os.path.join(
-            output_dir, f"{recording_name.replace(' ', '_')}_{recording_id}.zip"
-        )
-
-        print(f"\nDownloading raw data {idx}/{len(matching_recordings)}")
-        print(f"Recording ID: {recording_id}")
-        print(f"Export URL: {export_url}")
-
-        if os.path.exists(filename):
-            print("File already exists, skipping...")
-            continue
-
-        if download_file(export_url, filename, headers):
-            print(f"Successfully downloaded to {filename}")
+            response = downloader.get(recordings_url)
+            response.raise_for_status()
+        except requests.exceptions.RequestException as e:
+            print(f"Failed to fetch recordings: {e}")
+            return False
+
+        recordings = response.json().get("result", [])
+
+        matching_recordings = []
+        for recording in recordings:
+            recorded_at_str = recording.get("recorded_at")
+            if not recorded_at_str:
+                continue
+            try:
+                dt = parse(recorded_at_str)
+                utc_dt = dt.astimezone(timezone("UTC"))
+                if utc_dt.date() == given_date:
+                    if recording.get("is_processed", False) and recording.get(
+                        "download_url"
+                    ):
+                        matching_recordings.append(recording)
+            except Exception as e:
+                print(f"Error parsing date {recorded_at_str}: {e}")
+                continue
+
+        if not matching_recordings:
+            print(f"No processed recordings found for {date_str}.")
+            return False
+
+        print(f"Found {len(matching_recordings)} recordings for {date_str}")
+
+        os.makedirs(output_dir, exist_ok=True)
+        print(f"Saving files to: {output_dir}")
+
+        jobs = []
+        extracted = []
+        for idx, recording in enumerate(matching_recordings, 1):
+            recording_id = recording["id"]
+            recording_name = recording.get("name", recording_id)
+
+            params = {
+                "ids": recording_id,
+            }
+            export_url = f"{base_url}/workspaces/{workspace_id}/recordings:raw-data-export?{urlencode(params, doseq=True)}"
+
+            filename = os.path.join(
+                output_dir, f"{recording_name.replace(' ', '_')}_{recording_id}.zip"
+            )
 
-            # Automatically extract the zip file
-            extract_dir = os.path.join(
-                output_dir, f"{recording_name.replace(' ', '_')}_{recording_id}"
+            print(f"\nQueueing raw data {idx}/{len(matching_recordings)}")
+            print(f"Recording ID: {recording_id}")
+            print(f"Export URL: {export_url}")
+
+            extract_dir = os.path.splitext(filename)[0]
+
+            if os.path.exists(os.path.join(extract_dir, COMPLETE_MARKER)):
+                print("Already downloaded and extracted, skipping...")
+                continue
+
+            if os.path.exists(filename):
+                print("File already exists, extracting...")
+                success = download_pupil_zip(filename, extract_dir, workers=extract_workers, delete_zip=delete_zip)
+                if not success:
+                    print(f"Failed to extract existing file {filename}")
+                extracted.append(success)
+                continue
+
+            jobs.append((export_url, filename, extract_dir))
+
+        # Extraction overlaps with the download of each recording, and recordings download concurrently
+        with ThreadPoolExecutor(max_workers=downloader.workers) as pool:
+            results = list(
+                pool.map(
+                    lambda job: download_and_extract_pupil(
+                        downloader, *job, workers=extract_workers, delete_zip=delete_zip
+                    ),
+                    jobs,
+                )
             )
-            os.makedirs(extract_dir, exist_ok=True)
-            download_pupil_zip(filename, extract_dir)
-        else:
-            print(f"Failed to download raw data for {recording_id}")
 
-    return True
+    return all(extracted + results)
 
 
 def main():
@@ -238,6 +874,26 @@ def main():
         "--extra", type=str, nargs="+", help="Extra arguments for aria_mps"
     )
 
+    # Aria batch mode
+    aria_batch_parser = subparsers.add_parser(
+        "aria-batch", help="Process many Aria VRS files, resuming earlier runs"
+    )
+    aria_batch_parser.add_argument(
+        "input_files", type=str, nargs="+", help="Input VRS files or directories of them"
+    )
+    aria_batch_parser.add_argument(
+        "output_dir", type=pathlib.Path, help="Output directory"
+    )
+    aria_batch_parser.add_argument(
+        "--extra", type=str, nargs="+", help="Extra arguments for aria_mps"
+    )
+    aria_batch_parser.add_argument(
+        "--workers",
+        type=int,
+        default=DEFAULT_WORKERS,
+        help="Number of vrs_to_mp4 conversions to run in parallel",
+    )
+
     # Pupil mode with direct zip input
     pupil_zip_parser = subparsers.add_parser(
         "pupil-zip", help="Process Pupil eye tracking data from zip file"
@@ -246,6 +902,15 @@ def main():
     pupil_zip_parser.add_argument(
         "output_dir", type=pathlib.Path, help="Output directory"
     )
+    pupil_zip_parser.add_argument(
+        "--extract-workers",
+        type=int,
+        default=DEFAULT_EXTRACT_WORKERS,
+        help="Number of zip members to extract in parallel",
+    )
+    pupil_zip_parser.add_argument(
+        "--delete-zip", action="store_true", help="Delete the zip file once extracted"
+    )
 
     # Pupil mode with date-based download
     pupil_date_parser = subparsers.add_parser(
@@ -255,6 +920,27 @@ def main():
     pupil_date_parser.add_argument(
         "output_dir", type=pathlib.Path, help="Output directory"
     )
+    pupil_date_parser.add_argument(
+        "--workers",
+        type=int,
+        default=DEFAULT_WORKERS,
+        help="Number of recordings to download in parallel",
+    )
+    pupil_date_parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=DEFAULT_CHUNK_SIZE,
+        help="Download buffer size in bytes",
+    )
+    pupil_date_parser.add_argument(
+        "--extract-workers",
+        type=int,
+        default=DEFAULT_EXTRACT_WORKERS,
+        help="Number of zip members to extract in parallel",
+    )
+    pupil_date_parser.add_argument(
+        "--delete-zip", action="store_true", help="Delete each zip file once extracted"
+    )
 
     args = parser.parse_args()
 
@@ -267,10 +953,26 @@ def main():
 
     if args.mode == "aria":
         success = download_aria(args.input_file, args.output_dir, args.extra)
+    elif args.mode == "aria-batch":
+        success = download_aria_batch(
+            args.input_files, args.output_dir, args.extra, workers=args.workers
+        )
     elif args.mode == "pupil-zip":
-        success = download_pupil_zip(args.input_file, args.output_dir)
+        success = download_pupil_zip(
+            args.input_file,
+            args.output_dir,
+            workers=args.extract_workers,
+            delete_zip=args.delete_zip,
+        )
     elif args.mode == "pupil-date":
-        success = download_pupil_by_date(args.date, args.output_dir)
+        success = download_pupil_by_date(
+            args.date,
+            args.output_dir,
+            workers=args.workers,
+            chunk_size=args.chunk_size,
+            extract_workers=args.extract_workers,
+            delete_zip=args.delete_zip,
+        )
     else:
         print("Invalid mode")
         sys.exit(1)
@@ -0,0 +1,383 @@
+import csv
+import json
+import re
+import sys
+import warnings
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+# Known files written by aria_mps (eye gaze / hand tracking) and Pupil Cloud raw data exports,
+# with the column holding the timestamp and what it must be divided by to give microseconds
+MPS_EYE_GAZE = ("general_eye_gaze.csv", "personalized_eye_gaze.csv")
+MPS_HAND_TRACKING = ("hand_tracking_results.csv", "wrist_and_palm_poses.csv")
+PUPIL_GAZE = ("gaze.csv",)
+
+MPS_TIMESTAMP = ("tracking_timestamp_us", 1)
+PUPIL_TIMESTAMP = ("timestamp [ns]", 1000)
+
+_UTC_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_ONE_US = timedelta(microseconds=1)
+
+
+class TimeIndexedColumns:
+    """
+    Sensor samples stored column-wise: one sorted int64 array of microsecond timestamps,
+    and one numpy array per value column, all the same length.
+
+    The timestamp array is the index - range queries and as-of joins are binary searches
+    over it, so they cost O(log n) rather than a scan of the samples.
+    """
+
+    def __init__(self, name: str, timestamps: np.ndarray, columns: Dict[str, np.ndarray],
+                 units: Optional[Dict[str, str]] = None):
+        timestamps = np.asarray(timestamps, dtype=np.int64)
+        order = None
+        if len(timestamps) > 1 and np.any(timestamps[1:] < timestamps[:-1]):
+            order = np.argsort(timestamps, kind="stable")
+            timestamps = timestamps[order]
+
+        self.name = name
+        self.timestamps = timestamps
+        self.columns = {k: (np.asarray(v) if order is None else np.asarray(v)[order]) for k, v in columns.items()}
+        self.units = units or {}
+
+        for column, values in self.columns.items():
+            if len(values) != len(timestamps):
+                raise ValueError(f"Column {column} has {len(values)} values, but there are {len(timestamps)} timestamps")
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def __getitem__(self, column) -> np.ndarray:
+        return self.columns[column]
+
+    def __str__(self):
+        return f"TimeIndexedColumns: {self.name}, #Samples: {len(self)}, Columns: {list(self.columns.keys())}"
+
+    @property
+    def start(self) -> int:
+        return int(self.timestamps[0])
+
+    @property
+    def end(self) -> int:
+        return int(self.timestamps[-1])
+
+    def index_range(self, start_us: int, end_us: int) -> Tuple[int, int]:
+        """Indices [lo, hi) of the samples with start_us <= timestamp <= end_us"""
+        lo = int(np.searchsorted(self.timestamps, start_us, side="left"))
+        hi = int(np.searchsorted(self.timestamps, end_us, side="right"))
+        return lo, hi
+
+    def between(self, start_us: int, end_us: int) -> 'TimeIndexedColumns':
+        """Samples in the inclusive time range, as views on this data (no copying)"""
+        lo, hi = self.index_range(start_us, end_us)
+        return TimeIndexedColumns(
+            self.name,
+            self.timestamps[lo:hi],
+            {k: v[lo:hi] for k, v in self.columns.items()},
+            self.units
+        )
+
+    def shift(self, offset_us: int) -> 'TimeIndexedColumns':
+        """
+        Same samples on a different clock. MPS timestamps are device capture time, not UTC, so
+        use this to line them up with GoPro (or other) timestamps before joining.
+        """
+        return TimeIndexedColumns(self.name, self.timestamps + int(offset_us), self.columns, self.units)
+
+    def asof_indices(self, timestamps: np.ndarray, tolerance_us: Optional[int] = None) -> np.ndarray:
+        """
+        For each wanted timestamp, the index of the last sample at or before it, or -1 where there is none
+        (or the closest one is more than tolerance_us away)
+        """
+        timestamps = np.asarray(timestamps, dtype=np.int64)
+        indices = np.searchsorted(self.timestamps, timestamps, side="right") - 1
+        if tolerance_us is not None and len(self):
+            too_far = (timestamps - self.timestamps[np.maximum(indices, 0)]) > tolerance_us
+            indices[too_far] = -1
+        return indices
+
+    def asof(self, timestamps: np.ndarray, tolerance_us: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """
+        Values of every column as of each of the given timestamps. Where there is no value, numeric columns
+        are NaN (so integer and bool columns become float), and other columns become object arrays holding None.
+        """
+        indices = self.asof_indices(timestamps, tolerance_us)
+        missing = indices < 0
+
+        result = {}
+        for column, values in self.columns.items():
+            taken = values[np.maximum(indices, 0)] if len(values) else np.empty(len(indices), dtype=values.dtype)
+            if missing.any():
+                if taken.dtype.kind in "fc":
+                    taken = taken.copy()
+                    taken[missing] = np.nan
+                elif taken.dtype.kind in "iub":
+                    taken = taken.astype(np.float64)
+                    taken[missing] = np.nan
+                else:
+                    # a None stored in a string array would be the text 'None'
+                    taken = taken.astype(object)
+                    taken[missing] = None
+            result[column] = taken
+        return result
+
+    def join_asof(self, other: 'TimeIndexedColumns', tolerance_us: Optional[int] = None,
+                  prefix: Optional[str] = None) -> 'TimeIndexedColumns':
+        """This data, plus the columns of other as of each of our timestamps"""
+        prefix = f"{other.name}." if prefix is None else prefix
+        joined = dict(self.columns)
+        joined.update({f"{prefix}{k}": v for k, v in other.asof(self.timestamps, tolerance_us).items()})
+        units = dict(self.units)
+        units.update({f"{prefix}{k}": v for k, v in other.units.items()})
+        return TimeIndexedColumns(self.name, self.timestamps, joined, units)
+
+    def save(self, path: Path, source: Optional[Dict] = None):
+        """Store as an .npz file, with source recording what the data was converted from"""
+        meta = {"name": self.name, "units": self.units, "columns": list(self.columns), "source": source}
+        np.savez(
+            path,
+            timestamps=self.timestamps,
+            __meta__=np.array(json.dumps(meta)),
+            **{f"column_{i}": v for i, v in enumerate(self.columns.values())}
+        )
+
+    @staticmethod
+    def source_of(path: Path) -> Optional[Dict]:
+        """The source given when path was saved, without loading the data"""
+        with np.load(path, allow_pickle=False) as npz:
+            return json.loads(str(npz["__meta__"])).get("source")
+
+    @staticmethod
+    def load(path: Path) -> 'TimeIndexedColumns':
+        with np.load(path, allow_pickle=False) as npz:
+            meta = json.loads(str(npz["__meta__"]))
+            columns = {name: npz[f"column_{i}"] for i, name in enumerate(meta["columns"])}
+            return TimeIndexedColumns(meta["name"], npz["timestamps"], columns, meta["units"])
+
+
+def column_name(header: str) -> str:
+    """'gaze x [px]' -> 'gaze_x_px'"""
+    return re.sub(r"[^0-9a-zA-Z]+", "_", header).strip("_").lower()
+
+
+def _timestamps(text: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Integer timestamps of a column of text, and which of them are usable. Integers are converted exactly -
+    nanosecond timestamps don't fit in a float - and anything else that is a finite number is accepted as a float.
+    """
+    timestamps = np.zeros(len(text), dtype=np.int64)
+    integers = np.char.isdigit(text)
+    timestamps[integers] = text[integers].astype(np.int64)
+
+    valid = integers.copy()
+    for index in np.flatnonzero(~integers & (text != "")):
+        try:
+            value = float(text[index])
+        except ValueError:
+            continue
+        if np.isfinite(value):
+            timestamps[index] = int(value)
+            valid[index] = True
+    return timestamps, valid
+
+
+def load_csv(path: Path, timestamp_column: str, per_micro: int = 1, name: Optional[str] = None) -> TimeIndexedColumns:
+    """
+    Load a CSV of samples into columns. Columns that aren't numeric (ids, uids) are dropped, as are rows
+    with the wrong number of fields or without a usable timestamp.
+    Args:
+        path: CSV file
+        timestamp_column: header of the column holding each sample's timestamp
+        per_micro: timestamp units per microsecond (1000 for nanoseconds)
+        name: name for the data, defaults to the file name
+    Returns:
+        TimeIndexedColumns
+    """
+    path = Path(path)
+    with open(path, newline="") as f:
+        headers = next(csv.reader(f))
+        lines = [line for line in f.read().splitlines() if line.strip()]
+
+    if timestamp_column not in headers:
+        raise IOError(f"{path} has no '{timestamp_column}' column - columns are {headers}")
+
+    if lines:
+        with warnings.catch_warnings():
+            # rows with the wrong number of fields are skipped, and counted below
+            warnings.simplefilter("ignore")
+            table = np.genfromtxt(lines, delimiter=",", dtype=str, comments=None, invalid_raise=False, ndmin=2)
+    else:
+        table = np.empty((0, len(headers)), dtype=str)
+
+    ts_index = headers.index(timestamp_column)
+    timestamps, valid = _timestamps(table[:, ts_index])
+
+    skipped = len(lines) - int(np.count_nonzero(valid))
+    if skipped:
+        print(f"{path}: skipped {skipped} of {len(lines)} rows with missing fields or no usable '{timestamp_column}'")
+
+    table = table[valid]
+    timestamps = timestamps[valid] // per_micro
+
+    columns = {}
+    for index, header in enumerate(headers):
+        if index == ts_index:
+            continue
+        values = table[:, index]
+        try:
+            columns[column_name(header)] = np.where(values == "", "nan", values).astype(np.float64)
+        except ValueError:
+            continue
+
+    return TimeIndexedColumns(name or path.stem, timestamps, columns)
+
+
+def _date_to_micros(date: str) -> int:
+    dt = datetime.fromisoformat(date.replace("Z", "+00:00"))
+    return int(round(dt.timestamp() * 1_000_000))
+
+
+def load_gopro_sensor(path: Path, name: Optional[str] = None) -> TimeIndexedColumns:
+    """
+    Load a "<SENSOR>_combined.json" file written by Generate.extract_data into the same layout as the
+    glasses data, indexed by the UTC sample dates so it can be joined against them.
+    """
+    path = Path(path)
+    with open(path) as f:
+        data = json.load(f)
+
+    samples = data["samples"] if isinstance(data, dict) else data
+    samples = [s for s in samples if "date" in s]
+
+    timestamps = np.array([_date_to_micros(s["date"]) for s in samples], dtype=np.int64)
+
+    columns = {}
+    if samples:
+        if "cts" in samples[0]:
+            columns["cts"] = np.array([s.get("cts", np.nan) for s in samples], dtype=np.float64)
+
+        values = [s["value"] for s in samples]
+        if isinstance(values[0], list):
+            width = len(values[0])
+            numeric = [v if isinstance(v, list) and len(v) == width else [np.nan] * width for v in values]
+            try:
+                array = np.array(numeric, dtype=np.float64)
+                for i in range(width):
+                    columns[f"value_{i}"] = array[:, i]
+            except (TypeError, ValueError):
+                pass
+        else:
+            try:
+                columns["value"] = np.array(values, dtype=np.float64)
+            except (TypeError, ValueError):
+                pass
+
+    units = {}
+    if isinstance(data, dict) and "units" in data:
+        declared = data["units"] if isinstance(data["units"], list) else [data["units"]] * len(columns)
+        units = {k: u for k, u in zip([c for c in columns if c != "cts"], declared)}
+
+    return TimeIndexedColumns(name or path.stem.replace("_combined", ""), timestamps, columns, units)
+
+
+def _source(path: Path) -> Dict:
+    stat = path.stat()
+    return {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+
+
+def _cached(path: Path, load) -> TimeIndexedColumns:
+    """
+    Converting a CSV is a full scan, so keep the converted columns next to it, and reuse them while the CSV
+    has the same modification time and size as when they were converted
+    """
+    cache = path.with_suffix(".npz")
+    source = _source(path)
+    if cache.exists():
+        try:
+            if TimeIndexedColumns.source_of(cache) == source:
+                return TimeIndexedColumns.load(cache)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Ignoring unreadable cache {cache}: {e}")
+    data = load()
+    try:
+        data.save(cache, source)
+    except OSError as e:
+        print(f"Unable to cache {path} as {cache}: {e}")
+    return data
+
+
+def framemeta_dates(framemeta) -> np.ndarray:
+    """UTC date of each frame of a gopro_overlay FrameMeta or ColumnarFrameMeta, in microseconds"""
+    if hasattr(framemeta, "dt_us"):
+        # ColumnarFrameMeta already holds its dates as microseconds, but relative to 1970 in its own timezone
+        if not len(framemeta):
+            return np.array([], dtype=np.int64)
+        utc = (framemeta.date_of(0) - _UTC_EPOCH) // _ONE_US
+        return framemeta.dt_us + (utc - int(framemeta.dt_us[0]))
+
+    framemeta.check_modified()
+    return np.array([(framemeta.frames[t].dt - _UTC_EPOCH) // _ONE_US for t in framemeta.framelist], dtype=np.int64)
+
+
+def framemeta_times(framemeta) -> np.ndarray:
+    """Frame time of each frame of a FrameMeta or ColumnarFrameMeta, in microseconds"""
+    if hasattr(framemeta, "time_us"):
+        return framemeta.time_us
+    return framemeta.framelist_us()
+
+
+def join_framemeta(framemeta, data: TimeIndexedColumns, tolerance_us: Optional[int] = None,
+                   prefix: Optional[str] = None) -> TimeIndexedColumns:
+    """
+    The columns of data as of each frame of a GoPro FrameMeta or ColumnarFrameMeta, indexed by the UTC date
+    of the frame, with the frame time itself in the "frame_us" column. data must be on the UTC clock -
+    shift() MPS data there first.
+    """
+    frames = TimeIndexedColumns("gopro", framemeta_dates(framemeta), {"frame_us": framemeta_times(framemeta)})
+    return frames.join_asof(data, tolerance_us, prefix)
+
+
+def load_glasses_data(directory: Path, use_cache: bool = True) -> Dict[str, TimeIndexedColumns]:
+    """
+    Find and load all the eye gaze / hand tracking streams below a directory written by GlassesDownload
+    Args:
+        directory: the output directory of an aria or pupil download
+        use_cache: store/reuse converted columns as .npz files alongside the CSVs
+    Returns:
+        Dictionary of stream name (e.g. "general_eye_gaze", "gaze") to its columns
+    """
+    loaders = {}
+    for filename in MPS_EYE_GAZE + MPS_HAND_TRACKING:
+        loaders[filename] = MPS_TIMESTAMP
+    for filename in PUPIL_GAZE:
+        loaders[filename] = PUPIL_TIMESTAMP
+
+    found = {}
+    for path in sorted(Path(directory).rglob("*.csv")):
+        if path.name not in loaders:
+            continue
+        timestamp_column, per_micro = loaders[path.name]
+
+        name = path.stem
+        if name in found:
+            name = f"{path.parent.name}/{name}"
+
+        load = lambda p=path, c=timestamp_column, m=per_micro, n=name: load_csv(p, c, m, name=n)
+        found[name] = _cached(path, load) if use_cache else load()
+
+    return found
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print(f"Usage: {sys.argv[0]} <glasses data directory>")
+        sys.exit(1)
+
+    for stream in load_glasses_data(Path(sys.argv[1])).values():
+        print(stream)
+        if len(stream):
+            print(f"    {stream.start} -> {stream.end}")
@@ -6,7 +6,7 @@ from importlib.metadata import PackageNotFoundError
 from pathlib import Path
 from typing import Optional
 
-from gopro_overlay import timeseries_process, gpmd_filters
+from gopro_overlay import gpmd_filters
 from gopro_overlay.arguments import gopro_dashboard_arguments
 from gopro_overlay.assertion import assert_file_exists
 from gopro_overlay.buffering import SingleBuffer, DoubleBuffer
@@ -21,16 +21,18 @@ from gopro_overlay.ffmpeg_gopro import FFMPEGGoPro
 from gopro_overlay.ffmpeg_overlay import FFMPEGNull, FFMPEGOverlay, FFMPEGOverlayVideo
 from gopro_overlay.ffmpeg_profile import load_ffmpeg_profile
 from gopro_overlay.font import load_font
+from gopro_overlay.framemeta_gpmd import AcclOptions
 from gopro_overlay.framemeta_gpx import merge_gpx_with_gopro, timeseries_to_framemeta
 from gopro_overlay.geo import MapRenderer, api_key_finder, MapStyler
-from gopro_overlay.gpmf import GPS_FIXED_VALUES, GPSFix
 from gopro_overlay.layout import Overlay, speed_awareness_layout
 from gopro_overlay.layout_xml import layout_from_xml, load_xml_layout, Converters
 from gopro_overlay.loading import load_external, GoproLoader
 from gopro_overlay.log import log, fatal
+from gopro_overlay.pipeline import gopro_processing
 from gopro_overlay.point import Point
 from gopro_overlay.privacy import PrivacyZone, NoPrivacyZone
 from gopro_overlay.progresstrack import ProgressBarProgress
+from gopro_overlay.render_table import RenderTable
 from gopro_overlay.timeunits import timeunits, Timeunit
 from gopro_overlay.timing import PoorTimer, Timers
 from gopro_overlay.units import units
@@ -50,7 +52,7 @@ def accepter_from_args(include, exclude):
 
 
 def create_desired_layout(dimensions, layout, layout_xml: Path, include, exclude, renderer, timeseries, font,
-                          privacy_zone, profiler, converters: Converters):
+                          privacy_zone, profiler, converters: Converters, table: Optional[RenderTable] = None):
     accepter = accepter_from_args(include, exclude)
 
     if layout_xml:
@@ -61,7 +63,7 @@ def create_desired_layout(dimensions, layout, layout_xml: Path, include, exclude
         try:
             return layout_from_xml(
                 load_xml_layout(resource_name), renderer, timeseries, font, privacy_zone, include=accepter,
-                decorator=profiler, converters=converters
+                decorator=profiler, converters=converters, table=table
             )
         except FileNotFoundError:
             raise IOError(f"Unable to locate bundled layout resource: {resource_name}. "
@@ -72,7 +74,7 @@ def create_desired_layout(dimensions, layout, layout_xml: Path, include, exclude
     elif layout == "xml":
         return layout_from_xml(
             load_xml_layout(layout_xml), renderer, timeseries, font, privacy_zone, include=accepter,
-            decorator=profiler, converters=converters
+            decorator=profiler, converters=converters, table=table
         )
     else:
         raise ValueError(f"Unsupported layout {args.layout_creator}")
@@ -123,6 +125,10 @@ if __name__ == "__main__":
     inputpath: Optional[Path] = None
     generate = args.generate
 
+    clip_start = timeunits(seconds=args.start) if args.start is not None else None
+    clip_end = timeunits(seconds=args.end) if args.end is not None else None
+    timelapse_correction = None
+
     config_dir = args.config_dir
     config_dir.mkdir(exist_ok=True)
 
@@ -210,10 +216,14 @@ if __name__ == "__main__":
                             speed_max=units.Quantity(args.gps_speed_max, args.gps_speed_max_units),
                             bbox=args.gps_bbox_lon_lat,
                             report=counter.because
-                        )
+                        ),
+                        accl=AcclOptions(decimation=args.accl_decimation, low_pass=args.accl_filter),
                     )
 
-                    gopro = loader.load(inputpath)
+                    try:
+                        gopro = loader.load(inputpath, start=clip_start, end=clip_end)
+                    except ValueError as e:
+                        fatal(f"Can't render --start/--end of {inputpath}: {e}")
 
                     gpmd_filters.poor_report(counter)
 
@@ -229,6 +239,8 @@ if __name__ == "__main__":
                             "/docs/bin#create-a-movie-from-gpx-and-video-not-created-with-gopro")
                         exit(1)
 
+                    timelapse_correction = gopro.timelapse_correction()
+
                     if args.gpx:
                         external_file: Path = args.gpx
                         fit_or_gpx_timeseries = load_external(external_file, units)
@@ -258,19 +270,8 @@ if __name__ == "__main__":
             log("Processing....")
 
             with timers.timer("processing"):
-                locked_2d = lambda e: e.gpsfix in GPS_FIXED_VALUES
-                locked_3d = lambda e: e.gpsfix == GPSFix.LOCK_3D.value
-
-                frame_meta.process(timeseries_process.process_ses("point", lambda i: i.point, alpha=0.45),
-                                   filter_fn=locked_2d)
-                frame_meta.process_deltas(timeseries_process.calculate_speeds(), skip=packets_per_second * 3,
-                                          filter_fn=locked_2d)
-                frame_meta.process(timeseries_process.calculate_odo(), filter_fn=locked_2d)
-                frame_meta.process_accel(timeseries_process.calculate_accel(), skip=18 * 3)
-                frame_meta.process_deltas(timeseries_process.calculate_gradient(), skip=packets_per_second * 3,
-                                          filter_fn=locked_3d)  # hack
-                frame_meta.process(timeseries_process.process_kalman("speed", lambda e: e.speed))
-                frame_meta.process(timeseries_process.filter_locked())
+                # smoothing, speeds, odo, accel, gradient & gps lock filtering, gathered & written back once
+                gopro_processing(packets_per_second).run(frame_meta)
 
             # privacy zone applies everywhere, not just at start, so might not always be suitable...
             if args.privacy:
@@ -330,15 +331,23 @@ if __name__ == "__main__":
                         options=ffmpeg_options,
                         overlay_size=dimensions,
                         execution=execution,
-                        creation_time=frame_meta.date_at(frame_meta.min)
+                        creation_time=frame_meta.date_at(frame_meta.min),
+                        start=clip_start,
+                        end=clip_end,
                     )
 
                 draw_timer = PoorTimer("drawing frames")
 
                 # Draw an overlay frame every 0.1 seconds of video
-                timelapse_correction = frame_meta.duration() / video_duration
+                if timelapse_correction is None:
+                    timelapse_correction = frame_meta.duration() / video_duration
                 log(f"Timelapse Factor = {timelapse_correction:.3f}")
-                stepper = frame_meta.stepper(timeunits(seconds=0.1 * timelapse_correction))
+                # --start/--end are video times - the metadata is in the time of the recording
+                stepper = frame_meta.stepper(
+                    timeunits(seconds=0.1 * timelapse_correction),
+                    start=clip_start * timelapse_correction if clip_start is not None else None,
+                    end=clip_end * timelapse_correction if clip_end is not None else None,
+                )
                 progress = ProgressBarProgress("Render")
 
                 unit_converters = Converters(
@@ -348,6 +357,9 @@ if __name__ == "__main__":
                     temperature_unit=args.units_temperature,
                 )
 
+                # metric values for every frame are worked out up front, in display units
+                render_table = RenderTable(frame_meta, stepper.steps_us())
+
                 layout_creator = create_desired_layout(
                     layout=args.layout,
                     layout_xml=args.layout_xml,
@@ -359,10 +371,11 @@ if __name__ == "__main__":
                     font=font,
                     privacy_zone=privacy_zone,
                     profiler=profiler,
-                    converters=unit_converters
+                    converters=unit_converters,
+                    table=render_table,
                 )
 
-                overlay = Overlay(framemeta=frame_meta, create_widgets=layout_creator)
+                overlay = Overlay(framemeta=frame_meta, create_widgets=layout_creator, table=render_table)
 
                 try:
                     progress.start(len(stepper))
@@ -384,7 +397,7 @@ if __name__ == "__main__":
                     progress.complete()
 
                 finally:
-                    for t in [draw_timer]:
+                    for t in [render_table.timer, draw_timer]:
                         log(t)
 
                     if profiler:
@@ -112,6 +112,17 @@ def gopro_dashboard_arguments(args=None):
 
     loading = parser.add_argument_group("Loading", "Loading data from GoPro")
     loading.add_argument("--load", nargs="+", type=LoadFlag, action=EnumNameAction, default=set())
+    loading.add_argument("--accl-decimation", type=int, default=10,
+                         help="Keep 1 in this many accelerometer samples")
+    loading.add_argument("--accl-filter", choices=["fir", "iir"],
+                         help="Low pass filter the accelerometer before decimating, so vibration doesn't alias. "
+                              "iir needs scipy. Default is no filter")
+
+    clip = parser.add_argument_group("Clip", "Rendering part of a GoPro video")
+    clip.add_argument("--start", type=float,
+                      help="Start of the part of the video to render, in seconds. Only the metadata for that part is decoded")
+    clip.add_argument("--end", type=float,
+                      help="End of the part of the video to render, in seconds")
 
     gpx = parser.add_argument_group("GPX", "Using GPX & Fit Files")
 
@@ -188,6 +199,18 @@ def gopro_dashboard_arguments(args=None):
     if args.use_gpx_only and not args.input and not args.overlay_size:
         quit("--overlay-size is required with --use-gpx-only (when no input video is given)")
 
+    if (args.start is not None or args.end is not None) and args.use_gpx_only:
+        quit("--start/--end cannot be combined with --use-gpx-only")
+
+    if args.start is not None and args.start < 0:
+        quit("--start must not be negative")
+
+    if args.start is not None and args.end is not None and args.end <= args.start:
+        quit("--end must be after --start")
+
+    if args.accl_decimation < 1:
+        quit("--accl-decimation must be at least 1")
+
     if args.use_gpx_only and args.generate != "default":
         quit("--generate cannot be combined with --use-gpx-only")
 
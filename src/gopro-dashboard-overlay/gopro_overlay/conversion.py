@@ -0,0 +1,123 @@
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pint
+
+from .units import units
+
+
+def _units_of(q: pint.Quantity):
+    # q.units makes a new Unit each time, which costs more than converting does - the container is the same thing
+    return q._units
+
+
+class Conversion:
+    """
+    Converts quantities to a unit - or, with reciprocal, converts their reciprocal, as for paces, giving None for
+    (near) zero. The scale and offset to use for each unit converted from are found with pint the first time that unit
+    is seen. After that, converting is a multiply-add (or a divide) and making the result.
+    """
+    __slots__ = ("name", "reciprocal", "_unit", "_factors")
+
+    def __init__(self, name: str, reciprocal: bool = False):
+        self.name = name
+        self.reciprocal = reciprocal
+        self._unit: Optional[pint.Unit] = None
+        self._factors: Dict[Any, Tuple[float, float, bool]] = {}
+
+    def __repr__(self):
+        return f"Conversion({self.name}{', reciprocal' if self.reciprocal else ''})"
+
+    @property
+    def unit(self) -> pint.Unit:
+        # not looked up until needed - an unknown unit is an error when something is converted, not before
+        if self._unit is None:
+            self._unit = units.Unit(self.name)
+        return self._unit
+
+    def factors(self, source) -> Tuple[float, float, bool]:
+        """scale, offset and whether they can be skipped, for converting from the given unit (or units container)"""
+        factors = self._factors.get(source)
+        if factors is None:
+            if self.reciprocal:
+                factors = ((1 / units.Quantity(1.0, source)).to(self.unit).m, 0.0, False)
+            else:
+                # as pint, quantities that are already in the unit are kept as they are, ints too.
+                offset = units.Quantity(0.0, source).to(self.unit).m
+                scale = units.Quantity(1.0, source).to(self.unit).m - offset
+                factors = (scale, offset, units.Unit(source) == self.unit)
+            self._factors[source] = factors
+        return factors
+
+    def magnitude(self, m, source) -> Optional[float]:
+        scale, offset, same = self.factors(source)
+        if same:
+            return m
+        if self.reciprocal:
+            if m < 0.0000001:
+                return None
+            return scale / m
+        return m * scale + offset
+
+    def __call__(self, q: Optional[pint.Quantity]) -> Optional[pint.Quantity]:
+        if q is None:
+            return None
+        m = self.magnitude(q.m, _units_of(q))
+        if m is None:
+            return None
+        return units.Quantity(m, self.unit)
+
+    def magnitudes(self, ms: np.ndarray, source) -> Tuple[np.ndarray, np.ndarray]:
+        """As magnitude, for an array of magnitudes - gives the converted magnitudes, and which of them are valid"""
+        scale, offset, same = self.factors(source)
+        if same:
+            return ms, np.ones(len(ms), dtype=bool)
+        if self.reciprocal:
+            valid = ~(ms < 0.0000001)
+            with np.errstate(divide="ignore"):
+                return np.where(valid, scale / np.where(valid, ms, 1.0), 0.0), valid
+        return ms * scale + offset, np.ones(len(ms), dtype=bool)
+
+    def column(self, values: List[Optional[pint.Quantity]]) -> Optional[Tuple[np.ndarray, np.ndarray, pint.Unit]]:
+        """
+        Converted magnitudes, where they are present, and the unit, for a whole column of float quantities that are in
+        the same unit. None if the column isn't like that, and each value needs converting on its own.
+        """
+        present = np.array([v is not None for v in values], dtype=bool)
+        given = [v for v in values if v is not None]
+        if not given or not all(isinstance(v, pint.Quantity) for v in given):
+            return None
+        source = _units_of(given[0])
+        if any(_units_of(v) != source for v in given) or any(type(v.m) is not float for v in given):
+            return None
+
+        converted, valid = self.magnitudes(np.array([v.m for v in given], dtype=np.float64), source)
+        magnitudes = np.zeros(len(values))
+        magnitudes[present] = converted
+        present[present] = valid
+        return magnitudes, present, self.unit
+
+
+_conversions: Dict[Any, Conversion] = {}
+
+
+def conversion_to(unit) -> Conversion:
+    """A Conversion to unit that is shared, so the factors for each unit converted from are only found once"""
+    conversion = _conversions.get(unit)
+    if conversion is None:
+        conversion = _conversions[unit] = Conversion(str(unit))
+    return conversion
+
+
+def magnitudes_in(values: Sequence[Optional[Any]], unit) -> np.ndarray:
+    """Magnitudes of quantities in unit, NaN for None. Plain numbers are taken to be in unit already."""
+    conversion = conversion_to(unit)
+    magnitudes = np.full(len(values), np.nan)
+    for index, value in enumerate(values):
+        if value is None:
+            continue
+        if isinstance(value, pint.Quantity):
+            magnitudes[index] = conversion.magnitude(value.m, _units_of(value))
+        else:
+            magnitudes[index] = value
+    return magnitudes
@@ -1,20 +1,100 @@
 import datetime
+import functools
 from datetime import timedelta
 
 from gopro_overlay.log import log
+from gopro_overlay.units import units
+
+
+# Units of the fields that converters store as plain numbers - see Entry.with_units
+field_units = {
+    "timestamp": "number",
+    "packet": "number",
+    "packet_index": "number",
+    "packet_count": "dimensionless",
+    "dop": "number",
+    "gpslock": "dimensionless",
+    "speed": "meter_per_second",
+    "alt": "meter",
+    # from kinematics
+    "cspeed": "meter / second",
+    "cspeed.k": "meter / second",
+    "cspeed.raw": "meter / second",
+    "dist": "meter",
+    "time": "second",
+    "azi": "degree",
+    "cog": "degree",
+    "codo": "meter",
+    "accel": "meter / second ** 2",
+    "cgrad": "dimensionless",
+    "bad_grad": "dimensionless",
+    "grad_gain": "meter",
+    "grad_dist": "meter",
+}
+
+
+@functools.lru_cache(maxsize=None)
+def _unit_of(field):
+    return units.Unit(field_units[field])
 
 
 class Entry:
+    """
+    The values at one point in time. Values in _raw are plain numbers, in the unit given for the field
+    in field_units - they only become pint Quantities when they are used.
+    """
+    __slots__ = ("dt", "_items", "_raw")
 
     def __init__(self, dt: datetime.datetime, **kwargs):
         self.dt = dt
-        self.items = {k: v for k, v in dict(**kwargs).items() if v is not None}
+        self._items = {k: v for k, v in kwargs.items() if v is not None}
+        self._raw = None
+
+    @staticmethod
+    def with_units(dt: datetime.datetime, **kwargs) -> 'Entry':
+        """
+        As Entry(dt, **kwargs), but numbers given for the fields in field_units are taken to be in those units,
+        and are only made into Quantities if something reads them
+        """
+        entry = Entry(dt, **kwargs)
+        raw = [k for k, v in entry._items.items() if k in field_units and isinstance(v, (int, float)) and not isinstance(v, bool)]
+        if raw:
+            entry._raw = set(raw)
+        return entry
+
+    def _quantity(self, key):
+        value = units.Quantity(self._items[key], _unit_of(key))
+        self._items[key] = value
+        self._raw.discard(key)
+        return value
+
+    @property
+    def items(self):
+        if self._raw:
+            for key in list(self._raw):
+                self._quantity(key)
+        return self._items
 
     def update(self, **kwargs):
-        self.items.update(**kwargs)
+        self._items.update(**kwargs)
+        if self._raw:
+            self._raw.difference_update(kwargs.keys())
+
+    def update_with_units(self, **kwargs):
+        """As update, but numbers for fields in field_units are kept as numbers, as with_units"""
+        self.update(**kwargs)
+        raw = [k for k, v in kwargs.items() if k in field_units and isinstance(v, (int, float)) and not isinstance(v, bool)]
+        if raw:
+            if self._raw is None:
+                self._raw = set()
+            self._raw.update(raw)
 
     def __getattr__(self, item):
-        return self.items.get(item, None)
+        if item.startswith("__") or item in Entry.__slots__:
+            raise AttributeError(item)
+        if self._raw and item in self._raw:
+            return self._quantity(item)
+        return self._items.get(item, None)
 
     def __str__(self):
         return f"Entry: {self.dt} - {self.items}"
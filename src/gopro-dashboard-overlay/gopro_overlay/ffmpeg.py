@@ -68,19 +68,25 @@ class FFMPEG:
         yield from execution.execute([self._path(), *args])
 
     def stream(self, args, cb, timeout=None):
+        """
+        Run ffmpeg, passing its output to cb a chunk at a time. timeout limits the time spent waiting for ffmpeg,
+        not the total - time spent in cb doesn't count, so a slow consumer of a long track doesn't time out.
+        """
         timeout = datetime.timedelta(seconds=45) if timeout is None else timeout
         if self.print_cmds:
             log(f"Running {args}")
 
-        deadline = datetime.datetime.now() + timeout
+        remaining = timeout.total_seconds()
 
         process = subprocess.Popen([self._path(), *args], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
         try:
             while True:
-                if datetime.datetime.now() > deadline:
+                started = time.monotonic()
+                read = process.stdout.read(1024 * 1024)
+                remaining -= time.monotonic() - started
+                if remaining < 0:
                     process.kill()
                     raise TimeoutError(f"Exceeded timeout of {timeout}")
-                read = process.stdout.read(1024 * 1024)
                 if len(read) != 0:
                     cb(read)
                 else:
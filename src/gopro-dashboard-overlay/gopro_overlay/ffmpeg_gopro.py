@@ -9,12 +9,12 @@ import subprocess
 from array import array
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Callable
 
 from gopro_overlay.common import temporary_file
 from gopro_overlay.dimensions import Dimension
 from gopro_overlay.ffmpeg import FFMPEG
-from gopro_overlay.progresstrack import ProgressBarProgress
+from gopro_overlay.progresstrack import ProgressBarProgress, ProgressTracker
 from gopro_overlay.timeunits import timeunits, Timeunit
 
 
@@ -202,7 +202,8 @@ class GoproRecording:
     video: VideoStream
     data: Optional[DataStream]
 
-    def load_data(self) -> bytes:
+    def stream_data(self, cb: Callable[[bytes], None], show_progress: bool = True):
+        """Pass the data track to cb, a chunk at a time, as ffmpeg reads it"""
         track = self.data.stream
         if track:
             cmd = [
@@ -215,22 +216,26 @@ class GoproRecording:
                 "-"
             ]
 
-            progress = ProgressBarProgress("Loading GoPro Data Track", transfer=True, delta=True)
+            progress = ProgressBarProgress("Loading GoPro Data Track", transfer=True, delta=True) \
+                if show_progress else ProgressTracker()
             progress.start()
             try:
-                arr = bytearray()
-
                 def update(b: bytes):
                     progress.update(len(b))
-                    arr.extend(b)
+                    cb(b)
 
                 result = self.ffmpeg.stream(cmd, cb=update, timeout=datetime.timedelta(seconds=45))
                 if result != 0:
                     raise IOError(f"ffmpeg failed code: {result}")
-                return bytes(arr)
             finally:
                 progress.complete()
 
+    def load_data(self) -> bytes:
+        if self.data.stream:
+            arr = bytearray()
+            self.stream_data(arr.extend)
+            return bytes(arr)
+
 
 @dataclass(frozen=True)
 class DataStream:
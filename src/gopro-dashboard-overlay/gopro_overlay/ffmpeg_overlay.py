@@ -3,11 +3,13 @@ from __future__ import annotations
 import contextlib
 import datetime
 from pathlib import Path
+from typing import Optional
 
 from gopro_overlay.dimensions import Dimension
 from gopro_overlay.execution import InProcessExecution
 from gopro_overlay.ffmpeg import FFMPEG
 from gopro_overlay.functional import flatten
+from gopro_overlay.timeunits import Timeunit
 
 
 class FFMPEGOptions:
@@ -83,22 +85,35 @@ class FFMPEGOverlayVideo:
             overlay_size: Dimension,
             options: FFMPEGOptions = None,
             execution=None,
-            creation_time: datetime.datetime = None
+            creation_time: datetime.datetime = None,
+            start: Optional[Timeunit] = None,
+            end: Optional[Timeunit] = None,
     ):
         self.exe = ffmpeg
         self.output = output
         self.input = input
+        self.start = start
+        self.end = end
         self.options = options if options else FFMPEGOptions()
         self.overlay_size = overlay_size
         self.creation_time = creation_time if creation_time else datetime.datetime.now()
         self.execution = execution if execution else InProcessExecution()
 
+    def _clip(self):
+        clip = []
+        if self.start is not None:
+            clip.extend(["-ss", f"{self.start.millis() / 1000:.3f}"])
+        if self.end is not None:
+            clip.extend(["-to", f"{self.end.millis() / 1000:.3f}"])
+        return clip
+
     @contextlib.contextmanager
     def generate(self):
         cmd = flatten([
             "-y",
             self.options.general,
             self.options.input,
+            self._clip(),
             "-i", str(self.input),
             "-f", "rawvideo",
             "-framerate", "10.0",
@@ -1,7 +1,9 @@
 import bisect
 import datetime
 from datetime import timedelta
-from typing import Callable, List, MutableMapping
+from typing import Callable, List, MutableMapping, Optional
+
+import numpy as np
 
 from gopro_overlay.entry import Entry
 from gopro_overlay.log import log
@@ -50,25 +52,26 @@ class Window:
 
         at = at.align(timeunits(millis=100))
 
-        start = at - self.duration / 2
-        end = at + self.duration / 2
-
-        current = start
+        # plain ints from here - the cache is keyed on us
+        half = int(self.duration.us / 2)
+        end = at.us + half
+        tick = self.tick.us
+        first, last = self.ts.min.us, self.ts.max.us
 
         data = []
 
-        while current < end:
-            if current < self.ts.min or current > self.ts.max:
+        for current in range(at.us - half, end, tick):
+            if current < first or current > last:
                 data.append(self.missing)
             else:
-                entry = self.cache[current] if current in self.cache else self.cache.setdefault(current,
-                                                                                                self.ts.get(current))
+                entry = self.cache.get(current)
+                if entry is None:
+                    entry = self.cache[current] = self.ts.get(Timeunit(current))
                 value = self.key(entry)
                 if value is not None:
                     data.append(value)
                 else:
                     data.append(self.missing)
-            current += self.tick
 
         self.version += 1
         self.last_time = at
@@ -79,32 +82,78 @@ class Window:
 
 class Stepper:
 
-    def __init__(self, framemeta: 'FrameMeta', step: Timeunit):
+    def __init__(self, framemeta: 'FrameMeta', step: Timeunit, start: Optional[Timeunit] = None,
+                 end: Optional[Timeunit] = None):
         self._framemeta = framemeta
         self._step = step
+        self._start = start if start is not None else timeunits(millis=0)
+        self._end = end
+
+    def _last(self) -> Timeunit:
+        last = self._framemeta.framelist[-1]
+        return min(last, self._end) if self._end is not None else last
 
     def __len__(self):
-        max_ms = self._framemeta.framelist[-1]
-        steps = int(max_ms / self._step) + 1
-        return steps
+        steps = int((self._last() - self._start) / self._step) + 1
+        return max(steps, 0)
 
     def steps(self):
-        end = self._framemeta.framelist[-1]
-        running = timeunits(millis=0)
-        while running <= end:
-            yield running
-            running += self._step
+        for us in range(self._start.us, self._last().us + 1, self._step.us):
+            yield Timeunit(us)
+
+    def steps_us(self) -> np.ndarray:
+        """The same times as steps, as an int64 array of microseconds"""
+        return np.arange(self._start.us, self._last().us + 1, self._step.us, dtype=np.int64)
 
 
 max_distance = timeunits(seconds=6)
 
 
+class Cursor:
+    """
+    Lookups as framemeta.get, for times that mostly go forwards, as when rendering frame by frame.
+    The index of the last item found is kept, and moved on from there, so each lookup is O(1) rather than a bisect.
+    Going backwards, or a long way forwards, bisects as get does.
+    """
+
+    def __init__(self, framemeta, scan: int = 16):
+        self._framemeta = framemeta
+        self._scan = scan
+        self._times = None
+        self._index = -1
+
+    def get(self, frame_time: Timeunit):
+        us = frame_time.us
+        times = self._framemeta._cursor_times()
+        if times is not self._times:
+            self._times = times
+            self._index = -1
+
+        index = self._index
+        if index >= 0 and us < times[index]:
+            index = bisect.bisect_right(times, us) - 1
+        else:
+            limit = index + self._scan
+            last = len(times) - 1
+            while index < last and times[index + 1] <= us:
+                index += 1
+                if index == limit:
+                    index = bisect.bisect_right(times, us) - 1
+                    break
+
+        self._index = index
+        return self._framemeta._entry_at(us, index)
+
+
 class FrameMeta:
     def __init__(self, packets_per_second=18):
         self.modified = False
         self.pps = packets_per_second
         self.framelist: List[Timeunit] = []
         self.frames: MutableMapping[Timeunit, Entry] = {}
+        # framelist as us, and the entries in the same order, so lookups don't need to hash or compare Timeunits
+        self._framelist_us: List[int] = []
+        self._entries: List[Entry] = []
 
     def __len__(self):
         self.check_modified()
@@ -116,9 +165,9 @@ class FrameMeta:
     def packets_per_second(self):
         return self.pps
 
-    def stepper(self, step: Timeunit):
+    def stepper(self, step: Timeunit, start: Optional[Timeunit] = None, end: Optional[Timeunit] = None):
         self.check_modified()
-        return Stepper(self, step)
+        return Stepper(self, step, start, end)
 
     def add(self, at_time: Timeunit, entry):
         self.frames[at_time] = entry
@@ -148,42 +197,51 @@ class FrameMeta:
 
     def _update(self):
         self.framelist = sorted(list(self.frames.keys()))
+        self._framelist_us = [t.us for t in self.framelist]
+        self._entries = [self.frames[t] for t in self.framelist]
         self.modified = False
 
+    def framelist_us(self) -> np.ndarray:
+        """The frame times, as an int64 array of microseconds"""
+        self.check_modified()
+        return np.array(self._framelist_us, dtype=np.int64)
+
     def check_modified(self):
         if self.modified:
             self._update()
 
     def get(self, frame_time: Timeunit) -> Entry:
         self.check_modified()
+        return self._get_closest(frame_time.us)
 
-        if frame_time in self.frames:
-            return self.frames[frame_time]
-
-        return self._get_closest(frame_time)
+    def cursor(self) -> Cursor:
+        return Cursor(self)
 
-    def _get_closest(self, frame_time) -> Entry:
+    def _cursor_times(self) -> List[int]:
+        self.check_modified()
+        return self._framelist_us
 
-        if frame_time < self.min:
-            log(f"Request for data at time {frame_time}, before start of metadata, returning first item")
-            return self.frames[self.framelist[0]]
+    def _get_closest(self, us: int) -> Entry:
+        # the item at, or the closest item before, the wanted time
+        return self._entry_at(us, bisect.bisect_right(self._framelist_us, us) - 1)
 
-        if frame_time > self.max:
-            log(f"Request for data at time {frame_time}, after end of metadata, returning last item")
-            return self.frames[self.framelist[-1]]
+    def _entry_at(self, us: int, earlier_idx: int) -> Entry:
+        framelist_us = self._framelist_us
 
-        later_idx = bisect.bisect_left(self.framelist, frame_time)
-        earlier_idx = later_idx - 1
+        if earlier_idx < 0:
+            log(f"Request for data at time {Timeunit(us)}, before start of metadata, returning first item")
+            return self._entries[0]
 
-        earlier_time = self.framelist[earlier_idx]
-        earlier_item = self.frames[earlier_time]
+        if earlier_idx == len(framelist_us) - 1 and us > framelist_us[-1]:
+            log(f"Request for data at time {Timeunit(us)}, after end of metadata, returning last item")
+            return self._entries[-1]
 
-        delta = frame_time - earlier_time
+        delta = us - framelist_us[earlier_idx]
 
-        if delta > max_distance:
-            log(f"Closest item to wanted time {frame_time} is {delta} away")
+        if delta > max_distance.us:
+            log(f"Closest item to wanted time {Timeunit(us)} is {Timeunit(delta)} away")
 
-        return earlier_item
+        return self._entries[earlier_idx]
 
     def items(self, step: timedelta = timedelta(seconds=0)):
         self.check_modified()
@@ -0,0 +1,482 @@
+import copy
+import datetime
+from datetime import timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+from pint import Quantity
+
+from gopro_overlay.conversion import conversion_to
+from gopro_overlay.entry import Entry
+from gopro_overlay.framemeta import Cursor, FrameMeta, Stepper, max_distance
+from gopro_overlay.log import log
+from gopro_overlay.point import Orientation, Point, Point3, PintPoint3, Quaternion
+from gopro_overlay.timeunits import Timeunit, timeunits
+from gopro_overlay.units import units
+
+one_us = timedelta(microseconds=1)
+
+
+class Codec:
+    """
+    Turns values into a row of numbers, and back again. Ints come back as ints, unless a float has been
+    stored in the column, so values look exactly as they did before they were stored.
+    """
+    width = 1
+    unit = None
+
+    def __init__(self):
+        self.integer = True
+
+    def _n(self, value):
+        if self.integer and not isinstance(value, int):
+            self.integer = False
+        return value
+
+    def _v(self, value):
+        return int(value) if self.integer else float(value)
+
+    def _q(self, quantity: Quantity):
+        return self._n(quantity.to(self.unit).magnitude if quantity.units != self.unit else quantity.magnitude)
+
+
+class NumberCodec(Codec):
+    """Plain ints or floats"""
+
+    def encode(self, value):
+        return [self._n(value)]
+
+    def decode(self, row):
+        return self._v(row[0])
+
+
+class QuantityCodec(Codec):
+
+    def __init__(self, unit):
+        super().__init__()
+        self.unit = unit
+
+    def encode(self, value: Quantity):
+        return [self._q(value)]
+
+    def decode(self, row):
+        return units.Quantity(self._v(row[0]), self.unit)
+
+
+class PointCodec(Codec):
+    width = 2
+    unit = "location"
+
+    def encode(self, value: Point):
+        return [self._n(value.lat), self._n(value.lon)]
+
+    def decode(self, row):
+        return Point(self._v(row[0]), self._v(row[1]))
+
+
+class PintPoint3Codec(Codec):
+    width = 3
+
+    def __init__(self, unit):
+        super().__init__()
+        self.unit = unit
+
+    def encode(self, value: PintPoint3):
+        return [self._q(value.x), self._q(value.y), self._q(value.z)]
+
+    def decode(self, row):
+        return PintPoint3(
+            x=units.Quantity(self._v(row[0]), self.unit),
+            y=units.Quantity(self._v(row[1]), self.unit),
+            z=units.Quantity(self._v(row[2]), self.unit),
+        )
+
+
+class QuaternionCodec(Codec):
+    width = 4
+
+    def encode(self, value: Quaternion):
+        return [self._n(value.w), self._n(value.v.x), self._n(value.v.y), self._n(value.v.z)]
+
+    def decode(self, row):
+        return Quaternion(w=self._v(row[0]), v=Point3(self._v(row[1]), self._v(row[2]), self._v(row[3])))
+
+
+class OrientationCodec(Codec):
+    width = 3
+
+    def __init__(self, unit):
+        super().__init__()
+        self.unit = unit
+
+    def encode(self, value: Orientation):
+        return [self._q(value.roll), self._q(value.pitch), self._q(value.yaw)]
+
+    def decode(self, row):
+        return Orientation(
+            roll=units.Quantity(self._v(row[0]), self.unit),
+            pitch=units.Quantity(self._v(row[1]), self.unit),
+            yaw=units.Quantity(self._v(row[2]), self.unit),
+        )
+
+
+class ObjectCodec:
+    """Anything else is kept as it is, in an object array"""
+    width = None
+    unit = None
+
+
+def codec_for(value):
+    if isinstance(value, bool):
+        return ObjectCodec()
+    if isinstance(value, (int, float)):
+        return NumberCodec()
+    if isinstance(value, Quantity) and isinstance(value.magnitude, (int, float)):
+        return QuantityCodec(value.units)
+    if isinstance(value, Point):
+        return PointCodec()
+    if isinstance(value, PintPoint3):
+        return PintPoint3Codec(value.x.units)
+    if isinstance(value, Quaternion) and not isinstance(value.v.x, Quantity):
+        return QuaternionCodec()
+    if isinstance(value, Orientation):
+        return OrientationCodec(value.roll.units)
+    return ObjectCodec()
+
+
+class Column:
+    """
+    The values of one metric for every row. Numeric values are stored as float64, (n,) or (n, width), NaN
+    where there is no value. The unit is stored once, for the column - values are converted to it.
+    """
+
+    def __init__(self, codec, size: int):
+        self.codec = codec
+        if codec.width is None:
+            self.values = np.full(size, None, dtype=object)
+        elif codec.width == 1:
+            self.values = np.full(size, np.nan)
+        else:
+            self.values = np.full((size, codec.width), np.nan)
+
+    @property
+    def unit(self):
+        return self.codec.unit
+
+    @property
+    def numeric(self) -> bool:
+        return self.codec.width is not None
+
+    def magnitudes(self, unit) -> np.ndarray:
+        """The values of a quantity column, in unit - NaN where there is no value"""
+        if self.codec.width != 1 or self.unit is None:
+            raise ValueError(f"Can't give values in {unit} - column doesn't hold single quantities")
+        return conversion_to(unit).magnitudes(self.values, self.unit)[0]
+
+    def present(self) -> np.ndarray:
+        if not self.numeric:
+            return np.array([v is not None for v in self.values], dtype=bool)
+        if self.values.ndim == 1:
+            return ~np.isnan(self.values)
+        return ~np.isnan(self.values[:, 0])
+
+    def set(self, index: int, value):
+        if value is None:
+            self.values[index] = None if not self.numeric else np.nan
+        elif not self.numeric:
+            self.values[index] = value
+        else:
+            encoded = self.codec.encode(value)
+            self.values[index] = encoded[0] if self.codec.width == 1 else encoded
+
+    def get(self, index: int):
+        value = self.values[index]
+        if not self.numeric:
+            return value
+        if self.codec.width == 1:
+            return None if np.isnan(value) else self.codec.decode((value,))
+        return None if np.isnan(value[0]) else self.codec.decode(value)
+
+    def copy(self) -> 'Column':
+        column = Column(self.codec, 0)
+        column.values = self.values.copy()
+        return column
+
+    def take(self, indices: np.ndarray, weight: Optional[np.ndarray] = None) -> 'Column':
+        """
+        The values at the given rows. With weight, float values are interpolated towards the following row.
+        Integer and object values (e.g. gpsfix) are never interpolated - they are taken from the given row.
+        """
+        column = Column(copy.copy(self.codec), 0)
+        values = self.values[indices]
+        if weight is not None and self.numeric and not self.codec.integer and len(self.values):
+            following = self.values[np.minimum(indices + 1, len(self.values) - 1)]
+            w = weight if values.ndim == 1 else weight[:, None]
+            values = np.where(w > 0, values + (following - values) * w, values)
+        column.values = values
+        return column
+
+
+def asof_indices(left_us: np.ndarray, right_us: np.ndarray, mode: str = "previous"):
+    """
+    As-of join of two sorted time arrays. For each left time, the index of the right row to use, and for "linear"
+    mode the weight (0-1) to give the row after it.
+
+    "previous" is what FrameMeta.get does - the row at or before the time, or the first/last row if the time is
+    outside the right times. "nearest" is the closer of the rows either side, and "linear" is between them.
+    """
+    left_us = np.asarray(left_us, dtype=np.int64)
+    right_us = np.asarray(right_us, dtype=np.int64)
+
+    count = len(right_us)
+    if count == 0:
+        raise ValueError("Can't join to nothing")
+
+    previous = np.clip(np.searchsorted(right_us, left_us, side="right") - 1, 0, count - 1)
+    if mode == "previous":
+        return previous, None
+
+    following = np.minimum(previous + 1, count - 1)
+    before = left_us - right_us[previous]
+    after = right_us[following] - left_us
+
+    if mode == "nearest":
+        return np.where((after < before) & (before > 0), following, previous), None
+
+    if mode == "linear":
+        span = right_us[following] - right_us[previous]
+        weight = np.divide(before, span, out=np.zeros(len(left_us)), where=span > 0)
+        return previous, np.clip(weight, 0.0, 1.0)
+
+    raise ValueError(f"Unknown as-of mode {mode} - use previous, nearest or linear")
+
+
+class RowView:
+    """
+    An Entry-like view of one row of a ColumnarFrameMeta - attributes are looked up in the columns as they
+    are used, and update() writes back to them. Use entry() for a standalone copy.
+    """
+    __slots__ = ("_frame", "_index")
+
+    def __init__(self, frame: 'ColumnarFrameMeta', index: int):
+        self._frame = frame
+        self._index = index
+
+    @property
+    def dt(self) -> datetime.datetime:
+        return self._frame.date_of(self._index)
+
+    @property
+    def items(self) -> Dict[str, Any]:
+        return self._frame.row(self._index)
+
+    def __getattr__(self, item):
+        column = self._frame.columns.get(item)
+        return column.get(self._index) if column is not None else None
+
+    def update(self, **kwargs):
+        for name, value in kwargs.items():
+            self._frame.set(self._index, name, value)
+
+    def entry(self) -> Entry:
+        return Entry(self.dt, **self.items)
+
+    def interpolate(self, other, dt: datetime.datetime):
+        other = other.entry() if isinstance(other, RowView) else other
+        return self.entry().interpolate(other, dt)
+
+    def __str__(self):
+        return f"Entry: {self.dt} - {self.items}"
+
+
+class ColumnarFrameMeta:
+    """
+    An adapter over a FrameMeta, holding it as columns: an int64 array of frame times in microseconds,
+    the UTC date of each row, and one numpy Column per metric. It has the same get/items/stepper API as
+    FrameMeta, handing out RowViews in place of Entries, so existing widgets can use it unchanged.
+    The parsers still build Entries; from_framemeta copies them into columns.
+    """
+
+    def __init__(self, time_us: np.ndarray, dt_us: np.ndarray, columns: Dict[str, Column],
+                 tz: Optional[datetime.tzinfo] = datetime.timezone.utc, packets_per_second=18):
+        self.time_us = np.asarray(time_us, dtype=np.int64)
+        self.dt_us = np.asarray(dt_us, dtype=np.int64)
+        self.columns = columns
+        self.pps = packets_per_second
+        self._epoch = datetime.datetime(1970, 1, 1, tzinfo=tz)
+        self._framelist: Optional[List[Timeunit]] = None
+        self._time_list: Optional[List[int]] = None
+
+        if len(self.time_us) > 1 and np.any(self.time_us[1:] < self.time_us[:-1]):
+            raise ValueError("Frame times must be in order")
+
+    @staticmethod
+    def from_framemeta(framemeta: FrameMeta, names: Optional[List[str]] = None) -> 'ColumnarFrameMeta':
+        """Copy an Entry based framemeta into columns - every field, or, given names, just those"""
+        framemeta.check_modified()
+        entries = [framemeta.frames[t] for t in framemeta.framelist]
+        size = len(entries)
+
+        tz = entries[0].dt.tzinfo if entries else datetime.timezone.utc
+        epoch = datetime.datetime(1970, 1, 1, tzinfo=tz)
+
+        if names is None:
+            values_of = lambda e: e.items.items()
+        else:
+            values_of = lambda e: ((name, getattr(e, name)) for name in names)
+
+        columns: Dict[str, Column] = {}
+        for index, entry in enumerate(entries):
+            for name, value in values_of(entry):
+                if value is None:
+                    continue
+                column = columns.get(name)
+                if column is None:
+                    column = columns[name] = Column(codec_for(value), size)
+                column.set(index, value)
+
+        return ColumnarFrameMeta(
+            time_us=np.array([t.us for t in framemeta.framelist], dtype=np.int64),
+            dt_us=np.array([(e.dt - epoch) // one_us for e in entries], dtype=np.int64),
+            columns=columns,
+            tz=tz,
+            packets_per_second=framemeta.pps,
+        )
+
+    def to_framemeta(self) -> FrameMeta:
+        framemeta = FrameMeta(packets_per_second=self.pps)
+        for index, t in enumerate(self.time_us.tolist()):
+            framemeta.add(Timeunit(t), Entry(self.date_of(index), **self.row(index)))
+        return framemeta
+
+    def __len__(self):
+        return len(self.time_us)
+
+    def __getitem__(self, item) -> RowView:
+        return RowView(self, range(len(self))[item])
+
+    def packets_per_second(self):
+        return self.pps
+
+    @property
+    def framelist(self) -> List[Timeunit]:
+        if self._framelist is None:
+            self._framelist = [Timeunit(t) for t in self.time_us.tolist()]
+        return self._framelist
+
+    def column(self, name: str) -> np.ndarray:
+        return self.columns[name].values
+
+    def unit(self, name: str):
+        return self.columns[name].unit
+
+    def date_of(self, index: int) -> datetime.datetime:
+        return self._epoch + timedelta(microseconds=int(self.dt_us[index]))
+
+    def row(self, index: int) -> Dict[str, Any]:
+        values = {}
+        for name, column in self.columns.items():
+            value = column.get(index)
+            if value is not None:
+                values[name] = value
+        return values
+
+    def set(self, index: int, name: str, value):
+        column = self.columns.get(name)
+        if column is None:
+            if value is None:
+                return
+            column = self.columns[name] = Column(codec_for(value), len(self))
+        column.set(index, value)
+
+    def stepper(self, step: Timeunit, start: Optional[Timeunit] = None, end: Optional[Timeunit] = None):
+        return Stepper(self, step, start, end)
+
+    def date_at(self, t: Timeunit) -> datetime.datetime:
+        return self.get(t).dt
+
+    @property
+    def min(self) -> Timeunit:
+        return Timeunit(self.time_us[0])
+
+    @property
+    def max(self) -> Timeunit:
+        return Timeunit(self.time_us[-1])
+
+    @property
+    def mid(self):
+        return self.min + ((self.max - self.min) / 2)
+
+    def duration(self):
+        return self.max
+
+    def index_at(self, frame_time: Timeunit) -> int:
+        """Index of the row at, or closest before, the time - the row FrameMeta.get would give"""
+        us = frame_time.us
+        return self._checked_index(us, int(np.searchsorted(self.time_us, us, side="right")) - 1)
+
+    def _checked_index(self, us: int, index: int) -> int:
+        time_us = self.time_us
+
+        if index < 0:
+            log(f"Request for data at time {Timeunit(us)}, before start of metadata, returning first item")
+            return 0
+
+        if us > time_us[-1]:
+            log(f"Request for data at time {Timeunit(us)}, after end of metadata, returning last item")
+            return len(time_us) - 1
+
+        if time_us[index] != us and us - time_us[index] > max_distance.us:
+            log(f"Closest item to wanted time {Timeunit(us)} is {timeunits(micros=us - time_us[index])} away")
+        return index
+
+    def get(self, frame_time: Timeunit) -> RowView:
+        return RowView(self, self.index_at(frame_time))
+
+    def cursor(self) -> Cursor:
+        return Cursor(self)
+
+    def _cursor_times(self) -> List[int]:
+        if self._time_list is None:
+            self._time_list = self.time_us.tolist()
+        return self._time_list
+
+    def _entry_at(self, us: int, index: int) -> RowView:
+        return RowView(self, self._checked_index(us, index))
+
+    def items(self, step: timedelta = timedelta(seconds=0)):
+        step_us = step // one_us
+        last = None
+        for index, dt in enumerate(self.dt_us.tolist()):
+            if last is None or dt >= last + step_us:
+                last = dt
+                yield RowView(self, index)
+
+    def process(self, processor, filter_fn: Callable[[RowView], bool] = lambda e: True):
+        for index in range(len(self)):
+            entry = RowView(self, index)
+            if filter_fn(entry):
+                updates = processor(entry)
+                if updates:
+                    entry.update(**updates)
+
+    def asof(self, time_us: np.ndarray, mode: str = "previous", names: Optional[List[str]] = None) -> 'ColumnarFrameMeta':
+        """The rows (or the named columns of them) at each of the given times - see asof_indices"""
+        indices, weight = asof_indices(time_us, self.time_us, mode)
+
+        dt_us = self.dt_us[indices]
+        if weight is not None:
+            following = self.dt_us[np.minimum(indices + 1, len(self) - 1)]
+            dt_us = dt_us + np.round((following - dt_us) * weight).astype(np.int64)
+
+        names = names if names is not None else list(self.columns.keys())
+        return ColumnarFrameMeta(
+            time_us, dt_us, {name: self.columns[name].take(indices, weight) for name in names},
+            tz=self._epoch.tzinfo, packets_per_second=self.pps
+        )
+
+    def clone(self) -> 'ColumnarFrameMeta':
+        return ColumnarFrameMeta(
+            self.time_us.copy(), self.dt_us.copy(), {k: c.copy() for k, c in self.columns.items()},
+            tz=self._epoch.tzinfo, packets_per_second=self.pps
+        )
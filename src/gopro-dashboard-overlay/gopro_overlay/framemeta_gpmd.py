@@ -1,135 +1,219 @@
+import dataclasses
 from enum import Enum
-from typing import Optional, Callable, Set
+from typing import Optional, Callable, Set, Union, List, Tuple, Container, Sequence
+
+import numpy as np
 
 from gopro_overlay import timeseries_process
-from gopro_overlay.ffmpeg_gopro import DataStream
+from gopro_overlay.ffmpeg_gopro import DataStream, GoproRecording
 from gopro_overlay.framemeta import FrameMeta
+from gopro_overlay.framemeta_columnar import ColumnarFrameMeta, asof_indices
 from gopro_overlay.gpmf.calc import timestamp_calculator_for_packet_type
 from gopro_overlay.gpmd_filters import GPSLockFilter, NullGPSLockFilter
-from gopro_overlay.gpmf.visitors.find import StreamFindingVisitor
-from gopro_overlay.gpmf.visitors.cori import CORIComponentConverter, CORIVisitor
+from gopro_overlay.gpmf.demux import Demux, demultiplex, StreamingDemultiplexer, StreamPacket
+from gopro_overlay.gpmf.visitors.cori import CORIComponentConverter, cori_components
 from gopro_overlay.gpmf.visitors.gps import (
     GPS5EntryConverter,
-    GPS5Visitor,
     GPS9EntryConverter,
-    GPS9Visitor,
+    gps5_components,
+    gps9_components,
 )
-from gopro_overlay.gpmf.visitors.grav import GRAVComponentConverter, GRAVisitor
-from gopro_overlay.gpmf.visitors.xyz import XYZComponentConverter, XYZVisitor
+from gopro_overlay.gpmf.visitors.grav import GRAVComponentConverter, grav_components
+from gopro_overlay.gpmf.visitors.xyz import XYZComponentConverter, xyz_components, xyz_counter
 from gopro_overlay.gpmf.gpmf import GPMD
+from gopro_overlay.gpmf.timeindex import DEVCTimeIndex
+from gopro_overlay.imu import imu_columns, accl_entries
 from gopro_overlay.log import log
-from gopro_overlay.timeunits import timeunits
+from gopro_overlay.timeunits import timeunits, Timeunit, multipliers
 from gopro_overlay.timing import PoorTimer
 
 
+def _selected(packet: StreamPacket, devcs: Optional[Container[int]]) -> bool:
+    return devcs is None or packet.devc in devcs
+
+
 def gps_framemeta(
-    gpmd: GPMD,
+    gpmd: Union[GPMD, Demux],
     units,
     datastream: Optional[DataStream] = None,
     gps_lock_filter: GPSLockFilter = NullGPSLockFilter(),
+    devcs: Optional[Container[int]] = None,
 ) -> FrameMeta:
     frame_meta = FrameMeta()
+    demux = demultiplex(gpmd)
 
-    if gpmd.accept(StreamFindingVisitor("GPS9")).found():
+    if demux.has("GPS9"):
         log(">> Found GPS9 ")
-        gpmd.accept(
-            GPS9Visitor(
-                converter=GPS9EntryConverter(
-                    units,
-                    calculator=timestamp_calculator_for_packet_type(
-                        gpmd, datastream, "GPS9"
-                    ),
-                    on_item=lambda c, e: frame_meta.add(c, e),
-                    gps_lock_filter=gps_lock_filter,
-                ).convert
-            )
+        converter = GPS9EntryConverter(
+            units,
+            calculator=timestamp_calculator_for_packet_type(demux, datastream, "GPS9"),
+            on_item=lambda c, e: frame_meta.add(c, e),
+            gps_lock_filter=gps_lock_filter,
         )
-    elif gpmd.accept(StreamFindingVisitor("GPS5")).found():
+        for packet in demux.stream("GPS9"):
+            if _selected(packet, devcs):
+                converter.convert(packet.devc, gps9_components(packet))
+            else:
+                converter.skip(packet.timestamp, packet.samples)
+    elif demux.has("GPS5"):
         log(">> Found GPS5 ")
-        gpmd.accept(
-            GPS5Visitor(
-                converter=GPS5EntryConverter(
-                    units,
-                    calculator=timestamp_calculator_for_packet_type(
-                        gpmd, datastream, "GPS5"
-                    ),
-                    on_item=lambda c, e: frame_meta.add(c, e),
-                    gps_lock_filter=gps_lock_filter,
-                ).convert
-            )
+        converter = GPS5EntryConverter(
+            units,
+            calculator=timestamp_calculator_for_packet_type(demux, datastream, "GPS5"),
+            on_item=lambda c, e: frame_meta.add(c, e),
+            gps_lock_filter=gps_lock_filter,
         )
+        for packet in demux.stream("GPS5"):
+            if not _selected(packet, devcs):
+                if packet.get("GPSU") is not None:
+                    converter.skip(packet.timestamp, packet.samples)
+                continue
+            components = gps5_components(packet)
+            if components is not None:
+                converter.convert(packet.devc, components)
     else:
         log(">> Can't find any GPS information")
 
     return frame_meta
 
 
-def accl_framemeta(gpmd: GPMD, units, datastream: Optional[DataStream] = None):
+@dataclasses.dataclass(frozen=True)
+class AcclOptions:
+    """
+    How ACCL is reduced from its full rate: 1 in every decimation samples is kept. By default nothing is
+    filtered out first; low_pass "fir" or "iir" low pass filters the full rate data, see gopro_overlay.imu
+    """
+    decimation: int = 10
+    low_pass: Optional[str] = None
+
+
+def accl_framemeta(gpmd: Union[GPMD, Demux], units, datastream: Optional[DataStream] = None,
+                   devcs: Optional[Container[int]] = None, options: AcclOptions = AcclOptions()):
+    """ACCL samples, decimated as options says"""
     framemeta = FrameMeta()
+    demux = demultiplex(gpmd)
+    calculator = timestamp_calculator_for_packet_type(demux, datastream, "ACCL")
 
-    gpmd.accept(
-        XYZVisitor(
-            "ACCL",
-            on_item=XYZComponentConverter(
-                frame_calculator=timestamp_calculator_for_packet_type(
-                    gpmd, datastream, "ACCL"
-                ),
-                units=units,
-                on_item=lambda t, x: framemeta.add(t, x),
-            ).convert,
+    if options.low_pass is not None:
+        columns = imu_columns(demux, calculator, "ACCL", devcs=devcs).decimate(
+            options.decimation, low_pass=options.low_pass
         )
-    )
+        accl_entries(columns, units, on_item=lambda t, x: framemeta.add(t, x))
+    else:
+        converter = XYZComponentConverter(
+            frame_calculator=calculator,
+            units=units,
+            on_item=lambda t, x: framemeta.add(t, x),
+            decimation=options.decimation,
+        )
+        for packet in demux.stream("ACCL"):
+            if _selected(packet, devcs):
+                converter.convert(xyz_counter(packet), xyz_components(packet))
+            else:
+                converter.skip(packet.timestamp, packet.samples)
 
-    kalman = timeseries_process.process_kalman_pp3("accl", lambda i: i.accl)
-    framemeta.process(kalman)
+    timeseries_process.smooth_kalman_pp3(framemeta, "accl", lambda i: i.accl)
 
     return framemeta
 
 
-def grav_framemeta(gpmd: GPMD, units, datastream: Optional[DataStream] = None):
+def grav_framemeta(gpmd: Union[GPMD, Demux], units, datastream: Optional[DataStream] = None,
+                  devcs: Optional[Container[int]] = None):
     framemeta = FrameMeta()
+    demux = demultiplex(gpmd)
 
-    gpmd.accept(
-        GRAVisitor(
-            on_item=GRAVComponentConverter(
-                frame_calculator=timestamp_calculator_for_packet_type(
-                    gpmd, datastream, "GRAV"
-                ),
-                units=units,
-                on_item=lambda t, x: framemeta.add(t, x),
-            ).convert
-        )
+    converter = GRAVComponentConverter(
+        frame_calculator=timestamp_calculator_for_packet_type(demux, datastream, "GRAV"),
+        units=units,
+        on_item=lambda t, x: framemeta.add(t, x),
     )
+    for packet in demux.stream("GRAV"):
+        if _selected(packet, devcs):
+            converter.convert(packet.devc + 1, grav_components(packet))
+        else:
+            converter.skip(packet.timestamp, packet.samples)
 
     return framemeta
 
 
-def cori_framemeta(gpmd: GPMD, units, datastream: Optional[DataStream] = None):
+def cori_framemeta(gpmd: Union[GPMD, Demux], units, datastream: Optional[DataStream] = None,
+                  devcs: Optional[Container[int]] = None):
     framemeta = FrameMeta()
+    demux = demultiplex(gpmd)
 
-    gpmd.accept(
-        CORIVisitor(
-            on_item=CORIComponentConverter(
-                frame_calculator=timestamp_calculator_for_packet_type(
-                    gpmd, datastream, "CORI"
-                ),
-                units=units,
-                on_item=lambda t, x: framemeta.add(t, x),
-            ).convert
-        )
+    converter = CORIComponentConverter(
+        frame_calculator=timestamp_calculator_for_packet_type(demux, datastream, "CORI"),
+        units=units,
+        on_item=lambda t, x: framemeta.add(t, x),
     )
+    for packet in demux.stream("CORI"):
+        if _selected(packet, devcs):
+            converter.convert(packet.devc + 1, cori_components(packet))
+        else:
+            converter.skip(packet.timestamp, packet.samples)
 
     return framemeta
 
 
 def merge_frame_meta(
-    gps: FrameMeta, other: FrameMeta, update: Callable[[FrameMeta], dict]
+    gps: FrameMeta, other: Union[FrameMeta, ColumnarFrameMeta], update: Optional[Callable[[FrameMeta], dict]] = None,
+    mode: str = "previous", fields: Optional[Sequence[str]] = None
 ):
+    """
+    Update each gps item with values from the other item as of its time - see framemeta_columnar.asof_indices.
+    The times are matched as arrays, rather than looking up each item in turn.
+
+    Given fields, those columns of other are joined in one step, and copied into the gps items under the same
+    names. Given update instead, it can take any values from the other item, so each gps item is updated on its own.
+
+    "linear" mode interpolates in columns, so other is converted to a ColumnarFrameMeta - pass one to merge
+    from it more than once without converting it each time.
+    """
+    if (update is None) == (fields is None):
+        raise ValueError("Give one of update or fields")
+
     if other:
-        for item in gps.items():
-            frame_time = item.timestamp
-            closest_previous = other.get(timeunits(millis=frame_time.magnitude))
-            item.update(**update(closest_previous))
+        items = list(gps.items())
+        if not items:
+            return
+
+        # same sums as timeunits(millis=...), so items line up exactly as they always have
+        at_us = (np.array([item.timestamp.magnitude for item in items]) * multipliers["millis"]).astype(np.int64)
+
+        if fields is not None:
+            columns = _joined_columns(other, at_us, mode, fields)
+            for item, values in zip(items, zip(*columns)):
+                item.update(**dict(zip(fields, values)))
+        elif isinstance(other, ColumnarFrameMeta) or mode == "linear":
+            columnar = other if isinstance(other, ColumnarFrameMeta) else ColumnarFrameMeta.from_framemeta(other)
+            rows = columnar.asof(at_us, mode)
+            for index, item in enumerate(items):
+                item.update(**update(rows[index]))
+        else:
+            other.check_modified()
+            indices, _ = asof_indices(at_us, np.array([t.us for t in other.framelist], dtype=np.int64), mode)
+            entries = [other.frames[t] for t in other.framelist]
+            for item, index in zip(items, indices.tolist()):
+                item.update(**update(entries[index]))
+
+
+def _joined_columns(other: Union[FrameMeta, ColumnarFrameMeta], at_us: np.ndarray, mode: str,
+                    fields: Sequence[str]) -> List[list]:
+    """The values of each of the fields of other, as of each of the times"""
+    if isinstance(other, ColumnarFrameMeta) or mode == "linear":
+        columnar = other if isinstance(other, ColumnarFrameMeta) else ColumnarFrameMeta.from_framemeta(other, list(fields))
+        joined = columnar.asof(at_us, mode, names=list(fields))
+        return [[joined.columns[name].get(index) for index in range(len(at_us))] for name in fields]
+
+    other.check_modified()
+    indices, _ = asof_indices(at_us, np.array([t.us for t in other.framelist], dtype=np.int64), mode)
+    entries = [other.frames[t] for t in other.framelist]
+    taken = indices.tolist()
+    columns = []
+    for name in fields:
+        values = [getattr(entry, name) for entry in entries]
+        columns.append([values[index] for index in taken])
+    return columns
 
 
 class LoadFlag(Enum):
@@ -138,52 +222,237 @@ class LoadFlag(Enum):
     CORI = 3
 
 
+# Streams needed to extract GPS, and to work out sample timings (from the first SHUT)
+GPS_STREAMS = {"GPS5", "GPS9", "SHUT"}
+
+FLAG_STREAMS = {
+    LoadFlag.ACCL: {"ACCL"},
+    LoadFlag.GRAV: {"GRAV"},
+    LoadFlag.CORI: {"CORI"},
+}
+
+
+def streams_for(flags: Set[LoadFlag]) -> Set[str]:
+    wanted = set(GPS_STREAMS)
+    for flag in flags:
+        wanted.update(FLAG_STREAMS[flag])
+    return wanted
+
+
+def resolve_flags(flags: Set[LoadFlag]) -> Set[LoadFlag]:
+    if not flags:
+        print("Loading with ACCL, GRAV, CORI")
+        return set(list(LoadFlag))
+    return flags
+
+
+def framemeta_from_demux(
+    demux: Demux,
+    units,
+    datastream: DataStream,
+    flags: Set[LoadFlag],
+    gps_lock_filter: GPSLockFilter = NullGPSLockFilter(),
+    devcs: Optional[Container[int]] = None,
+    accl: AcclOptions = AcclOptions(),
+) -> FrameMeta:
+    with PoorTimer("extract GPS", indent=1).timing():
+        gps_frame_meta = gps_framemeta(
+            demux, units, datastream=datastream, gps_lock_filter=gps_lock_filter, devcs=devcs
+        )
+
+    if LoadFlag.ACCL in flags:
+        with PoorTimer("extract ACCL", indent=1).timing():
+            merge_frame_meta(
+                gps_frame_meta,
+                accl_framemeta(demux, units, datastream=datastream, devcs=devcs, options=accl),
+                fields=("accl",),
+            )
+
+    if LoadFlag.GRAV in flags:
+        with PoorTimer("extract GRAV", indent=1).timing():
+            merge_frame_meta(
+                gps_frame_meta,
+                grav_framemeta(demux, units, datastream=datastream, devcs=devcs),
+                fields=("grav",),
+            )
+
+    if LoadFlag.CORI in flags:
+        with PoorTimer("extract CORI", indent=1).timing():
+            merge_frame_meta(
+                gps_frame_meta,
+                cori_framemeta(demux, units, datastream=datastream, devcs=devcs),
+                fields=("cori", "ori"),
+            )
+
+    return gps_frame_meta
+
+
+def timelapse_correction(track_duration: Timeunit, video_duration: Timeunit) -> float:
+    """Time in the GPMF track per time in the video - more than 1 for a timelapse"""
+    return track_duration / video_duration
+
+
+def devcs_in_range(
+    index: DEVCTimeIndex,
+    start: Optional[Timeunit] = None,
+    end: Optional[Timeunit] = None,
+    correction: float = 1.0,
+) -> Optional[range]:
+    """
+    The DEVCs that need decoding to cover [start, end] of the video - or None, meaning all of them.
+    correction is the timelapse correction, which turns video times into track times.
+    """
+    if start is None and end is None:
+        return None
+    return clip_devcs(
+        index,
+        start * correction if start is not None else None,
+        end * correction if end is not None else None,
+    )
+
+
+def clip_devcs(index: DEVCTimeIndex, start: Optional[Timeunit] = None, end: Optional[Timeunit] = None) -> range:
+    """
+    The DEVCs that need decoding to cover [start, end] of the track.
+    Raises ValueError if the track doesn't cover any of it, as there would be nothing to show.
+    """
+    if len(index) == 0:
+        raise ValueError("There is no GPMF data")
+    if start is not None and end is not None and end <= start:
+        raise ValueError(f"End {end.millis() / 1000:.3f}s is not after start {start.millis() / 1000:.3f}s")
+    if start is not None and start >= index.end:
+        raise ValueError(
+            f"Start {start.millis() / 1000:.3f}s is at or after the end of the GPMF data, "
+            f"at {index.end.millis() / 1000:.3f}s"
+        )
+    if end is not None and end <= index.start:
+        raise ValueError(
+            f"End {end.millis() / 1000:.3f}s is at or before the start of the GPMF data, "
+            f"at {index.start.millis() / 1000:.3f}s"
+        )
+
+    devcs = index.devcs_between(start, end)
+    log(f"Time range {start} -> {end} is in DEVCs {devcs.start} -> {devcs.stop}")
+    return devcs
+
+
 def parse_gopro(
     gopro_data: bytes,
     units,
     datastream: DataStream,
     flags: Set[LoadFlag] = None,
     gps_lock_filter: GPSLockFilter = NullGPSLockFilter(),
+    start: Optional[Timeunit] = None,
+    end: Optional[Timeunit] = None,
+    accl: AcclOptions = AcclOptions(),
 ) -> FrameMeta:
-
-    if len(flags) == 0:
-        flags = set(list(LoadFlag))
-        print("Loading with ACCL, GRAV, CORI")
+    """
+    FrameMeta from the GPMF data of a recording. If start or end is given, only the packets that overlap
+    that part of the track are converted - timings are still those of the whole track. There is no video
+    here, so start and end are track times - load_gopro takes video times.
+    """
+    flags = resolve_flags(flags)
 
     with PoorTimer("parsing").timing():
         with PoorTimer("GPMD", indent=1).timing():
-            gpmd = GPMD.parse(gopro_data)
+            wanted = streams_for(flags)
+            demux = demultiplex(GPMD.lazy(gopro_data, fourccs=wanted), wanted)
 
-        with PoorTimer("extract GPS", indent=1).timing():
-            gps_frame_meta = gps_framemeta(
-                gpmd, units, datastream=datastream, gps_lock_filter=gps_lock_filter
+        devcs = None
+        if start is not None or end is not None:
+            devcs = devcs_in_range(DEVCTimeIndex.from_demux(demux, datastream), start, end)
+        return framemeta_from_demux(demux, units, datastream, flags, gps_lock_filter, devcs=devcs, accl=accl)
+
+
+@dataclasses.dataclass(frozen=True)
+class GoproTrack:
+    framemeta: FrameMeta
+    # the duration of the whole GPMF track, even if only part of it was converted
+    duration: Timeunit
+
+
+def load_gopro(
+    recording: GoproRecording,
+    units,
+    flags: Set[LoadFlag] = None,
+    gps_lock_filter: GPSLockFilter = NullGPSLockFilter(),
+    start: Optional[Timeunit] = None,
+    end: Optional[Timeunit] = None,
+    accl: AcclOptions = AcclOptions(),
+) -> GoproTrack:
+    """
+    As parse_gopro, but the data track is parsed and demultiplexed while ffmpeg is still reading it,
+    rather than being loaded into memory first. Converting the packets waits for the whole track - without
+    a SHUT timestamp, the timing correction needs every packet.
+
+    start and end are times in the video - for a timelapse, they are scaled to times in the track.
+    Raises ValueError if the track doesn't cover any of [start, end].
+    """
+    flags = resolve_flags(flags)
+
+    with PoorTimer("parsing").timing():
+        demux = stream_demux(recording, flags)
+        index = DEVCTimeIndex.from_demux(demux, recording.data)
+        correction = timelapse_correction(index.end, recording.video.duration)
+        devcs = devcs_in_range(index, start, end, correction)
+        framemeta = framemeta_from_demux(
+            demux, units, recording.data, flags, gps_lock_filter, devcs=devcs, accl=accl
+        )
+        return GoproTrack(framemeta=framemeta, duration=index.end)
+
+
+def stream_demux(recording: GoproRecording, flags: Set[LoadFlag]) -> Demux:
+    """The streams wanted for flags, demultiplexed while ffmpeg is reading the data track"""
+    with PoorTimer("GPMD", indent=1).timing():
+        demuxer = StreamingDemultiplexer(streams_for(flags))
+        recording.stream_data(demuxer.feed)
+        return demuxer.finish()
+
+
+def stitch_chapters(chapters: List[Tuple[Timeunit, FrameMeta]], units) -> FrameMeta:
+    """
+    Put the FrameMeta of each chapter of a recording onto one timeline.
+    Args:
+        chapters: the offset of each chapter from the start of the first, and its FrameMeta
+        units: units
+    Returns:
+        FrameMeta for the whole recording
+    """
+    stitched = FrameMeta()
+    for offset, framemeta in chapters:
+        for frame_time, entry in framemeta.frames.items():
+            at = frame_time + offset
+            entry.update(timestamp=units.Quantity(at.millis(), units.number))
+            stitched.add(at, entry)
+    return stitched
+
+
+def chapters_framemeta(
+    chapters: List[Tuple[GoproRecording, Demux]],
+    units,
+    flags: Set[LoadFlag] = None,
+    gps_lock_filter: GPSLockFilter = NullGPSLockFilter(),
+    accl: AcclOptions = AcclOptions(),
+) -> FrameMeta:
+    """
+    FrameMeta for a recording that was split into several files (chapters) by the camera.
+
+    Each chapter is converted with its own timing, so there is no need to join the files first.
+    GoPro timestamps restart in each chapter, so chapters are offset by the durations of the
+    videos before them.
+    """
+    flags = resolve_flags(flags)
+
+    offset = timeunits(millis=0)
+    converted = []
+    for recording, demux in chapters:
+        with PoorTimer(f"chapter {recording.location}").timing():
+            converted.append(
+                (offset, framemeta_from_demux(demux, units, recording.data, flags, gps_lock_filter, accl=accl))
             )
+        offset = offset + recording.video.duration
 
-        if LoadFlag.ACCL in flags:
-            with PoorTimer("extract ACCL", indent=1).timing():
-                merge_frame_meta(
-                    gps_frame_meta,
-                    accl_framemeta(gpmd, units, datastream=datastream),
-                    lambda a: {"accl": a.accl},
-                )
-
-        if LoadFlag.GRAV in flags:
-            with PoorTimer("extract GRAV", indent=1).timing():
-                merge_frame_meta(
-                    gps_frame_meta,
-                    grav_framemeta(gpmd, units, datastream=datastream),
-                    lambda a: {"grav": a.grav},
-                )
-
-        if LoadFlag.CORI in flags:
-            with PoorTimer("extract CORI", indent=1).timing():
-                merge_frame_meta(
-                    gps_frame_meta,
-                    cori_framemeta(gpmd, units, datastream=datastream),
-                    lambda a: {"cori": a.cori, "ori": a.ori},
-                )
-
-        return gps_frame_meta
+    return stitch_chapters(converted, units)
 
 
 def framemeta_from_datafile(
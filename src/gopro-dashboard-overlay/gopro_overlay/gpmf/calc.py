@@ -1,12 +1,14 @@
 import collections
-from typing import Callable, Tuple, Optional
+from typing import Callable, Tuple, Optional, Union, Iterable, Dict
+
+import numpy as np
 
 from gopro_overlay.exceptions import Defect
 from gopro_overlay.ffmpeg_gopro import DataStream
-from gopro_overlay.gpmf import GPMD
-from gopro_overlay.gpmf.visitors.find import DetermineTimestampOfFirstSHUTVisitor
+from gopro_overlay.gpmf import GPMD, DispatchTable, compile_dispatch
+from gopro_overlay.gpmf.demux import Demux, demultiplex
 from gopro_overlay.log import log
-from gopro_overlay.timeunits import Timeunit, timeunits
+from gopro_overlay.timeunits import Timeunit, timeunits, multipliers
 
 CorrectionFactors = collections.namedtuple("CorrectionFactors", ["first_frame", "last_frame", "frames_s"])
 
@@ -15,6 +17,41 @@ class PacketTimeCalculator:
     def next_packet(self, timestamp: Timeunit, samples_before_this: int, num_samples: int) -> Callable[[int], Tuple[Timeunit, Timeunit]]:
         raise NotImplementedError()
 
+    def next_packet_us(self, timestamp: Timeunit, samples_before_this: int, num_samples: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        As next_packet, but the timings of all the samples in the packet at once, as int64 arrays of
+        microseconds - (frame time, offset from the first sample in the packet)
+        """
+        calculator = self.next_packet(timestamp, samples_before_this, num_samples)
+        timings = [calculator(index) for index in range(num_samples)]
+        return (
+            np.array([t.us for t, _ in timings], dtype=np.int64),
+            np.array([o.us for _, o in timings], dtype=np.int64),
+        )
+
+    def skip(self, timestamp: Timeunit, samples_before_this: int, num_samples: int) -> int:
+        """
+        Account for a packet that isn't being converted, without decoding it, so the timings of later
+        packets are unchanged. Gives the number of samples before the next packet.
+        """
+        if num_samples == 0:
+            return samples_before_this
+        self.next_packet(timestamp, samples_before_this, num_samples)
+        return samples_before_this + num_samples
+
+    def stream_us(self, packets: Iterable[Tuple[Timeunit, int]]) -> Tuple[np.ndarray, np.ndarray]:
+        """Timings of every sample in a stream, given the (timestamp, sample count) of each packet"""
+        frames, offsets = [], []
+        samples_before_this = 0
+        for timestamp, num_samples in packets:
+            frame_us, offset_us = self.next_packet_us(timestamp, samples_before_this, num_samples)
+            frames.append(frame_us)
+            offsets.append(offset_us)
+            samples_before_this += num_samples
+        if not frames:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        return np.concatenate(frames), np.concatenate(offsets)
+
 
 class CoriTimestampPacketTimeCalculator(PacketTimeCalculator):
     def __init__(self, cori_timestamp: Timeunit):
@@ -23,14 +60,16 @@ class CoriTimestampPacketTimeCalculator(PacketTimeCalculator):
         self._last_timestamp: Optional[Timeunit] = None
         self._adjust: Optional[Timeunit] = None
 
-    def next_packet(self, timestamp, samples_before_this, num_samples):
-
+    def _next_packet(self, timestamp) -> Tuple[int, int]:
+        """Update the running state with the packet, giving (time of its first sample, time per sample) in us"""
         if self._first_timestamp is not None and self._last_timestamp is not None and timestamp < self._last_timestamp:
             delta = abs(self._last_timestamp - timestamp)
             if delta < timeunits(seconds=1):
                 log(f"GPS Time correction.. Step back {delta} - possible GPS issue?")
             else:
-                # This is definitely wrong - need all the SHUT timings from the joined files...
+                # Files joined by join_files restart their timestamps at each chapter. This is definitely wrong -
+                # need all the SHUT timings from the joined files... GoproLoader.load_chapters avoids it by timing
+                # each chapter separately
                 self._adjust += self._last_timestamp
                 log(f"Joined file detected... adjusting by {self._adjust}")
                 self._first_timestamp = timestamp
@@ -42,15 +81,26 @@ class CoriTimestampPacketTimeCalculator(PacketTimeCalculator):
 
         if self._last_timestamp is None:
             self._last_timestamp = timestamp
-            time_per_sample = timeunits(millis=1001) / num_samples
+            time_per_sample = timeunits(millis=1001)
         else:
-            time_per_sample = (timestamp - self._last_timestamp) / num_samples
+            time_per_sample = timestamp - self._last_timestamp
             self._last_timestamp = timestamp
 
+        return (timestamp + self._adjust - self._first_timestamp).us, time_per_sample.us
+
+    def next_packet(self, timestamp, samples_before_this, num_samples):
+        start_us, time_per_packet_us = self._next_packet(timestamp)
+        time_per_sample = Timeunit(time_per_packet_us / num_samples)
+
         return lambda index: (
-            timestamp + self._adjust - self._first_timestamp + (index * time_per_sample), index * time_per_sample
+            Timeunit(start_us) + (index * time_per_sample), index * time_per_sample
         )
 
+    def next_packet_us(self, timestamp, samples_before_this, num_samples):
+        start_us, time_per_packet_us = self._next_packet(timestamp)
+        offsets = np.arange(num_samples, dtype=np.int64) * int(time_per_packet_us / num_samples)
+        return start_us + offsets, offsets
+
 
 class CorrectionFactorsPacketTimeCalculator(PacketTimeCalculator):
     def __init__(self, correction_factors: CorrectionFactors):
@@ -63,6 +113,14 @@ class CorrectionFactorsPacketTimeCalculator(PacketTimeCalculator):
             timeunits(seconds=index / self.correction_factors.frames_s)
         )
 
+    def next_packet_us(self, timestamp, samples_before_this, num_samples):
+        # same operations, in the same order, as timeunits(seconds=...) so the results are identical
+        rate = self.correction_factors.frames_s
+        index = np.arange(num_samples, dtype=np.int64)
+        frames = ((samples_before_this + index) / rate * multipliers["seconds"]).astype(np.int64)
+        offsets = (index / rate * multipliers["seconds"]).astype(np.int64)
+        return self.correction_factors.first_frame.us + frames, offsets
+
 
 class UnknownPacketTimeCalculator(PacketTimeCalculator):
     def __init__(self, packet_type):
@@ -72,15 +130,17 @@ class UnknownPacketTimeCalculator(PacketTimeCalculator):
         raise Defect("can't calculate timings for {self._packet_type} as none were seen.")
 
 
-def timestamp_calculator_for_packet_type(meta: GPMD, datastream: Optional[DataStream],
+def timestamp_calculator_for_packet_type(meta: Union[GPMD, Demux], datastream: Optional[DataStream],
                                          packet_type: str) -> PacketTimeCalculator:
-    cori_timestamp = meta.accept(DetermineTimestampOfFirstSHUTVisitor()).timestamp
+    demux = demultiplex(meta)
+    cori_timestamp = demux.first_shut_timestamp
     if cori_timestamp is not None:
         return CoriTimestampPacketTimeCalculator(cori_timestamp)
     else:
         assert datastream is not None
         visitor = CalculateCorrectionFactorsVisitor(packet_type, datastream)
-        meta.accept(visitor)
+        for packet in demux.stream(packet_type):
+            visitor.add(packet.item)
 
         if visitor.found():
             return CorrectionFactorsPacketTimeCalculator(visitor.factors())
@@ -99,12 +159,23 @@ class PayloadMaths:
         return min(packet_time, self._max_time)
 
 
+_correction_factors_tables: Dict[Tuple[type, str], DispatchTable] = {}
+
+
+def _correction_factors_table(cls, wanted: str) -> DispatchTable:
+    """The visitor's table depends on the packet type it wants, so is compiled once for each"""
+    table = _correction_factors_tables.get((cls, wanted))
+    if table is None:
+        table = _correction_factors_tables[(cls, wanted)] = compile_dispatch(cls, items={wanted: cls.add})
+    return table
+
+
 class CalculateCorrectionFactorsVisitor:
     """This implements GetGPMFSampleRate in GPMF_utils.c"""
 
     def __init__(self, wanted: str, datastream: DataStream):
         self.wanted = wanted
-        self.wanted_method_name = f"vi_{self.wanted}"
+        self._handlers = _correction_factors_table(type(self), wanted)
         self._payload_maths = PayloadMaths(datastream)
         self.count = 0
         self.samples = 0
@@ -115,17 +186,14 @@ class CalculateCorrectionFactorsVisitor:
     def vic_DEVC(self, item, contents):
         return self
 
-    def __getattr__(self, name, *args):
-        if name == self.wanted_method_name:
-            return self._handle_item
-        else:
-            raise AttributeError(f"{name}")
+    def handlers(self) -> DispatchTable:
+        return self._handlers
 
     def vic_STRM(self, item, contents):
         if self.wanted in contents:
             return self
 
-    def _handle_item(self, item):
+    def add(self, item):
         self.samples += item.repeat
         self.meanY += self.samples
         self.meanX += self._payload_maths.time_of_out_packet(self.count)
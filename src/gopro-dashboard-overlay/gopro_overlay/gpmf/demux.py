@@ -0,0 +1,166 @@
+import dataclasses
+from typing import Dict, List, Optional, Set, Iterable, Union
+
+from gopro_overlay.gpmf.gpmf import GPMD, DispatchTable, GPMDItem, GPMDStreamParser, compile_dispatch
+from gopro_overlay.timeunits import Timeunit
+
+# The FourCCs that carry sample data, rather than describing it
+SENSOR_STREAMS = {"ACCL", "GYRO", "GRAV", "CORI", "GPS5", "GPS9", "SHUT"}
+
+
+@dataclasses.dataclass(frozen=True)
+class StreamPacket:
+    """
+    The sample data of one STRM, with the metadata that came with it.
+    devc is the (zero based) number of the DEVC the stream was in.
+    Nothing is interpreted until it is used - the items are views on the GPMF data.
+    """
+    devc: int
+    fourcc: str
+    item: GPMDItem
+    metadata: Dict[str, GPMDItem]
+
+    def _interpret(self, fourcc, default=None):
+        item = self.metadata.get(fourcc)
+        return item.interpret() if item is not None else default
+
+    @property
+    def samples(self) -> int:
+        return self.item.repeat
+
+    @property
+    def timestamp(self) -> Optional[Timeunit]:
+        return self._interpret("STMP")
+
+    @property
+    def samples_total(self) -> Optional[int]:
+        return self._interpret("TSMP")
+
+    @property
+    def scale(self):
+        return self._interpret("SCAL")
+
+    @property
+    def orin(self) -> Optional[str]:
+        return self._interpret("ORIN")
+
+    @property
+    def siun(self) -> Optional[str]:
+        return self._interpret("SIUN")
+
+    @property
+    def types(self) -> Optional[List[str]]:
+        return self._interpret("TYPE")
+
+    @property
+    def temperature(self):
+        return self._interpret("TMPC")
+
+    def get(self, fourcc):
+        """Interpreted value of any other item in the stream, e.g. GPSU"""
+        return self._interpret(fourcc)
+
+    def interpret(self):
+        """The samples, decoded using the SCAL and TYPE of the stream"""
+        return self.item.interpret(scale=self.scale, types=self.types)
+
+
+class Demux:
+    """All the sensor packets of a GPMD, grouped by FourCC, in the order they appear"""
+
+    def __init__(self):
+        self.packets: Dict[str, List[StreamPacket]] = {}
+
+    def add(self, packet: StreamPacket):
+        self.packets.setdefault(packet.fourcc, []).append(packet)
+
+    def has(self, fourcc: str) -> bool:
+        return fourcc in self.packets
+
+    def stream(self, fourcc: str) -> List[StreamPacket]:
+        return self.packets.get(fourcc, [])
+
+    @property
+    def first_shut_timestamp(self) -> Optional[Timeunit]:
+        """
+        Seems like first SHUT frame is correlated with video frame?
+        https://github.com/gopro/gpmf-parser/blob/151bb352ab3d1af8feb31e0cf8277ff86c70095d/demo/GPMF_demo.c#L414
+        """
+        for packet in self.stream("SHUT"):
+            timestamp = packet.timestamp
+            if timestamp:
+                return timestamp
+        return None
+
+
+class DemuxStreamVisitor:
+    """Collects the wanted items of one STRM - every other item in it is metadata for them"""
+
+    def __init__(self, devc: int, wanted: Set[str], on_end):
+        self._devc = devc
+        self._wanted = wanted
+        self._on_end = on_end
+        self._metadata = {}
+        self._data = []
+
+    def handlers(self) -> DispatchTable:
+        return _stream_handlers
+
+    def _item(self, item):
+        if item.fourcc in self._wanted:
+            self._data.append(item)
+        else:
+            self._metadata[item.fourcc] = item
+
+    def v_end(self):
+        for item in self._data:
+            self._on_end(StreamPacket(self._devc, item.fourcc, item, self._metadata))
+
+
+# every item of a stream goes to _item, so the table is the same for every DemuxStreamVisitor
+_stream_handlers = compile_dispatch(DemuxStreamVisitor, default=DemuxStreamVisitor._item)
+
+
+class DemuxVisitor:
+    """Walks the GPMD once, collecting every stream that contains any of the wanted FourCCs"""
+
+    def __init__(self, wanted: Iterable[str] = SENSOR_STREAMS):
+        self._wanted = set(wanted)
+        self._devc = -1
+        self.demux = Demux()
+
+    def vic_DEVC(self, item, contents):
+        self._devc += 1
+        return self
+
+    def vic_STRM(self, item, contents):
+        if not self._wanted.isdisjoint(contents):
+            return DemuxStreamVisitor(self._devc, self._wanted, on_end=self.demux.add)
+
+    def v_end(self):
+        pass
+
+
+def demultiplex(gpmd: Union[GPMD, Demux], wanted: Iterable[str] = SENSOR_STREAMS) -> Demux:
+    if isinstance(gpmd, Demux):
+        return gpmd
+    return gpmd.accept(DemuxVisitor(wanted)).demux
+
+
+class StreamingDemultiplexer:
+    """Demultiplexes a GPMF track chunk by chunk, as it is read"""
+
+    def __init__(self, wanted: Iterable[str] = SENSOR_STREAMS):
+        self._parser = GPMDStreamParser(fourccs=wanted)
+        self._visitor = DemuxVisitor(wanted)
+
+    def _visit(self, nodes):
+        for node in nodes:
+            node.accept(self._visitor)
+
+    def feed(self, chunk):
+        self._visit(self._parser.feed(chunk))
+
+    def finish(self) -> Demux:
+        self._visit(self._parser.finish())
+        return self._visitor.demux
@@ -1,9 +1,12 @@
 import dataclasses
 import datetime
-import itertools
+import functools
 import struct
+import sys
 from enum import Enum
-from typing import List, TypeVar, Optional
+from typing import List, TypeVar, Optional, NamedTuple, Iterable, Dict, Sequence
+
+import numpy as np
 
 from gopro_overlay.log import log
 from gopro_overlay.timeunits import timeunits
@@ -13,8 +16,9 @@ T = TypeVar("T")
 
 class GPMD:
 
-    def __init__(self, items):
+    def __init__(self, items, index: Optional['GPMDIndex'] = None):
         self._items = items
+        self.index = index
 
     def __len__(self):
         return len(self._items)
@@ -23,14 +27,25 @@ class GPMD:
         return self._items[key]
 
     def accept(self, visitor: T) -> T:
+        table = dispatch_table(visitor)
         for item in self._items:
-            item.accept(visitor)
+            item.visit(visitor, table)
         return visitor
 
     @staticmethod
-    def parse(data: bytes) -> 'GPMD':
+    def parse(data) -> 'GPMD':
         return GPMD(list(GPMDParser(data).items()))
 
+    @staticmethod
+    def lazy(data, fourccs: Optional[Iterable[str]] = None) -> 'GPMD':
+        """
+        Index the headers of the data, but only decode items when they are visited.
+        If fourccs is given, streams that contain none of them are left out entirely.
+        """
+        index = GPMDIndex(data)
+        wanted = frozenset(fourccs) if fourccs is not None else None
+        return GPMD([index.node(entry, wanted) for entry in index.children[None]], index=index)
+
 
 GPMDStruct = struct.Struct('>4sBBH')
 
@@ -97,16 +112,170 @@ type_mappings = {'c': 'c',
                  'U': 'c',
                  'l': 'l',
                  'B': 'B',
-                 'J': 'Q'
+                 'J': 'Q',
+                 'b': 'b',
+                 'd': 'd',
+                 'j': 'q',
+                 'F': '4s',
+                 'q': 'l',
+                 'Q': 'q',
                  }
 
+# q and Q are signed fixed point numbers, Q15.16 and Q31.32
+_fixed_point = {'q': float(1 << 16), 'Q': float(1 << 32)}
+
+# numpy equivalents of the (standard size) struct formats in type_mappings
+_numpy_types = {'c': 'S1',
+                'L': 'u4',
+                'h': 'i2',
+                'H': 'u2',
+                'f': 'f4',
+                'l': 'i4',
+                'B': 'u1',
+                'Q': 'u8',
+                'b': 'i1',
+                'd': 'f8',
+                'q': 'i8',
+                '4s': 'S4',
+                }
+
+
+@functools.lru_cache(maxsize=None)
+def _dtype_for(type_char: str) -> np.dtype:
+    return np.dtype('>' + _numpy_types[type_mappings[type_char]])
+
+
+@functools.lru_cache(maxsize=None)
+def _dtype_for_types(types: str) -> np.dtype:
+    return np.dtype([(f"f{i}", _dtype_for(t)) for i, t in enumerate(types)])
+
+
+def expand_types(types) -> str:
+    """TYPE can give counts for elements, e.g. 'f[3]L' is the same as 'fffL'"""
+    types = "".join(types)
+    if "[" not in types:
+        return types
+    expanded = []
+    i = 0
+    while i < len(types):
+        if types[i] == "[":
+            close = types.index("]", i)
+            expanded.append(expanded[-1] * (int(types[i + 1:close]) - 1))
+            i = close + 1
+        else:
+            expanded.append(types[i])
+            i += 1
+    return "".join(expanded)
+
+
+def _scales(scale, count) -> List[float]:
+    if scale is None:
+        return [1.0] * count
+    scale = [float(s) for s in (scale if isinstance(scale, (tuple, list)) else [scale])]
+    if len(scale) == 1:
+        return scale * count
+    return (scale + [1.0] * count)[:count]
+
+
+class Samples(Sequence):
+    """
+    The samples of an item as an (n, k) float array, presented as a sequence of dataclasses.
+
+    Code that wants speed should use .array directly - the dataclasses are only created when indexed.
+    """
+    __slots__ = ("array", "kind")
+
+    def __init__(self, array: np.ndarray, kind):
+        self.array = array
+        self.kind = kind
+
+    def __len__(self):
+        return len(self.array)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.kind(*row) for row in self.array[index].tolist()]
+        return self.kind(*self.array[index].tolist())
+
+    def __iter__(self):
+        return (self.kind(*row) for row in self.array.tolist())
+
+    def __repr__(self):
+        return f"Samples({self.kind.__name__}, {self.array.shape})"
+
+
+def interpret_array(item, scale=None, types=None) -> np.ndarray:
+    """
+    Decode all the samples of an item in one go.
+    Args:
+        item: the item
+        scale: the SCAL of the stream - either a single value, or one per element, with any missing being 1
+        types: the TYPE of the stream, if the elements are not all the same type (e.g. GPS9)
+    Returns:
+        float64 array of shape (repeat, elements per sample), divided by scale
+    """
+    if types is None:
+        dtype = _dtype_for(item.type_char)
+        width = item.size // dtype.itemsize
+        unscaled = np.frombuffer(item.rawdata, dtype=dtype, count=item.repeat * width)
+        values = unscaled.astype(np.float64).reshape(item.repeat, width)
+        if item.type_char in _fixed_point:
+            values /= _fixed_point[item.type_char]
+    else:
+        types = expand_types(types)
+        dtype = _dtype_for_types(types)
+        unscaled = np.frombuffer(item.rawdata, dtype=dtype, count=item.repeat)
+        values = np.empty((item.repeat, len(dtype.names)), dtype=np.float64)
+        for i, name in enumerate(dtype.names):
+            values[:, i] = unscaled[name]
+            if types[i] in _fixed_point:
+                values[:, i] /= _fixed_point[types[i]]
+
+    if scale is not None:
+        values /= np.array(_scales(scale, values.shape[1]), dtype=np.float64)
+
+    return values
+
+
+def interpret_records(item, scale=None, types=None) -> np.ndarray:
+    """
+    Decode the samples of a compound item (type '?'), whose layout is given by the TYPE of the stream,
+    e.g. SCEN, where each element is a FourCC and a probability.
+    Returns:
+        structured array, with numeric fields as float64 divided by scale, and FourCCs as bytes.
+        If a sample holds several of the structures, the shape is (repeat, structures per sample)
+    """
+    if types is None:
+        raise ValueError(f"Can't interpret {item.fourcc} without the TYPE of its stream")
+
+    types = expand_types(types)
+    dtype = _dtype_for_types(types)
+    per_sample = max(1, item.size // dtype.itemsize)
+    raw = np.frombuffer(item.rawdata, dtype=dtype, count=item.repeat * per_sample)
+
+    scales = _scales(scale, len(types))
+    records = np.empty(raw.shape, dtype=[(n, dtype[n] if dtype[n].kind == "S" else np.float64) for n in dtype.names])
+    for i, name in enumerate(dtype.names):
+        if dtype[name].kind == "S":
+            records[name] = raw[name]
+        else:
+            records[name] = raw[name] / (scales[i] * _fixed_point.get(types[i], 1.0))
+
+    return records.reshape(item.repeat, per_sample) if per_sample > 1 else records
+
+
+def _interpret_samples(item, scale=None, types=None, **kwargs) -> np.ndarray:
+    if item.type_char == '?':
+        return interpret_records(item, scale=scale, types=types)
+    return interpret_array(item, scale=scale)
+
 
 def _interpret_string(item, **kwargs):
     return str(item.rawdata, encoding='unicode_escape', errors="replace").strip('\0')
 
 
 def _interpret_gps_timestamp(item, **kwargs) -> Optional[datetime.datetime]:
-    date_string = item.rawdata.decode('utf-8', errors='replace')
+    date_string = str(item.rawdata, encoding='utf-8', errors='replace')
     try:
         return datetime.datetime.strptime(
             date_string,
@@ -116,13 +285,18 @@ def _interpret_gps_timestamp(item, **kwargs) -> Optional[datetime.datetime]:
             f"https://github.com/gopro/gpmf-parser/issues/162")
 
 
+@functools.lru_cache(maxsize=None)
+def _struct_for(fmt: str) -> struct.Struct:
+    return struct.Struct(fmt)
+
+
 def _struct_mapping_for(item, repeat=None):
     repeat = item.repeat if repeat is None else repeat
-    return struct.Struct('>' + type_mappings[item.type_char] * repeat)
+    return _struct_for('>' + type_mappings[item.type_char] * repeat)
 
 
 def _struct_mapping_for_type(types):
-    return struct.Struct('>' + "".join([type_mappings[t] for t in types]))
+    return _struct_for('>' + "".join([type_mappings[t] for t in types]))
 
 
 def _interpret_atom(item, **kwargs):
@@ -137,31 +311,12 @@ def _interpret_list(item, **kwargs):
     return _struct_mapping_for(item).unpack_from(item.rawdata)
 
 
-def _interpret_element(item, scale, types=None):
-    if types is None:
-        single = _struct_mapping_for(item, repeat=1)
-        mapping = _struct_mapping_for(item, repeat=item.size // single.size)
-    else:
-        mapping = _struct_mapping_for_type(types)
-
-    repeat = item.repeat
-
-    if repeat > 1 and len(scale) == 1:
-        scale = list(itertools.repeat(scale[0], item.size))
+def _interpret_gps5(item, scale, **kwargs) -> Samples:
+    return Samples(interpret_array(item, scale=scale), GPS5)
 
-    def unpack_single(r):
-        unscaled = mapping.unpack_from(item.rawdata[r * item.size: (r + 1) * item.size])
-        return [float(x) / float(y) for x, y in zip(unscaled, scale)]
 
-    return [unpack_single(r) for r in range(repeat)]
-
-
-def _interpret_gps5(item, **kwargs) -> List[GPS5]:
-    return [GPS5(*it) for it in _interpret_element(item, **kwargs)]
-
-
-def _interpret_gps9(item, **kwargs) -> List[GPS9]:
-    return [GPS9(*it) for it in _interpret_element(item, **kwargs)]
+def _interpret_gps9(item, scale, types=None, **kwargs) -> Samples:
+    return Samples(interpret_array(item, scale=scale, types=types), GPS9)
 
 
 def _interpret_gps_precision(item, **kwargs) -> float:
@@ -169,19 +324,19 @@ def _interpret_gps_precision(item, **kwargs) -> float:
 
 
 def _interpret_type(item, **kwargs) -> List[str]:
-    return list(_interpret_string(item, **kwargs))
+    return list(expand_types(_interpret_string(item, **kwargs)))
 
 
-def _interpret_xyz(item, **kwargs) -> List[XYZ]:
-    return [XYZ(*it) for it in _interpret_element(item, **kwargs)]
+def _interpret_xyz(item, scale, **kwargs) -> Samples:
+    return Samples(interpret_array(item, scale=scale), XYZ)
 
 
-def _interpret_vector(item, **kwargs) -> List[VECTOR]:
-    return [VECTOR(*it) for it in _interpret_element(item, **kwargs)]
+def _interpret_vector(item, scale, **kwargs) -> Samples:
+    return Samples(interpret_array(item, scale=scale), VECTOR)
 
 
-def _interpret_quaternion(item, **kwargs) -> List[QUATERNION]:
-    return [QUATERNION(*it) for it in _interpret_element(item, **kwargs)]
+def _interpret_quaternion(item, scale, **kwargs) -> Samples:
+    return Samples(interpret_array(item, scale=scale), QUATERNION)
 
 
 def _interpret_gps_lock(item, **kwargs) -> GPSFix:
@@ -197,6 +352,7 @@ def _interpret_device_marker(item, **kwargs):
 
 
 interpreters = {
+    "AALP": _interpret_samples,
     "ACCL": _interpret_xyz,
     "CORI": _interpret_quaternion,
     "DEVC": _interpret_device_marker,
@@ -208,9 +364,16 @@ interpreters = {
     "GPSU": _interpret_gps_timestamp,
     "GRAV": _interpret_vector,
     "GYRO": _interpret_xyz,
+    "HUES": _interpret_samples,
+    "IORI": _interpret_samples,
+    "ISOE": _interpret_samples,
+    "LSKP": _interpret_samples,
+    "MSKP": _interpret_samples,
     "MWET": _interpret_list,
     "ORIN": _interpret_string,
     "SCAL": _interpret_list,
+    "SCEN": _interpret_samples,
+    "SHUT": _interpret_samples,
     "SIUN": _interpret_string,
     "STMP": _interpret_timestamp,
     "STNM": _interpret_string,
@@ -220,7 +383,11 @@ interpreters = {
     "TOCK": _interpret_atom,
     "TSMP": _interpret_atom,
     "TYPE": _interpret_type,
+    "UNIF": _interpret_samples,
+    "WBAL": _interpret_samples,
     "WNDM": _interpret_list,
+    "WRGB": _interpret_samples,
+    "YAVG": _interpret_samples,
 }
 
 
@@ -232,14 +399,19 @@ def interpret_item(item, **kwargs):
 
 
 class GPMDContainer:
+    __slots__ = ("fourcc", "_items", "_size", "_repeat", "_padded_length")
 
     def __init__(self, fourcc, size, repeat, padded_length, items):
         self.fourcc = fourcc
-        self.items = items
+        self._items = items
         self._size = size
         self._repeat = repeat
         self._padded_length = padded_length
 
+    @property
+    def items(self):
+        return self._items
+
     def __str__(self) -> str:
         return f"GPMDContainer: {self.fourcc}" \
                f", #Items: {len(self)}" \
@@ -263,28 +435,38 @@ class GPMDContainer:
         return [i for i in self.items if i.fourcc == fourcc]
 
     def accept(self, visitor):
+        self.visit(visitor, dispatch_table(visitor))
 
-        method = f"vic_{self.fourcc}"
-        if hasattr(visitor, method):
-            container_visitor = getattr(visitor, method)(self, self.itemset)
+    def visit(self, visitor, table: 'DispatchTable'):
+        handler = table.containers.get(self.fourcc)
+        if handler is not None:
+            container_visitor = handler(visitor, self, self.itemset)
 
             if container_visitor is not None:
+                container_table = dispatch_table(container_visitor)
                 for i in self.items:
-                    i.accept(container_visitor)
+                    i.visit(container_visitor, container_table)
 
                 container_visitor.v_end()
 
 
 class GPMDItem:
+    """A leaf KLV. rawdata is a view onto the parsed buffer, not a copy of it."""
+    __slots__ = ("_fourcc", "_type", "_size", "_repeat", "_padded_length", "_rawdata")
 
     def __init__(self, fourcc, type_char_code, size, repeat, padded_length, rawdata):
         self._fourcc = fourcc
-        self._type = chr(type_char_code)
+        self._type = _type_chars[type_char_code]
         self._size = size
         self._repeat = repeat
         self._padded_length = padded_length
         self._rawdata = rawdata
 
+    def __reduce__(self):
+        # views can't be pickled, so an item sent to another process takes a copy of just its own data
+        rawdata = bytes(self._rawdata) if self._rawdata is not None else None
+        return GPMDItem, (self._fourcc, ord(self._type), self._size, self._repeat, self._padded_length, rawdata)
+
     @property
     def repeat(self):
         return self._repeat
@@ -309,13 +491,17 @@ class GPMDItem:
     def bytecount(self):
         return GPMDStruct.size + self._padded_length if self._type != 0 else GPMDStruct.size
 
-    def interpret(self, scale=None):
-        return interpret_item(self, scale=scale)
+    def interpret(self, scale=None, types=None):
+        """scale and types are the SCAL and TYPE of the item's stream - compound items (e.g. SCEN) need the TYPE"""
+        return interpret_item(self, scale=scale, types=types)
 
     def accept(self, visitor):
-        method = f"vi_{self.fourcc}"
-        if hasattr(visitor, method):
-            getattr(visitor, method)(self)
+        self.visit(visitor, dispatch_table(visitor))
+
+    def visit(self, visitor, table: 'DispatchTable'):
+        handler = table.items.get(self.fourcc, table.default)
+        if handler is not None:
+            handler(visitor, self)
 
     def __str__(self):
         if self.rawdata is None:
@@ -323,7 +509,7 @@ class GPMDItem:
             rawdatas = "null"
         else:
             rawdata = ' '.join(format(x, '02x') for x in self.rawdata)
-            rawdatas = self.rawdata[0:50]
+            rawdatas = bytes(self.rawdata[0:50])
 
         return f"GPMDItem: {self.fourcc}" \
                f", Type={self.type_char}" \
@@ -333,10 +519,101 @@ class GPMDItem:
                f" [{rawdata}] [{rawdatas}]"
 
 
+class DispatchTable:
+    """
+    The vi_XXXX / vic_XXXX methods of a visitor, by FourCC, so visiting a node is a single dict lookup.
+    Handlers are called as handler(visitor, node, ...). default, if given, handles items that have no handler.
+    """
+    __slots__ = ("items", "containers", "default")
+
+    def __init__(self, items, containers, default=None):
+        self.items = items
+        self.containers = containers
+        self.default = default
+
+
+class _DynamicHandlers(dict):
+    """For visitors that make up their handlers in __getattr__ - looks each FourCC up once, and remembers it"""
+
+    def __init__(self, visitor, prefix):
+        super().__init__()
+        self._visitor = visitor
+        self._prefix = prefix
+
+    def __missing__(self, fourcc):
+        method = getattr(self._visitor, self._prefix + fourcc, None)
+        handler = (lambda _, *args: method(*args)) if method is not None else None
+        self[fourcc] = handler
+        return handler
+
+    def get(self, fourcc, default=None):
+        return self[fourcc]
+
+
+def compile_dispatch(cls, items: Optional[Dict] = None, default=None) -> DispatchTable:
+    """Dispatch table for a visitor class, optionally with extra item handlers, and a handler for any other item"""
+    handlers = {}
+    containers = {}
+    for name in dir(cls):
+        if name.startswith("vic_"):
+            containers[sys.intern(name[4:])] = getattr(cls, name)
+        elif name.startswith("vi_"):
+            handlers[sys.intern(name[3:])] = getattr(cls, name)
+    if items is not None:
+        handlers.update({sys.intern(k): v for k, v in items.items()})
+    return DispatchTable(handlers, containers, default)
+
+
+def _dispatch_factory(cls):
+    # visitors that only know their handlers once constructed can supply their own table
+    if hasattr(cls, "handlers"):
+        return cls.handlers
+    if hasattr(cls, "__getattr__"):
+        return lambda visitor: DispatchTable(_DynamicHandlers(visitor, "vi_"), _DynamicHandlers(visitor, "vic_"))
+    table = compile_dispatch(cls)
+    return lambda visitor: table
+
+
+_dispatch_factories = {}
+
+
+def dispatch_table(visitor) -> DispatchTable:
+    cls = type(visitor)
+    factory = _dispatch_factories.get(cls)
+    if factory is None:
+        factory = _dispatch_factories[cls] = _dispatch_factory(cls)
+    return factory(visitor)
+
+
+_type_chars = [chr(c) for c in range(256)]
+
+_fourccs = {}
+
+
+def _fourcc_of(raw: bytes) -> str:
+    """FourCC strings are interned, so every item of a type shares one key"""
+    fourcc = _fourccs.get(raw)
+    if fourcc is None:
+        fourcc = _fourccs.setdefault(raw, sys.intern(raw.decode()))
+    return fourcc
+
+
+def _check_length(fourcc: str, offset: int, end: int, limit: int):
+    """A KLV must fit inside its container, or the data is corrupt (or truncated)"""
+    if end > limit:
+        raise ValueError(f"GPMF {fourcc} at offset {offset} ends at {end}, past the end of its container at {limit}")
+
+
 class GPMDParser:
+    """
+    Parses a GPMF track into GPMDContainer/GPMDItem nodes.
 
-    def __init__(self, data: bytes):
-        self.data = data
+    The data is wrapped in a memoryview and walked using offsets, so neither containers nor
+    items copy any of it - each item's rawdata is a view onto the original buffer.
+    """
+
+    def __init__(self, data):
+        self.data = memoryview(data).cast("B")
 
     def items(self):
         offset = 0
@@ -345,27 +622,24 @@ class GPMDParser:
             yield item
             offset += item.bytecount
 
-    def from_bytes(self, data: bytes, offset: int):
-        fourcc, type_char_code, size, repeat = GPMDStruct.unpack_from(data, offset=offset)
-        fourcc = fourcc.decode()
-        length = size * repeat
-        padded_length = GPMDParser.extend(length)
+    def from_bytes(self, data: memoryview, offset: int, limit: Optional[int] = None):
+        fourcc, type_char_code, size, repeat = GPMDStruct.unpack_from(data, offset)
+        fourcc = _fourcc_of(fourcc)
+        padded_length = GPMDParser.extend(size * repeat)
 
-        if type_char_code != 0 and padded_length >= 0:
-            s = struct.Struct('>' + str(padded_length) + 's')
-            rawdata, = s.unpack_from(data, offset=offset + 8)
+        start = offset + GPMDStruct.size
+        end = start + padded_length
+        _check_length(fourcc, offset, end, len(data) if limit is None else limit)
 
-            return GPMDItem(fourcc, type_char_code, size, repeat, padded_length, rawdata)
+        if type_char_code != 0:
+            return GPMDItem(fourcc, type_char_code, size, repeat, padded_length, data[start:end])
         else:
-            offset += GPMDStruct.size
-            child_data = data[offset:padded_length + offset]
-
             children = []
 
-            child_offset = 0
+            child_offset = start
 
-            while child_offset < len(child_data):
-                child = self.from_bytes(child_data, child_offset)
+            while child_offset < end:
+                child = self.from_bytes(data, child_offset, end)
                 children.append(child)
                 child_offset += child.bytecount
 
@@ -373,7 +647,172 @@ class GPMDParser:
 
     @staticmethod
     def extend(n, base=4):
-        i = n
-        while i % base != 0:
-            i += 1
-        return i
+        return -(-n // base) * base
+
+
+class GPMDIndexEntry(NamedTuple):
+    """
+    Header of a single KLV. devc is the number of the top level DEVC it is in, strm the number
+    of the STRM within that DEVC (-1 for items directly in the DEVC), offset is where the header starts.
+    """
+    devc: int
+    strm: int
+    fourcc: str
+    type_char_code: int
+    offset: int
+    size: int
+    repeat: int
+
+    @property
+    def is_container(self):
+        return self.type_char_code == 0
+
+    @property
+    def padded_length(self):
+        return GPMDParser.extend(self.size * self.repeat)
+
+    @property
+    def bytecount(self):
+        return GPMDStruct.size + self.padded_length
+
+
+class GPMDIndex:
+    """
+    A flat index of every KLV in a GPMF track, built by reading headers only - no payloads are decoded.
+
+    children maps the offset of each container (None for the top level) to the entries directly in it,
+    and contents maps it to the set of their FourCCs, which is what visitors use to choose streams.
+    """
+
+    def __init__(self, data):
+        self.data = memoryview(data).cast("B")
+        self.entries: List[GPMDIndexEntry] = []
+        self.children: Dict[Optional[int], List[GPMDIndexEntry]] = {}
+        self.contents: Dict[Optional[int], frozenset] = {}
+        self.by_fourcc: Dict[str, List[GPMDIndexEntry]] = {}
+
+        self._index(None, 0, len(self.data), depth=0, devc=-1, strm=-1)
+
+    def _index(self, parent: Optional[int], start: int, end: int, depth: int, devc: int, strm: int):
+        data = self.data
+        children = []
+        streams = 0
+
+        offset = start
+        while offset < end:
+            fourcc, type_char_code, size, repeat = GPMDStruct.unpack_from(data, offset)
+
+            if depth == 0:
+                devc += 1
+            elif depth == 1:
+                strm = streams if type_char_code == 0 else -1
+                streams += 1 if type_char_code == 0 else 0
+
+            entry = GPMDIndexEntry(devc, strm, _fourcc_of(fourcc), type_char_code, offset, size, repeat)
+            _check_length(entry.fourcc, offset, offset + entry.bytecount, end)
+            self.entries.append(entry)
+            self.by_fourcc.setdefault(entry.fourcc, []).append(entry)
+            children.append(entry)
+
+            if type_char_code == 0:
+                child_start = offset + GPMDStruct.size
+                self._index(offset, child_start, child_start + entry.padded_length, depth + 1, devc, strm)
+
+            offset += entry.bytecount
+
+        self.children[parent] = children
+        self.contents[parent] = frozenset(e.fourcc for e in children)
+
+    def with_type(self, fourcc: str) -> List[GPMDIndexEntry]:
+        return self.by_fourcc.get(fourcc, [])
+
+    def has(self, fourcc: str) -> bool:
+        return fourcc in self.by_fourcc
+
+    def item(self, entry: GPMDIndexEntry) -> 'GPMDItem':
+        start = entry.offset + GPMDStruct.size
+        return GPMDItem(
+            entry.fourcc, entry.type_char_code, entry.size, entry.repeat, entry.padded_length,
+            self.data[start:start + entry.padded_length]
+        )
+
+    def node(self, entry: GPMDIndexEntry, wanted: Optional[frozenset] = None):
+        if entry.is_container:
+            return LazyGPMDContainer(self, entry, wanted)
+        return self.item(entry)
+
+
+class LazyGPMDContainer(GPMDContainer):
+    """A container whose items are only created when something asks for them"""
+    __slots__ = ("_index", "_entry", "_wanted")
+
+    def __init__(self, index: GPMDIndex, entry: GPMDIndexEntry, wanted: Optional[frozenset]):
+        super().__init__(entry.fourcc, entry.size, entry.repeat, entry.padded_length, None)
+        self._index = index
+        self._entry = entry
+        self._wanted = wanted
+
+    def _selected(self, entry: GPMDIndexEntry) -> bool:
+        if self._wanted is None or not entry.is_container:
+            return True
+        return not self._wanted.isdisjoint(self._index.contents[entry.offset])
+
+    @property
+    def items(self):
+        if self._items is None:
+            self._items = [
+                self._index.node(e, self._wanted) for e in self._index.children[self._entry.offset] if self._selected(e)
+            ]
+        return self._items
+
+    @property
+    def itemset(self):
+        if self._wanted is None:
+            return set(self._index.contents[self._entry.offset])
+        return set(e.fourcc for e in self._index.children[self._entry.offset] if self._selected(e))
+
+
+class GPMDStreamParser:
+    """
+    Parses a GPMF track as it arrives, a chunk at a time, e.g. from ffmpeg.
+
+    Each call to feed returns the top level nodes (DEVCs) that have been completed by the chunk,
+    so they can be demultiplexed while the rest of the track is still being read. Only the bytes of
+    an incomplete DEVC are kept back between chunks. Nodes are lazy, as GPMD.lazy()
+    """
+
+    def __init__(self, fourccs: Optional[Iterable[str]] = None):
+        self._wanted = frozenset(fourccs) if fourccs is not None else None
+        self._pending = bytearray()
+
+    def _nodes(self, data):
+        index = GPMDIndex(data)
+        return [index.node(entry, self._wanted) for entry in index.children[None]]
+
+    def feed(self, chunk) -> list:
+        pending = self._pending
+        pending += chunk
+
+        offset = 0
+        while len(pending) - offset >= GPMDStruct.size:
+            _, _, size, repeat = GPMDStruct.unpack_from(pending, offset)
+            end = offset + GPMDStruct.size + GPMDParser.extend(size * repeat)
+            if end > len(pending):
+                break
+            offset = end
+
+        if offset == 0:
+            return []
+
+        # one copy out of the buffer - slicing the bytearray first would make two
+        complete = bytes(memoryview(pending)[:offset])
+        del pending[:offset]
+        return self._nodes(complete)
+
+    def finish(self) -> list:
+        """Whatever is left over at the end. Anything left is a truncated DEVC, so this raises ValueError"""
+        if not self._pending:
+            return []
+        # nothing more will be added, so the nodes can be views on the buffer itself
+        remaining, self._pending = self._pending, bytearray()
+        return self._nodes(remaining)
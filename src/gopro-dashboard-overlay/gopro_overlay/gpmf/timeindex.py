@@ -0,0 +1,74 @@
+import bisect
+from typing import List, Optional
+
+from gopro_overlay.ffmpeg_gopro import DataStream
+from gopro_overlay.gpmf.calc import PayloadMaths
+from gopro_overlay.gpmf.demux import Demux
+from gopro_overlay.timeunits import Timeunit, timeunits
+
+
+class DEVCTimeIndex:
+    """
+    The time span of each DEVC in a GPMF track, relative to the start of the video.
+
+    Spans come from the STMP of the streams in each DEVC, the same way CoriTimestampPacketTimeCalculator
+    times samples, or otherwise from the position of the DEVC in the data track (each DEVC is one payload).
+    Only STMP items are decoded to build it, so it is cheap to find which DEVCs cover part of a long recording.
+    """
+
+    def __init__(self, starts: List[int], ends: List[int]):
+        if len(starts) != len(ends):
+            raise ValueError(f"Have {len(starts)} starts, but {len(ends)} ends")
+        self._starts = starts
+        self._ends = ends
+
+    def __len__(self):
+        return len(self._starts)
+
+    @property
+    def start(self) -> Timeunit:
+        """Start of the first DEVC"""
+        return timeunits(micros=self._starts[0])
+
+    @property
+    def end(self) -> Timeunit:
+        """End of the last DEVC - the duration of the whole track"""
+        return timeunits(micros=self._ends[-1])
+
+    def span(self, devc: int):
+        return timeunits(micros=self._starts[devc]), timeunits(micros=self._ends[devc])
+
+    def devcs_between(self, start: Optional[Timeunit] = None, end: Optional[Timeunit] = None, pad: int = 1) -> range:
+        """
+        The DEVCs whose spans overlap [start, end], plus pad DEVCs either side, as samples are
+        not always exactly where the index says they are.
+        """
+        first = 0 if start is None else bisect.bisect_right(self._ends, start.us)
+        last = len(self) if end is None else bisect.bisect_right(self._starts, end.us)
+        return range(max(0, first - pad), min(len(self), last + pad))
+
+    @staticmethod
+    def from_demux(demux: Demux, datastream: Optional[DataStream] = None) -> 'DEVCTimeIndex':
+        count = 1 + max((p.devc for packets in demux.packets.values() for p in packets), default=-1)
+
+        first_shut = demux.first_shut_timestamp
+        if first_shut is not None:
+            stamps = {}
+            for packets in demux.packets.values():
+                for packet in packets:
+                    timestamp = packet.timestamp
+                    if timestamp is not None:
+                        stamps[packet.devc] = min(stamps.get(packet.devc, timestamp.us), timestamp.us)
+
+            if len(stamps) == count:
+                starts = [stamps[devc] - first_shut.us for devc in range(count)]
+                ends = starts[1:] + [starts[-1] + timeunits(millis=1001).us] if starts else []
+                return DEVCTimeIndex(starts, ends)
+
+        if datastream is None:
+            raise ValueError("Need a datastream to index GPMF without timestamps")
+
+        maths = PayloadMaths(datastream)
+        ends = [timeunits(seconds=maths.time_of_out_packet(devc)).us for devc in range(count)]
+        starts = [0] + ends[:-1] if ends else []
+        return DEVCTimeIndex(starts, ends)
@@ -1,31 +1,23 @@
 import dataclasses
 import datetime
-from typing import List, Optional
-
-from pint import Quantity
+from typing import Optional
 
 from gopro_overlay.entry import Entry
 from gopro_overlay.gpmf.calc import PacketTimeCalculator
+from gopro_overlay.gpmf.demux import StreamPacket
 
-from gopro_overlay.gpmf import QUATERNION
-from gopro_overlay.point import EulerRadians, Quaternion, Point3
+from gopro_overlay.gpmf import Samples
+from gopro_overlay.point import EulerRadians, Orientation, Quaternion, Point3
 from gopro_overlay.timeunits import Timeunit
 
 
 @dataclasses.dataclass(frozen=True)
 class CORIComponents:
-    orientations: List[QUATERNION]
+    orientations: Samples
     timestamp: Timeunit
     samples: int
 
 
-@dataclasses.dataclass(frozen=True)
-class Orientation:
-    roll: Quantity
-    pitch: Quantity
-    yaw: Quantity
-
-
 def euler_to_orientation(e: EulerRadians, units) -> Orientation:
     radians = units.radians
     return Orientation(
@@ -35,6 +27,10 @@ def euler_to_orientation(e: EulerRadians, units) -> Orientation:
     )
 
 
+def cori_components(packet: StreamPacket) -> CORIComponents:
+    return CORIComponents(packet.item.interpret(packet.scale), packet.timestamp, packet.samples_total)
+
+
 class CORIComponentConverter:
 
     def __init__(self, frame_calculator: PacketTimeCalculator, units, on_item):
@@ -43,35 +39,39 @@ class CORIComponentConverter:
         self._on_item = on_item
         self._total_samples = 0
 
+    def skip(self, timestamp, samples: int):
+        self._total_samples = self._frame_calculator.skip(timestamp, self._total_samples, samples)
+
     def convert(self, counter: int, components: CORIComponents):
 
         if len(components.orientations) == 0:
             return
 
-        sample_time_calculator = self._frame_calculator.next_packet(
+        frame_us, _ = self._frame_calculator.next_packet_us(
             components.timestamp,
             self._total_samples,
             len(components.orientations)
         )
 
-        for index, cori in enumerate(components.orientations):
-            sample_frame_timestamp, _ = sample_time_calculator(index)
+        # QUATERNION fields are w, x, z, y
+        for index, (us, (w, x, z, y)) in enumerate(zip(frame_us.tolist(), components.orientations.array.tolist())):
+            sample_frame_timestamp = Timeunit(us)
 
             point_datetime = datetime.datetime.fromtimestamp(sample_frame_timestamp.millis() / 1000,
                                                              tz=datetime.timezone.utc)
 
             quat = Quaternion(
-                w=cori.w,
-                v=Point3(x=cori.x, y=cori.y, z=cori.z)
+                w=w,
+                v=Point3(x=x, y=y, z=z)
             )
 
             self._on_item(
                 sample_frame_timestamp,
-                Entry(
+                Entry.with_units(
                     dt=point_datetime,
-                    timestamp=self._units.Quantity(sample_frame_timestamp.millis(), self._units.number),
-                    packet=self._units.Quantity(counter, self._units.number),
-                    packet_index=self._units.Quantity(index, self._units.number),
+                    timestamp=sample_frame_timestamp.millis(),
+                    packet=counter,
+                    packet_index=index,
                     cori=quat,
                     ori=euler_to_orientation(
                         e=quat.euler(),
@@ -87,7 +87,7 @@ class CORIStreamVisitor:
     def __init__(self, on_end):
         self.on_end = on_end
         self._scale: Optional[int] = None
-        self._cori: Optional[List[QUATERNION]] = None
+        self._cori: Optional[Samples] = None
         self._timestamp: Optional[Timeunit] = None
         self._samples_total: Optional[int] = None
 
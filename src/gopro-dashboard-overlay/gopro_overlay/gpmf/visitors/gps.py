@@ -1,11 +1,12 @@
 import dataclasses
 import datetime
-from typing import List, Optional
+from typing import Optional
 
 from gopro_overlay.entry import Entry
 from gopro_overlay.gpmf.calc import PacketTimeCalculator
+from gopro_overlay.gpmf.demux import StreamPacket
 from gopro_overlay.gpmd_filters import NullGPSLockFilter, GPSLockComponents
-from gopro_overlay.gpmf import GPSFix, GPS5, interpret_item, GPS9, GPS_FIXED
+from gopro_overlay.gpmf import GPSFix, GPS5, interpret_item, GPS_FIXED, Samples
 from gopro_overlay.log import log
 from gopro_overlay.point import Point
 from gopro_overlay.timeunits import Timeunit
@@ -19,7 +20,7 @@ class GPS5Components:
     fix: GPSFix
     dop: float
     scale: int
-    points: List[GPS5]
+    points: Samples
 
 
 class GPS5EntryConverter:
@@ -32,6 +33,9 @@ class GPS5EntryConverter:
         self._tracker = gps_lock_filter
         self._short_packet_count = 0
 
+    def skip(self, timestamp, samples: int):
+        self._total_samples = self._frame_calculator.skip(timestamp, self._total_samples, samples)
+
     def convert(self, counter, components: GPS5Components):
 
         # Turns out GPS5 can contain no points. Possibly accompanied by EMPT packet?
@@ -47,7 +51,7 @@ class GPS5EntryConverter:
                 log(f"Have seen {self._short_packet_count} suspicious GPS packets. Last was {point_count}/18. GPS is misbehaving? - See https://github.com/time4tea/gopro-dashboard-overlay/issues/141")
 
 
-        sample_time_calculator = self._frame_calculator.next_packet(
+        frame_us, offset_us = self._frame_calculator.next_packet_us(
             components.timestamp,
             self._total_samples,
             point_count
@@ -55,31 +59,31 @@ class GPS5EntryConverter:
 
         gpsfix = components.fix
 
-        for index, point in enumerate(components.points):
-            sample_frame_timestamp, sample_time_offset = sample_time_calculator(index)
+        rows = zip(frame_us.tolist(), offset_us.tolist(), components.points.array.tolist())
+        for index, (us, offset, (lat, lon, alt, speed, _)) in enumerate(rows):
+            sample_frame_timestamp = Timeunit(us)
 
-            position = Point(point.lat, point.lon)
-            speed = self._units.Quantity(point.speed, self._units.mps)
+            position = Point(lat, lon)
 
-            calculated_fix = self._tracker.submit(GPSLockComponents(gpsfix, position, speed.magnitude, components.dop))
+            calculated_fix = self._tracker.submit(GPSLockComponents(gpsfix, position, speed, components.dop))
 
             point_datetime = components.basetime + datetime.timedelta(
-                microseconds=sample_time_offset.us
+                microseconds=offset
             )
             self._on_item(
                 sample_frame_timestamp,
-                Entry(
+                Entry.with_units(
                     dt=point_datetime,
-                    timestamp=self._units.Quantity(sample_frame_timestamp.millis(), self._units.number),
-                    dop=self._units.Quantity(components.dop, self._units.number),
-                    packet=self._units.Quantity(counter, self._units.number),
-                    packet_count=self._units.Quantity(point_count),
-                    packet_index=self._units.Quantity(index, self._units.number),
+                    timestamp=sample_frame_timestamp.millis(),
+                    dop=components.dop,
+                    packet=counter,
+                    packet_count=point_count,
+                    packet_index=index,
                     point=position,
                     speed=speed,
-                    alt=self._units.Quantity(point.alt, self._units.m),
+                    alt=alt,
                     gpsfix=calculated_fix.value,
-                    gpslock=self._units.Quantity(calculated_fix.value),
+                    gpslock=calculated_fix.value,
                 )
             )
         self._total_samples += point_count
@@ -93,7 +97,7 @@ class GPS5StreamVisitor:
         self._basetime: Optional[datetime.datetime] = None
         self._fix: Optional[GPSFix] = None
         self._scale: Optional[int] = None
-        self._points: Optional[List[GPS5]] = None
+        self._points: Optional[Samples] = None
         self._timestamp: Optional[Timeunit] = None
         self._dop: Optional[float] = None
 
@@ -133,6 +137,24 @@ class GPS5StreamVisitor:
             log(f"No GPS Date :- Skipping Record with {len(self._points)} samples")
 
 
+def gps5_components(packet: StreamPacket) -> Optional[GPS5Components]:
+    basetime = packet.get("GPSU")
+    if basetime is None:
+        log(f"No GPS Date :- Skipping Record with {packet.samples} samples")
+        return None
+
+    scale = packet.scale
+    return GPS5Components(
+        samples=packet.samples_total,
+        timestamp=packet.timestamp,
+        basetime=basetime,
+        fix=packet.get("GPSF"),
+        dop=packet.get("GPSP"),
+        scale=scale,
+        points=interpret_item(packet.item, scale=scale)
+    )
+
+
 class GPS5Visitor:
 
     def __init__(self, converter):
@@ -158,7 +180,7 @@ class GPS9Components:
     samples: int
     timestamp: Timeunit
     scale: int
-    points: List[GPS9]
+    points: Samples
 
 
 gps9_date_base = datetime.datetime.fromisoformat("2000-01-01T00:00:00+00:00")
@@ -173,45 +195,48 @@ class GPS9EntryConverter:
         self._frame_calculator = calculator
         self._tracker = gps_lock_filter
 
+    def skip(self, timestamp, samples: int):
+        self._total_samples = self._frame_calculator.skip(timestamp, self._total_samples, samples)
+
     def convert(self, counter, components: GPS9Components):
 
         # Turns out GPS9 can contain no points. Possibly accompanied by EMPT packet?
         if len(components.points) == 0:
             return
 
-        sample_time_calculator = self._frame_calculator.next_packet(
+        frame_us, _ = self._frame_calculator.next_packet_us(
             components.timestamp,
             self._total_samples,
             len(components.points)
         )
 
-        for (index, point) in enumerate(components.points):
-            sample_frame_timestamp, _ = sample_time_calculator(index)
+        rows = zip(frame_us.tolist(), components.points.array.tolist())
+        for index, (us, (lat, lon, alt, speed, _, days, secs, dop, fix)) in enumerate(rows):
+            sample_frame_timestamp = Timeunit(us)
 
-            position = Point(point.lat, point.lon)
-            speed = self._units.Quantity(point.speed, self._units.mps)
+            position = Point(lat, lon)
 
-            fix = GPSFix(point.fix)
-            calculated_fix = self._tracker.submit(GPSLockComponents(fix, position, speed.magnitude, point.dop))
+            fix = GPSFix(int(fix))
+            calculated_fix = self._tracker.submit(GPSLockComponents(fix, position, speed, dop))
 
             point_datetime = gps9_date_base + datetime.timedelta(
-                days=point.days,
-                seconds=point.secs
+                days=days,
+                seconds=secs
             )
 
             self._on_item(
                 sample_frame_timestamp,
-                Entry(
+                Entry.with_units(
                     dt=point_datetime,
-                    timestamp=self._units.Quantity(sample_frame_timestamp.millis(), self._units.number),
-                    dop=self._units.Quantity(point.dop, self._units.number),
-                    packet=self._units.Quantity(counter, self._units.number),
-                    packet_index=self._units.Quantity(index, self._units.number),
+                    timestamp=sample_frame_timestamp.millis(),
+                    dop=dop,
+                    packet=counter,
+                    packet_index=index,
                     point=position,
                     speed=speed,
-                    alt=self._units.Quantity(point.alt, self._units.m),
+                    alt=alt,
                     gpsfix=calculated_fix.value,
-                    gpslock=self._units.Quantity(calculated_fix.value),
+                    gpslock=calculated_fix.value,
                 )
             )
         self._total_samples += len(components.points)
@@ -223,7 +248,7 @@ class GPS9StreamVisitor:
         self._on_end = on_end
         self._samples: Optional[int] = None
         self._scale: Optional[int] = None
-        self._points: Optional[List[GPS9]] = None
+        self._points: Optional[Samples] = None
         self._timestamp: Optional[Timeunit] = None
 
     def vi_STMP(self, item):
@@ -250,6 +275,16 @@ class GPS9StreamVisitor:
         ))
 
 
+def gps9_components(packet: StreamPacket) -> GPS9Components:
+    scale = packet.scale
+    return GPS9Components(
+        samples=packet.samples_total,
+        timestamp=packet.timestamp,
+        scale=scale,
+        points=interpret_item(packet.item, scale=scale, types=packet.types)
+    )
+
+
 class GPS9Visitor:
 
     def __init__(self, converter):
@@ -1,19 +1,23 @@
 import dataclasses
 import datetime
-from typing import List
-
 from gopro_overlay.entry import Entry
-from gopro_overlay.gpmf import VECTOR
+from gopro_overlay.gpmf import Samples
+from gopro_overlay.gpmf.demux import StreamPacket
 from gopro_overlay.point import PintPoint3
+from gopro_overlay.timeunits import Timeunit
 
 
 @dataclasses.dataclass(frozen=True)
 class GRAVComponents:
-    vectors: List[VECTOR]
+    vectors: Samples
     timestamp: int
     samples: int
 
 
+def grav_components(packet: StreamPacket) -> GRAVComponents:
+    return GRAVComponents(packet.item.interpret(packet.scale), packet.timestamp, packet.samples_total)
+
+
 class GRAVComponentConverter:
 
     def __init__(self, frame_calculator, units, on_item):
@@ -22,12 +26,15 @@ class GRAVComponentConverter:
         self._on_item = on_item
         self._total_samples = 0
 
+    def skip(self, timestamp, samples: int):
+        self._total_samples = self._frame_calculator.skip(timestamp, self._total_samples, samples)
+
     def convert(self, counter: int, components: GRAVComponents):
 
         if len(components.vectors) == 0:
             return
 
-        sample_time_calculator = self._frame_calculator.next_packet(
+        frame_us, _ = self._frame_calculator.next_packet_us(
             components.timestamp,
             self._total_samples,
             len(components.vectors)
@@ -35,22 +42,22 @@ class GRAVComponentConverter:
 
         unit = self._units.number
 
-        for index, vector in enumerate(components.vectors):
-            sample_frame_timestamp, _ = sample_time_calculator(index)
+        for index, (us, (a, b, c)) in enumerate(zip(frame_us.tolist(), components.vectors.array.tolist())):
+            sample_frame_timestamp = Timeunit(us)
 
             point_datetime = datetime.datetime.fromtimestamp(sample_frame_timestamp.millis() / 1000,
                                                              datetime.timezone.utc)
 
-            grav_vector = PintPoint3(x=self._units.Quantity(vector.a, unit), y=self._units.Quantity(-vector.c, unit),
-                                     z=self._units.Quantity(-vector.b, unit))
+            grav_vector = PintPoint3(x=self._units.Quantity(a, unit), y=self._units.Quantity(-c, unit),
+                                     z=self._units.Quantity(-b, unit))
 
             self._on_item(
                 sample_frame_timestamp,
-                Entry(
+                Entry.with_units(
                     dt=point_datetime,
-                    timestamp=self._units.Quantity(sample_frame_timestamp.millis(), self._units.number),
-                    packet=self._units.Quantity(counter, self._units.number),
-                    packet_index=self._units.Quantity(index, self._units.number),
+                    timestamp=sample_frame_timestamp.millis(),
+                    packet=counter,
+                    packet_index=index,
                     grav=grav_vector,
                 )
             )
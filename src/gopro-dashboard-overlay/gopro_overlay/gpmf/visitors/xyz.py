@@ -1,31 +1,43 @@
 import dataclasses
 import datetime
-from typing import List
 
+import numpy as np
 from gopro_overlay.entry import Entry
-from gopro_overlay.gpmf import XYZ
+from gopro_overlay.gpmf import XYZ, Samples
+from gopro_overlay.gpmf.demux import StreamPacket
 from gopro_overlay.point import PintPoint3
+from gopro_overlay.timeunits import Timeunit
 
 
 class ORIN:
 
     def __init__(self, conversion):
+        # for each of the output x, y, z - which input column it comes from, and its sign
         if conversion == "ZXY":
             self.convert = lambda xyz: XYZ(x=xyz.y, y=xyz.z, z=xyz.x)
+            self._columns, self._signs = [1, 2, 0], [1, 1, 1]
         elif conversion == "YxZ":
             self.convert = lambda xyz: XYZ(x=-xyz.y, y=xyz.x, z=xyz.z)
+            self._columns, self._signs = [1, 0, 2], [-1, 1, 1]
         elif conversion == "yXZ":
             self.convert = lambda xyz: XYZ(x=xyz.y, y=-xyz.x, z=xyz.z)
+            self._columns, self._signs = [1, 0, 2], [1, -1, 1]
         elif conversion == "zxY":
             self.convert = lambda xyz: XYZ(x=-xyz.y, y=xyz.z, z=-xyz.x)
+            self._columns, self._signs = [1, 2, 0], [-1, 1, -1]
         elif conversion == "XzY":
             self.convert = lambda xyz: XYZ(x=xyz.x, y=xyz.z, z=-xyz.y)
+            self._columns, self._signs = [0, 2, 1], [1, 1, -1]
         else:
             raise IOError(f"Unhandled ORIN spec: {conversion}")
 
     def apply(self, xyz):
         return self.convert(xyz)
 
+    def apply_array(self, xyz: np.ndarray) -> np.ndarray:
+        """Reorient an (n, 3) array of samples"""
+        return xyz[:, self._columns] * self._signs
+
 
 @dataclasses.dataclass(frozen=True)
 class XYZComponents:
@@ -35,7 +47,7 @@ class XYZComponents:
     orin: ORIN
     siun: str
     temp: int
-    points: List[XYZ]
+    points: Samples
 
 
 class XYZStreamVisitor:
@@ -91,20 +103,46 @@ class XYZStreamVisitor:
         )
 
 
+def xyz_components(packet: StreamPacket) -> XYZComponents:
+    orin = packet.orin
+    scale = packet.scale
+    return XYZComponents(
+        timestamp=packet.timestamp,
+        samples_total=packet.samples_total,
+        scale=scale,
+        orin=ORIN(orin) if orin is not None else ORIN("ZXY"),
+        siun=packet.siun,
+        temp=packet.temperature,
+        points=packet.item.interpret(scale),
+    )
+
+
+def xyz_counter(packet: StreamPacket) -> int:
+    """The packet number XYZVisitor gives - it counts both the start and the end of each DEVC"""
+    return packet.devc * 2 + 1
+
+
 units_acceleration = "m/s²"
 
 
 class XYZComponentConverter:
 
-    def __init__(self, frame_calculator, units, on_item):
+    def __init__(self, frame_calculator, units, on_item, decimation: int = 10):
+        if decimation < 1:
+            raise ValueError(f"Decimation must be at least 1, not {decimation}")
         self._on_item = on_item
         self._frame_calculator = frame_calculator
         self._units = units
+        self._decimation = decimation
         self._total_samples = 0
 
-    # This only converts 1 in 10 of the XYZ Items - they run at 200Hz, and that's too much for our needs.
+    def skip(self, timestamp, samples: int):
+        self._total_samples = self._frame_calculator.skip(timestamp, self._total_samples, samples)
+
+    # By default this only converts 1 in 10 of the XYZ Items - they run at 200Hz, and that's too much for our needs.
+    # There is no filtering here - see gopro_overlay.imu for full rate data, and filtered decimation
     def convert(self, counter, components):
-        sample_time_calculator = self._frame_calculator.next_packet(
+        frame_us, _ = self._frame_calculator.next_packet_us(
             components.timestamp,
             self._total_samples,
             len(components.points)
@@ -115,26 +153,26 @@ class XYZComponentConverter:
         else:
             raise IOError(f"Unsupported units {components.siun}")
 
-        for index, point in enumerate(components.points):
-            if index % 10 != 0:
-                continue
-            sample_frame_timestamp, _ = sample_time_calculator(index)
+        step = self._decimation
+        oriented = components.orin.apply_array(components.points.array[::step])
+
+        for index, us, (x, y, z) in zip(range(0, len(components.points), step), frame_us[::step].tolist(), oriented.tolist()):
+            sample_frame_timestamp = Timeunit(us)
 
             point_datetime = datetime.datetime.fromtimestamp(sample_frame_timestamp.millis() / 1000,
                                                              tz=datetime.timezone.utc)
 
-            correct_orientation = components.orin.apply(point)
             self._on_item(
                 sample_frame_timestamp,
-                Entry(
+                Entry.with_units(
                     dt=point_datetime,
-                    timestamp=self._units.Quantity(sample_frame_timestamp.millis(), self._units.number),
-                    packet=self._units.Quantity(counter, self._units.number),
-                    packet_index=self._units.Quantity(index, self._units.number),
+                    timestamp=sample_frame_timestamp.millis(),
+                    packet=counter,
+                    packet_index=index,
                     accl=PintPoint3(
-                        x=self._units.Quantity(correct_orientation.x, unit),
-                        y=self._units.Quantity(correct_orientation.y, unit),
-                        z=self._units.Quantity(correct_orientation.z, unit),
+                        x=self._units.Quantity(x, unit),
+                        y=self._units.Quantity(y, unit),
+                        z=self._units.Quantity(z, unit),
                     )
                 )
             )
@@ -0,0 +1,162 @@
+import dataclasses
+import datetime
+from typing import Optional, Container
+
+import numpy as np
+
+from gopro_overlay.entry import Entry
+from gopro_overlay.gpmf.calc import PacketTimeCalculator
+from gopro_overlay.gpmf.demux import Demux
+from gopro_overlay.gpmf.visitors.xyz import xyz_components, xyz_counter, units_acceleration
+from gopro_overlay.point import PintPoint3
+from gopro_overlay.timeunits import Timeunit
+
+
+@dataclasses.dataclass(frozen=True)
+class IMUColumns:
+    """
+    Every sample of an IMU stream (ACCL/GYRO), as arrays rather than one Entry per sample.
+    time_us is the frame time of each sample in microseconds, xyz the oriented x, y, z values,
+    packet and packet_index where each sample came from (as the packet/packet_index of an Entry)
+    """
+    fourcc: str
+    unit: str
+    time_us: np.ndarray
+    xyz: np.ndarray
+    packet: np.ndarray
+    packet_index: np.ndarray
+
+    def __len__(self):
+        return len(self.time_us)
+
+    @property
+    def rate(self) -> float:
+        """Mean sample rate, in Hz"""
+        if len(self) < 2:
+            return 0.0
+        return (len(self) - 1) / ((self.time_us[-1] - self.time_us[0]) / 1_000_000)
+
+    def decimate(self, factor: int, low_pass: Optional[str] = "fir", **kwargs) -> 'IMUColumns':
+        """
+        Keep 1 in factor samples. Unless low_pass is None, the data is first low pass filtered below the new
+        Nyquist frequency, so vibration above it doesn't alias into the result.
+        low_pass is "fir" (numpy only) or "iir" (needs scipy), kwargs are passed to the filter.
+        """
+        if factor < 1:
+            raise ValueError(f"Decimation factor must be at least 1, not {factor}")
+
+        xyz = self.xyz
+        if factor > 1 and low_pass is not None:
+            cutoff = 0.5 / factor
+            if low_pass == "fir":
+                xyz = fir_lowpass(xyz, cutoff, **kwargs)
+            elif low_pass == "iir":
+                xyz = iir_lowpass(xyz, cutoff, **kwargs)
+            else:
+                raise ValueError(f"Unknown filter {low_pass} - use fir, iir or None")
+
+        return IMUColumns(
+            self.fourcc, self.unit,
+            self.time_us[::factor], xyz[::factor], self.packet[::factor], self.packet_index[::factor]
+        )
+
+
+def lowpass_taps(cutoff: float, numtaps: int = 63) -> np.ndarray:
+    """
+    Windowed sinc low pass FIR filter. cutoff is a fraction of the sample rate (0 < cutoff < 0.5).
+    The taps sum to 1, so the filter has unity gain at DC
+    """
+    if not 0 < cutoff < 0.5:
+        raise ValueError(f"Cutoff must be between 0 and 0.5 of the sample rate, not {cutoff}")
+    n = np.arange(numtaps) - (numtaps - 1) / 2
+    taps = np.sinc(2 * cutoff * n) * np.hamming(numtaps)
+    return taps / taps.sum()
+
+
+def fir_lowpass(xyz: np.ndarray, cutoff: float, numtaps: int = 63) -> np.ndarray:
+    """
+    Filter each column of an (n, k) array. The filter is symmetric and applied centred, so there is
+    no phase delay. Ends are padded with the edge values, rather than zeros, so they don't droop.
+    """
+    taps = lowpass_taps(cutoff, numtaps)
+    half = numtaps // 2
+    padded = np.pad(xyz, ((half, half), (0, 0)), mode="edge")
+    return np.column_stack([
+        np.convolve(padded[:, column], taps, mode="valid") for column in range(xyz.shape[1])
+    ])
+
+
+def iir_lowpass(xyz: np.ndarray, cutoff: float, order: int = 4) -> np.ndarray:
+    """Butterworth low pass, run forwards and backwards so there is no phase delay"""
+    try:
+        from scipy import signal
+    except ModuleNotFoundError:
+        raise IOError("IIR filtering needs scipy to be installed - use the FIR filter instead") from None
+
+    sos = signal.butter(order, cutoff * 2, output="sos")
+    return signal.sosfiltfilt(sos, xyz, axis=0)
+
+
+def imu_columns(demux: Demux, calculator: PacketTimeCalculator, fourcc: str = "ACCL",
+                devcs: Optional[Container[int]] = None) -> IMUColumns:
+    """
+    All the samples of an IMU stream, at full rate, as IMUColumns.
+    If devcs is given, only packets in those DEVCs are decoded, as framemeta_gpmd.parse_gopro
+    """
+    times = []
+    values = []
+    packets = []
+    unit = None
+    total_samples = 0
+
+    for packet in demux.stream(fourcc):
+        if devcs is not None and packet.devc not in devcs:
+            total_samples = calculator.skip(packet.timestamp, total_samples, packet.samples)
+            continue
+
+        components = xyz_components(packet)
+        count = len(components.points)
+
+        frame_us, _ = calculator.next_packet_us(components.timestamp, total_samples, count)
+        total_samples += count
+
+        times.append(frame_us)
+        values.append(components.orin.apply_array(components.points.array))
+        packets.append(np.full(count, xyz_counter(packet), dtype=np.int64))
+        unit = unit if unit is not None else components.siun
+
+    if not times:
+        empty = np.empty(0, dtype=np.int64)
+        return IMUColumns(fourcc, unit, empty, np.empty((0, 3)), empty, empty)
+
+    return IMUColumns(
+        fourcc, unit,
+        np.concatenate(times), np.concatenate(values), np.concatenate(packets),
+        np.concatenate([np.arange(len(t), dtype=np.int64) for t in times])
+    )
+
+
+def accl_entries(columns: IMUColumns, units, on_item):
+    """Entries, as XYZComponentConverter makes them, for each sample of the columns"""
+    if columns.unit != units_acceleration:
+        raise IOError(f"Unsupported units {columns.unit}")
+    unit = "m/s^2"
+
+    rows = zip(columns.time_us.tolist(), columns.xyz.tolist(), columns.packet.tolist(), columns.packet_index.tolist())
+    for us, (x, y, z), counter, index in rows:
+        sample_frame_timestamp = Timeunit(us)
+
+        on_item(
+            sample_frame_timestamp,
+            Entry.with_units(
+                dt=datetime.datetime.fromtimestamp(sample_frame_timestamp.millis() / 1000, tz=datetime.timezone.utc),
+                timestamp=sample_frame_timestamp.millis(),
+                packet=counter,
+                packet_index=index,
+                accl=PintPoint3(
+                    x=units.Quantity(x, unit),
+                    y=units.Quantity(y, unit),
+                    z=units.Quantity(z, unit),
+                )
+            )
+        )
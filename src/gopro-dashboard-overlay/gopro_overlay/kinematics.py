@@ -0,0 +1,359 @@
+import dataclasses
+import itertools
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from geographiclib.geodesic import Geodesic
+
+from .entry import Entry
+from .framemeta import FrameMeta
+from .framemeta_columnar import ColumnarFrameMeta
+from .smoothing import Kalman
+from .units import units
+
+# WGS84, as geographiclib
+wgs84_a = 6378137.0
+wgs84_f = 1 / 298.257223563
+wgs84_b = (1 - wgs84_f) * wgs84_a
+mean_radius = 6371008.8
+
+def haversine(lat1, lon1, lat2, lon2) -> Tuple[np.ndarray, np.ndarray]:
+    """Great circle distance (m) and initial azimuth (degrees, -180 to 180) on a sphere - fast, but ~0.5% out"""
+    phi1, phi2 = np.radians(lat1), np.radians(lat2)
+    dphi = phi2 - phi1
+    dlam = np.radians(lon2 - lon1)
+
+    h = np.sin(dphi / 2) ** 2 + np.cos(phi1) * np.cos(phi2) * np.sin(dlam / 2) ** 2
+    dist = 2 * mean_radius * np.arcsin(np.sqrt(np.clip(h, 0, 1)))
+
+    azi = np.degrees(np.arctan2(
+        np.sin(dlam) * np.cos(phi2),
+        np.cos(phi1) * np.sin(phi2) - np.sin(phi1) * np.cos(phi2) * np.cos(dlam)
+    ))
+    return dist, azi
+
+
+def vincenty(lat1, lon1, lat2, lon2, iterations: int = 200) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Ellipsoidal distance (m) and initial azimuth (degrees, -180 to 180) on WGS84, by Vincenty's inverse method,
+    for whole arrays at once. Agrees with geographiclib to well under a mm. The few (near antipodal)
+    pairs that don't converge are done with geographiclib.
+    """
+    lat1, lon1, lat2, lon2 = np.broadcast_arrays(*[np.asarray(a, dtype=np.float64) for a in (lat1, lon1, lat2, lon2)])
+    shape = lat1.shape
+    lat1, lon1, lat2, lon2 = (a.ravel() for a in (lat1, lon1, lat2, lon2))
+
+    f = wgs84_f
+    big_l = np.radians((lon2 - lon1 + 180) % 360 - 180)
+    u1 = np.arctan((1 - f) * np.tan(np.radians(lat1)))
+    u2 = np.arctan((1 - f) * np.tan(np.radians(lat2)))
+    sin_u1, cos_u1 = np.sin(u1), np.cos(u1)
+    sin_u2, cos_u2 = np.sin(u2), np.cos(u2)
+
+    lam = big_l.copy()
+    converged = np.zeros(lam.shape, dtype=bool)
+    sin_sigma, cos_sigma, sigma, cos_sq_alpha, cos_2sigma_m = (np.full(lam.shape, np.nan) for _ in range(5))
+
+    # each pair stops iterating when it converges, so its result doesn't depend on what it is computed with
+    valid = np.isfinite(big_l) & np.isfinite(u1) & np.isfinite(u2)
+    active = np.nonzero(valid)[0]
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        for _ in range(iterations):
+            if not active.size:
+                break
+            s_u1, c_u1, s_u2, c_u2 = sin_u1[active], cos_u1[active], sin_u2[active], cos_u2[active]
+            s_lam, c_lam = np.sin(lam[active]), np.cos(lam[active])
+            s_sigma = np.hypot(c_u2 * s_lam, c_u1 * s_u2 - s_u1 * c_u2 * c_lam)
+            c_sigma = s_u1 * s_u2 + c_u1 * c_u2 * c_lam
+            sig = np.arctan2(s_sigma, c_sigma)
+            sin_alpha = np.where(s_sigma > 0, c_u1 * c_u2 * s_lam / s_sigma, 0.0)
+            c_sq_alpha = 1 - sin_alpha ** 2
+            c_2sigma_m = np.where(c_sq_alpha > 0, c_sigma - 2 * s_u1 * s_u2 / c_sq_alpha, 0.0)
+            c = f / 16 * c_sq_alpha * (4 + f * (4 - 3 * c_sq_alpha))
+
+            sin_sigma[active], cos_sigma[active], sigma[active] = s_sigma, c_sigma, sig
+            cos_sq_alpha[active], cos_2sigma_m[active] = c_sq_alpha, c_2sigma_m
+
+            previous = lam[active]
+            lam[active] = big_l[active] + (1 - c) * f * sin_alpha * (
+                    sig + c * s_sigma * (c_2sigma_m + c * c_sigma * (-1 + 2 * c_2sigma_m ** 2)))
+            done = np.abs(lam[active] - previous) < 1e-12
+            converged[active[done]] = True
+            active = active[~done]
+
+        u_sq = cos_sq_alpha * (wgs84_a ** 2 - wgs84_b ** 2) / wgs84_b ** 2
+        big_a = 1 + u_sq / 16384 * (4096 + u_sq * (-768 + u_sq * (320 - 175 * u_sq)))
+        big_b = u_sq / 1024 * (256 + u_sq * (-128 + u_sq * (74 - 47 * u_sq)))
+        delta_sigma = big_b * sin_sigma * (cos_2sigma_m + big_b / 4 * (
+                cos_sigma * (-1 + 2 * cos_2sigma_m ** 2)
+                - big_b / 6 * cos_2sigma_m * (-3 + 4 * sin_sigma ** 2) * (-3 + 4 * cos_2sigma_m ** 2)))
+
+        dist = wgs84_b * big_a * (sigma - delta_sigma)
+        # azimuth from the converged lambda - for short lines it is much more sensitive than distance
+        sin_lam, cos_lam = np.sin(lam), np.cos(lam)
+        azi = np.degrees(np.arctan2(cos_u2 * sin_lam, cos_u1 * sin_u2 - sin_u1 * cos_u2 * cos_lam))
+
+    # geographiclib's azimuth between a point and itself is 180 in the north, 0 in the south
+    same = (lat1 == lat2) & (big_l == 0)
+    dist = np.where(same, 0.0, dist)
+    azi = np.where(same, np.where(np.signbit(lat1), 0.0, 180.0), azi)
+
+    for index in np.nonzero(~converged & ~same & valid)[0].tolist():
+        (dist[index],), (azi[index],) = exact(lat1[index], lon1[index], lat2[index], lon2[index])
+
+    return dist.reshape(shape), azi.reshape(shape)
+
+
+def exact(lat1, lon1, lat2, lon2) -> Tuple[np.ndarray, np.ndarray]:
+    """Distance and azimuth from geographiclib, one pair at a time - as timeseries_process.distance_azi_between"""
+    pairs = np.broadcast_arrays(*[np.atleast_1d(np.asarray(a, dtype=np.float64)) for a in (lat1, lon1, lat2, lon2)])
+    dist = np.empty(pairs[0].shape)
+    azi = np.empty(pairs[0].shape)
+    for index, values in enumerate(zip(*[p.tolist() for p in pairs])):
+        inverse = Geodesic.WGS84.Inverse(*values)
+        dist[index], azi[index] = inverse["s12"], inverse["azi1"]
+    return dist, azi
+
+
+methods = {
+    "vincenty": vincenty,
+    "haversine": haversine,
+    "exact": exact,
+}
+
+
+def inverse(lat1, lon1, lat2, lon2, method: str = "vincenty") -> Tuple[np.ndarray, np.ndarray]:
+    """Distance (m) and initial azimuth (degrees) between arrays of points - method is one of 'methods'"""
+    if method not in methods:
+        raise ValueError(f"Unknown method {method} - use one of {list(methods.keys())}")
+    return methods[method](lat1, lon1, lat2, lon2)
+
+
+# the fields of a FrameMeta that a Track is made of
+track_fields = ("point", "alt", "speed", "dist", "gpsfix")
+
+
+def _magnitudes(columns: ColumnarFrameMeta, name: str, unit) -> np.ndarray:
+    column = columns.columns.get(name)
+    if column is None:
+        return np.full(len(columns), np.nan)
+    return column.magnitudes(unit).copy()
+
+
+@dataclasses.dataclass(frozen=True)
+class Track:
+    """
+    The track_fields of a FrameMeta, gathered once as a ColumnarFrameMeta of just those, and held as float arrays
+    in metres and m/s that kinematics can change as they go. Missing values are NaN (or -1 for gpsfix).
+    time_us is relative to the first entry.
+
+    New values for the entries are kept with set(), and all written in one more pass by write()
+    """
+    entries: List[Entry]
+    columns: ColumnarFrameMeta
+    time_us: np.ndarray
+    lat: np.ndarray
+    lon: np.ndarray
+    alt: np.ndarray
+    speed: np.ndarray
+    dist: np.ndarray
+    gpsfix: np.ndarray
+    _writes: List[Tuple[np.ndarray, Dict[str, Any]]] = dataclasses.field(default_factory=list, repr=False, compare=False)
+    _geodesics: Dict[Tuple[int, str], Tuple[np.ndarray, np.ndarray]] = dataclasses.field(
+        default_factory=dict, repr=False, compare=False
+    )
+
+    @staticmethod
+    def of(framemeta: FrameMeta) -> 'Track':
+        framemeta.check_modified()
+        entries = [framemeta.frames[t] for t in framemeta.framelist]
+        columns = ColumnarFrameMeta.from_framemeta(framemeta, names=list(track_fields))
+
+        point = columns.columns.get("point")
+        if point is not None:
+            lat, lon = point.values[:, 0].copy(), point.values[:, 1].copy()
+        else:
+            lat, lon = np.full(len(entries), np.nan), np.full(len(entries), np.nan)
+
+        gpsfix = columns.columns.get("gpsfix")
+        if gpsfix is not None and gpsfix.numeric:
+            gpsfix = np.where(np.isnan(gpsfix.values), -1, gpsfix.values).astype(np.int64)
+        else:
+            gpsfix = np.array([-1 if e.gpsfix is None else e.gpsfix for e in entries], dtype=np.int64)
+
+        return Track(
+            entries, columns,
+            time_us=columns.dt_us - columns.dt_us[0] if len(entries) else np.zeros(0, dtype=np.int64),
+            lat=lat, lon=lon,
+            alt=_magnitudes(columns, "alt", units.m),
+            speed=_magnitudes(columns, "speed", units.mps),
+            dist=_magnitudes(columns, "dist", units.m),
+            gpsfix=gpsfix,
+        )
+
+    def __len__(self):
+        return len(self.entries)
+
+    def mask(self, filter_fn: Callable[[Entry], bool]) -> np.ndarray:
+        return np.fromiter((bool(filter_fn(e)) for e in self.entries), dtype=bool, count=len(self.entries))
+
+    def pairs(self, skip: int, mask: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Indexes of entries skip apart, as FrameMeta.process_deltas, where both are in the mask"""
+        a = np.arange(max(len(self) - skip, 0))
+        b = a + skip
+        if mask is not None:
+            keep = mask[a] & mask[b]
+            a, b = a[keep], b[keep]
+        return a, b
+
+    def seconds_between(self, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        # same sum as timedelta.total_seconds()
+        return (self.time_us[b] - self.time_us[a]) / 1_000_000
+
+    def geodesics(self, skip: int, method: str = "vincenty") -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Distance and azimuth from each entry to the one skip after it (NaN if either has no point), worked out once
+        for each skip and method, so that speeds and gradient don't do the same lines twice
+        """
+        key = (skip, method)
+        if key not in self._geodesics:
+            a = np.arange(max(len(self) - skip, 0))
+            b = a + skip
+            dist, azi = np.full(len(a), np.nan), np.full(len(a), np.nan)
+            known = np.isfinite(self.lat[a]) & np.isfinite(self.lat[b])
+            a, b = a[known], b[known]
+            if len(a):
+                dist[known], azi[known] = inverse(self.lat[a], self.lon[a], self.lat[b], self.lon[b], method)
+            self._geodesics[key] = dist, azi
+        return self._geodesics[key]
+
+    def moved(self):
+        """Points have changed - forget any distances"""
+        self._geodesics.clear()
+
+    def set(self, indexes: np.ndarray, **values):
+        """
+        New values for the entries at indexes - each is a sequence, one for each index, or a single value for all of
+        them. Numbers are in the units of field_units. Nothing changes until write().
+        """
+        self._writes.append((np.asarray(indexes), values))
+
+    def write(self):
+        """Update each entry once, with everything set for it - later values win, as separate updates would"""
+        updates: Dict[int, Dict[str, Any]] = {}
+        for indexes, values in self._writes:
+            names = list(values.keys())
+            columns = [
+                v.tolist() if isinstance(v, np.ndarray) else v if isinstance(v, list) else itertools.repeat(v)
+                for v in values.values()
+            ]
+            for index, row in zip(indexes.tolist(), zip(*columns)):
+                update = updates.get(index)
+                if update is None:
+                    update = updates[index] = {}
+                update.update(zip(names, row))
+        self._writes.clear()
+
+        entries = self.entries
+        for index, update in updates.items():
+            entries[index].update_with_units(**update)
+
+
+def calculate_speeds(track: Track, skip: int, mask: Optional[np.ndarray] = None, method: str = "vincenty"):
+    """As FrameMeta.process_deltas(timeseries_process.calculate_speeds(), ...)"""
+    a, b = track.pairs(skip, mask)
+    if not len(a):
+        return
+
+    all_dist, all_azi = track.geodesics(skip, method)
+    dist, raw_azi = all_dist[a], all_azi[a]
+    time = track.seconds_between(a, b)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        speed = np.where(time > 0, dist / time, 0.0)
+    cog = np.where(raw_azi >= 0, raw_azi, 360 + raw_azi)
+
+    track.dist[a] = dist / skip  # suspect this isn't right! - as calculate_speeds
+
+    k = Kalman()
+    smoothed = [k.update(s) for s in speed.tolist()]
+
+    track.set(a, **{
+        "cspeed": smoothed,
+        "cspeed.k": smoothed,
+        "cspeed.raw": speed,
+        "dist": track.dist[a],
+        "time": time,
+        "azi": raw_azi,
+        "cog": cog,
+    })
+
+
+def calculate_odo(track: Track, mask: Optional[np.ndarray] = None):
+    """As FrameMeta.process(timeseries_process.calculate_odo(), ...) - needs dist, from calculate_speeds"""
+    indexes = np.arange(len(track)) if mask is None else np.nonzero(mask)[0]
+    track.set(indexes, codo=np.cumsum(np.nan_to_num(track.dist[indexes])))
+
+
+def calculate_accel(track: Track, skip: int):
+    """As FrameMeta.process_accel(timeseries_process.calculate_accel(), ...)"""
+    a, b = track.pairs(skip)
+    if not len(a):
+        return
+
+    time = track.seconds_between(a, b)
+    before, after = track.speed[a], track.speed[b]
+    # zero speeds are missing, as in calculate_accel
+    usable = (np.nan_to_num(before) != 0) & (np.nan_to_num(after) != 0) & (time != 0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        accel = np.where(usable, (after - before) / time, 0.0)
+
+    track.set(b, accel=accel)
+
+
+def calculate_gradient(track: Track, skip: int, mask: Optional[np.ndarray] = None, method: str = "vincenty"):
+    """As FrameMeta.process_deltas(timeseries_process.calculate_gradient(), ...)"""
+    a, b = track.pairs(skip, mask)
+    # zero altitudes are missing, as in calculate_gradient
+    usable = (np.nan_to_num(track.alt[a]) != 0) & (np.nan_to_num(track.alt[b]) != 0)
+    a, b = a[usable], b[usable]
+    if not len(a):
+        return
+
+    gain = track.alt[b] - track.alt[a]
+    dist = track.geodesics(skip, method)[0][a]
+
+    moved = dist > 1.0
+    a, b, gain, dist = a[moved], b[moved], gain[moved], dist[moved]
+    grad = (gain / dist) * 100.0
+
+    entries = track.entries
+    good = np.abs(grad) < 45
+    track.set(a[good], cgrad=grad[good])
+    track.set(a[~good], bad_grad=grad[~good])
+    track.set(a, **{
+        "grad_gain": gain,
+        "grad_dist": dist,
+        "grad_other_packet": [entries[other].packet for other in b.tolist()],
+        "grad_other_packet_index": [entries[other].packet_index for other in b.tolist()],
+    })
+
+
+def process_kinematics(framemeta: FrameMeta, skip: int, accel_skip: int,
+                       speed_filter: Callable[[Entry], bool] = lambda e: True,
+                       gradient_filter: Callable[[Entry], bool] = lambda e: True,
+                       method: str = "vincenty"):
+    """
+    Speeds, odometer, acceleration and gradient, for a whole FrameMeta at once - the same as running
+    calculate_speeds, calculate_odo, calculate_accel and calculate_gradient from timeseries_process
+    through process_deltas/process/process_accel, in that order.
+    """
+    track = Track.of(framemeta)
+    speed_mask = track.mask(speed_filter)
+
+    calculate_speeds(track, skip, speed_mask, method)
+    calculate_odo(track, speed_mask)
+    calculate_accel(track, accel_skip)
+    calculate_gradient(track, skip, track.mask(gradient_filter), method)
+    track.write()
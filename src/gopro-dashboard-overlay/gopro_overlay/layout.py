@@ -1,4 +1,4 @@
-from typing import Callable
+from typing import Callable, Optional
 
 from PIL import ImageFont, Image, ImageDraw
 
@@ -6,6 +6,7 @@ from gopro_overlay.widgets.info import ComparativeEnergy
 from .framemeta import FrameMeta
 from .layout_components import moving_map
 from .point import Coordinate
+from .render_table import RenderTable
 from .units import units
 from .widgets.text import CachingText, Text
 from .widgets.widgets import Scene, Translate, Composite, Widget
@@ -92,14 +93,18 @@ def speed_awareness_layout(renderer, font: ImageFont):
 
 class Overlay:
 
-    def __init__(self, framemeta: FrameMeta, create_widgets: Callable):
+    def __init__(self, framemeta: FrameMeta, create_widgets: Callable, table: Optional[RenderTable] = None):
         self.scene = Scene(create_widgets(self.entry))
         self.framemeta = framemeta
+        self.table = table
+        self._cursor = framemeta.cursor()
         self._entry = None
 
     def entry(self):
         return self._entry
 
     def draw(self, pts, image: Image.Image) -> Image.Image:
-        self._entry = self.framemeta.get(pts)
+        self._entry = self._cursor.get(pts)
+        if self.table is not None:
+            self.table.at(pts)
         return self.scene.draw(image)
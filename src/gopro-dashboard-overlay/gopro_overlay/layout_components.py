@@ -1,8 +1,9 @@
-from typing import Callable, TypeVar, Optional
+from typing import Callable, TypeVar, Optional, Hashable
 
 from pint import Quantity
 
 from .entry import Entry
+from .render_table import RenderTable, live_value
 from .widgets.map import MovingMap, JourneyMap
 from .widgets.text import CachingText, Text
 from .widgets.widgets import Widget
@@ -33,14 +34,19 @@ def metric_value(
         accessor: Callable[[Entry], Optional[Quantity]],
         converter: Callable[[Quantity], Optional[Quantity]],
         formatter: Callable[[Quantity], T],
-        default: T = "-"
+        default: T = "-",
+        table: Optional[RenderTable] = None,
+        key: Optional[Hashable] = None,
 ) -> Callable[[], T]:
+    if table is not None and key is not None:
+        reading = table.reading(key, entry, accessor, converter)
+    else:
+        reading = lambda: live_value(entry(), accessor, converter)
+
     def value() -> T:
-        e = accessor(entry())
-        if e is not None:
-            v = converter(e)
-            if v is not None:
-                return formatter(v)
+        v = reading()
+        if v is not None:
+            return formatter(v)
         return default
 
     return value
@@ -53,5 +59,5 @@ def text(cache=True, **kwargs) -> Widget:
         return Text(**kwargs)
 
 
-def metric(entry, accessor, formatter, converter=lambda x: x, cache=True, **kwargs):
-    return text(cache, value=metric_value(entry, accessor, converter, formatter), **kwargs)
+def metric(entry, accessor, formatter, converter=lambda x: x, cache=True, table=None, key=None, **kwargs):
+    return text(cache, value=metric_value(entry, accessor, converter, formatter, table=table, key=key), **kwargs)
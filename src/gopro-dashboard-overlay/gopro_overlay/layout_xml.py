@@ -3,16 +3,18 @@ import math
 import xml.etree.ElementTree as ET
 from importlib.resources import files, as_file
 from pathlib import Path
-from typing import Callable, Optional, TypeVar, Tuple
+from typing import Callable, Dict, Optional, TypeVar, Tuple
 
 import pint
 from pint.formatting import format_unit
 
 from gopro_overlay import layouts
+from gopro_overlay.conversion import Conversion
 from gopro_overlay.dimensions import Dimension
 from gopro_overlay.framemeta import Window
 from gopro_overlay.layout_components import moving_map, journey_map, text, metric, metric_value
 from gopro_overlay.point import Coordinate
+from gopro_overlay.render_table import RenderTable
 from gopro_overlay.timeseries import Entry
 from gopro_overlay.timeunits import timeunits
 from gopro_overlay.units import units
@@ -42,12 +44,6 @@ def load_xml_layout(filepath: Path):
             return f.read()
 
 
-def zero_safe(n, f):
-    if n is None or n.m < 0.0000001:
-        return None
-    return f(n)
-
-
 class Converters:
 
     def __init__(self, speed_unit="mph", distance_unit="mile", altitude_unit="m", temperature_unit="degC"):
@@ -58,54 +54,58 @@ class Converters:
             # speed
             "none": lambda u: u,
 
-            "mph": lambda u: u.to("MPH"),
-            "kph": lambda u: u.to("KPH"),
-            "knots": lambda u: u.to("knot"),
+            "mph": Conversion("MPH"),
+            "kph": Conversion("KPH"),
+            "knots": Conversion("knot"),
 
-            "pace": lambda u: zero_safe(u, lambda nz: (1 / nz).to(pace_unit)),
-            "pace_mile": lambda u: zero_safe(u, lambda nz: (1 / nz).to("pace_mile")),
-            "pace_km": lambda u: zero_safe(u, lambda nz: (1 / nz).to("pace_km")),
-            "pace_kt": lambda u: zero_safe(u, lambda nz: (1 / nz).to("pace_kt")),
+            "pace": Conversion(pace_unit, reciprocal=True),
+            "pace_mile": Conversion("pace_mile", reciprocal=True),
+            "pace_km": Conversion("pace_km", reciprocal=True),
+            "pace_kt": Conversion("pace_kt", reciprocal=True),
 
-            "spm": lambda u: u.to("spm"),
+            "spm": Conversion("spm"),
 
             # User selectable
-            "speed": lambda u: u.to(speed_unit),
-            "distance": lambda u: u.to(distance_unit),
+            "speed": Conversion(speed_unit),
+            "distance": Conversion(distance_unit),
 
-            "altitude": lambda u: u.to(altitude_unit),
-            "alt": lambda u: u.to(altitude_unit),
+            "altitude": Conversion(altitude_unit),
+            "alt": Conversion(altitude_unit),
 
-            "temp": lambda u: u.to(temperature_unit),
-            "temperature": lambda u: u.to(temperature_unit),
+            "temp": Conversion(temperature_unit),
+            "temperature": Conversion(temperature_unit),
 
             # accel
-            "G": lambda u: u.to("gravity"),
+            "G": Conversion("gravity"),
 
             # alt / dist
-            "feet": lambda u: u.to("international_feet"),
-            "miles": lambda u: u.to("mile"),
-            "metres": lambda u: u.to("m"),
-            "nautical_miles": lambda u: u.to("nautical_mile"),
+            "feet": Conversion("international_feet"),
+            "miles": Conversion("mile"),
+            "metres": Conversion("m"),
+            "nautical_miles": Conversion("nautical_mile"),
         }
+        self._pint: Dict[str, Conversion] = {}
 
     def converter(self, name: str) -> Callable[[pint.Quantity], Optional[pint.Quantity]]:
         if name is None:
             return lambda x: x
         if name in self.converters:
             return self.converters[name]
+        if name in self._pint:
+            return self._pint[name]
 
         # Try to see if specified unit is recognised by pint... if so allow it - this only means its a valid
         # unit, but actual metric might be different... if unconvertible it will blow up later...
         try:
             units.Quantity(1, units=name)
-            return lambda u: u.to(name)
         except Exception:
             raise IOError(f"The conversion '{name}' is not supported.")
+        return self._pint.setdefault(name, Conversion(name))
 
 
 def layout_from_xml(xml, renderer, framemeta, font, privacy, include=lambda name: True,
-                    decorator: Optional[WidgetProfiler] = None, converters: Converters = Converters()):
+                    decorator: Optional[WidgetProfiler] = None, converters: Converters = Converters(),
+                    table: Optional[RenderTable] = None):
     root = ET.fromstring(xml)
 
     fonts = {}
@@ -121,6 +121,7 @@ def layout_from_xml(xml, renderer, framemeta, font, privacy, include=lambda name
         renderer=renderer,
         framemeta=framemeta,
         converters=converters,
+        table=table,
     )
 
     def name_of(element):
@@ -312,6 +313,12 @@ def metric_accessor_from(name: str) -> Callable[[Entry], Optional[pint.Quantity]
     raise IOError(f"The metric '{name}' is not supported. Use one of: {list(accessors.keys())}")
 
 
+def metric_key(element, attr: str = "metric", metric: Optional[str] = None,
+               units: Optional[str] = None) -> Tuple[str, Optional[str]]:
+    """What a metric widget shows - widgets showing the same thing share a RenderTable column"""
+    return attrib(element, attr, d=metric), attrib(element, "units", d=units)
+
+
 def quantity_formatter_for(format_string: Optional[str], dp: Optional[int]) -> Callable[[pint.Quantity], str]:
     if format_string and dp:
         raise IOError("Cannot supply both 'format' and 'dp', just use one")
@@ -390,8 +397,9 @@ class FloatRange:
 
 class Widgets:
 
-    def __init__(self, font, privacy, renderer, framemeta, converters):
+    def __init__(self, font, privacy, renderer, framemeta, converters, table: Optional[RenderTable] = None):
         self.framemeta = framemeta
+        self.table = table
         self.renderer = renderer
         self.privacy = privacy
         self.font = font
@@ -410,6 +418,8 @@ class Widgets:
             formatter=quantity_formatter_from(element),
             font=self._font(element, "size", d=16),
             converter=self.converters.converter(attrib(element, "units", d=None)),
+            table=self.table,
+            key=metric_key(element),
             align=attrib(element, "align", d="left"),
             cache=battrib(element, "cache", d=True),
             fill=rgbattr(element, "rgb", d=(255, 255, 255)),
@@ -429,6 +439,8 @@ class Widgets:
             formatter=lambda q: format_string.format(q.u),
             font=self._font(element, "size", d=16),
             converter=self.converters.converter(attrib(element, "units", d=None)),
+            table=self.table,
+            key=metric_key(element),
             align=attrib(element, "align", d="left"),
             cache=True,
             fill=rgbattr(element, "rgb", d=(255, 255, 255)),
@@ -603,7 +615,9 @@ class Widgets:
                 accessor=metric_accessor_from(attrib(element, "metric")),
                 converter=self.converters.converter(attrib(element, "units", d=None)),
                 formatter=lambda q: q.m,
-                default=0
+                default=0,
+                table=self.table,
+                key=metric_key(element),
             ),
             fill=rgbattr(element, "fill", d=(255, 255, 255, 0)),
             zero=rgbattr(element, "zero", d=(255, 255, 255)),
@@ -631,7 +645,9 @@ class Widgets:
                 accessor=metric_accessor_from(attrib(element, "metric")),
                 converter=self.converters.converter(attrib(element, "units", d=None)),
                 formatter=lambda q: q.m,
-                default=0
+                default=0,
+                table=self.table,
+                key=metric_key(element),
             ),
             fill=rgbattr(element, "fill", d=(255, 255, 255, 0)),
             divider=rgbattr(element, "zone-divider", d=(255, 255, 255)),
@@ -658,7 +674,9 @@ class Widgets:
                 accessor=metric_accessor_from(attrib(element, "metric", d="speed")),
                 converter=self.converters.converter(attrib(element, "units", d="knots")),
                 formatter=lambda q: q.m,
-                default=0
+                default=0,
+                table=self.table,
+                key=metric_key(element, metric="speed", units="knots"),
             ),
             font=self.font(iattrib(element, "textsize", d=16)),
             Vs0=iattrib(element, "vs0", d=40),
@@ -678,7 +696,9 @@ class Widgets:
                 accessor=metric_accessor_from(attrib(element, "metric", d="speed")),
                 converter=self.converters.converter(attrib(element, "units", d="knots")),
                 formatter=lambda q: q.m,
-                default=0
+                default=0,
+                table=self.table,
+                key=metric_key(element, metric="speed", units="knots"),
             ),
             font=self.font(iattrib(element, "textsize", d=16)),
             needle=battrib(element, "needle", d=True),
@@ -698,7 +718,9 @@ class Widgets:
                 accessor=metric_accessor_from(attrib(element, "metric", d="speed")),
                 converter=self.converters.converter(attrib(element, "units", d="knots")),
                 formatter=lambda q: q.m,
-                default=0
+                default=0,
+                table=self.table,
+                key=metric_key(element, metric="speed", units="knots"),
             ),
             font=self.font(iattrib(element, "textsize", d=16)),
             green=iattrib(element, "green", d=0),
@@ -731,14 +753,17 @@ class Widgets:
         return self.with_cairo(lambda m: m.create_cairo_circuit_map(element, entry, self.framemeta, **kwargs))
 
     def create_cairo_gauge_marker(self, element: ET.Element, entry, **kwargs):
-        return self.with_cairo(lambda m: m.create_cairo_gauge_marker(element, entry, self.converters, **kwargs))
+        return self.with_cairo(
+            lambda m: m.create_cairo_gauge_marker(element, entry, self.converters, table=self.table, **kwargs))
 
     def create_cairo_gauge_round_annotated(self, element: ET.Element, entry, **kwargs):
         return self.with_cairo(
-            lambda m: m.create_cairo_gauge_round_annotated(element, entry, self.converters, **kwargs))
+            lambda m: m.create_cairo_gauge_round_annotated(element, entry, self.converters, table=self.table, **kwargs))
 
     def create_cairo_gauge_arc_annotated(self, element: ET.Element, entry, **kwargs):
-        return self.with_cairo(lambda m: m.create_cairo_gauge_arc_annotated(element, entry, self.converters, **kwargs))
+        return self.with_cairo(
+            lambda m: m.create_cairo_gauge_arc_annotated(element, entry, self.converters, table=self.table, **kwargs))
 
     def create_cairo_gauge_donut(self, element, entry: ET.Element, **kwargs):
-        return self.with_cairo(lambda m: m.create_cairo_gauge_donut(element, entry, self.converters, **kwargs))
+        return self.with_cairo(
+            lambda m: m.create_cairo_gauge_donut(element, entry, self.converters, table=self.table, **kwargs))
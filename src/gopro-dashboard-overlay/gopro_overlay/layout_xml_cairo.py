@@ -4,7 +4,7 @@ from cairo import LineCap
 
 from .dimensions import Dimension
 from .layout_components import metric_value
-from .layout_xml import iattrib, rgbattr, fattrib, metric_accessor_from, attrib
+from .layout_xml import iattrib, rgbattr, fattrib, metric_accessor_from, attrib, metric_key
 from .layout_xml_attribute import allow_attributes
 from .widgets.cairo.angle import Angle
 from .widgets.cairo.cairo import CairoAdapter
@@ -70,7 +70,7 @@ def cairo_colour(t) -> Optional[Colour]:
 
 @allow_attributes({"size", "min", "max", "metric", "units", "start", "length",
                    "sectors", "tick-rgb", "background-rgb", "gauge-rgb", "dot-outer-rgb", "dot-inner-rgb", "cap"})
-def create_cairo_gauge_marker(element, entry, converters, **kwargs) -> Widget:
+def create_cairo_gauge_marker(element, entry, converters, table=None, **kwargs) -> Widget:
     size = iattrib(element, "size", d=256)
 
     min_value = iattrib(element, "min", d=0)
@@ -81,7 +81,9 @@ def create_cairo_gauge_marker(element, entry, converters, **kwargs) -> Widget:
         accessor=metric_accessor_from(attrib(element, "metric")),
         converter=converters.converter(attrib(element, "units", d=None)),
         formatter=lambda q: q.m,
-        default=0
+        default=0,
+        table=table,
+        key=metric_key(element),
     )
 
     return CairoAdapter(
@@ -112,7 +114,7 @@ def colour_attr(element, attr, d):
                    "major-tick-rgb", "minor-tick-rgb",
                    "needle-rgb",
                    })
-def create_cairo_gauge_round_annotated(element, entry, converters, **kwargs) -> Widget:
+def create_cairo_gauge_round_annotated(element, entry, converters, table=None, **kwargs) -> Widget:
     size = iattrib(element, "size", d=256)
 
     min_value = iattrib(element, "min", d=0)
@@ -123,7 +125,9 @@ def create_cairo_gauge_round_annotated(element, entry, converters, **kwargs) ->
         accessor=metric_accessor_from(attrib(element, "metric")),
         converter=converters.converter(attrib(element, "units", d=None)),
         formatter=lambda q: q.m,
-        default=0
+        default=0,
+        table=table,
+        key=metric_key(element),
     )
 
     return CairoAdapter(
@@ -155,7 +159,7 @@ def create_cairo_gauge_round_annotated(element, entry, converters, **kwargs) ->
                    "arc-metric-upper", "arc-metric-lower",
                    "arc-value-upper", "arc-value-lower"
                    })
-def create_cairo_gauge_arc_annotated(element, entry, converters, **kwargs) -> Widget:
+def create_cairo_gauge_arc_annotated(element, entry, converters, table=None, **kwargs) -> Widget:
     size = iattrib(element, "size", d=256)
 
     min_value = iattrib(element, "min", d=0)
@@ -169,7 +173,9 @@ def create_cairo_gauge_arc_annotated(element, entry, converters, **kwargs) -> Wi
             accessor=metric_accessor_from(attrib(element, attr_name)),
             converter=converter,
             formatter=lambda q: q.m,
-            default=0
+            default=0,
+            table=table,
+            key=metric_key(element, attr=attr_name),
         )
 
     if "arc-metric-lower" in element.attrib:
@@ -220,7 +226,7 @@ def create_cairo_gauge_arc_annotated(element, entry, converters, **kwargs) -> Wi
                    "arc-metric-upper", "arc-metric-lower",
                    "arc-value-upper", "arc-value-lower"
                    })
-def create_cairo_gauge_donut(element, entry, converters, **kwargs) -> Widget:
+def create_cairo_gauge_donut(element, entry, converters, table=None, **kwargs) -> Widget:
     size = iattrib(element, "size", d=256)
 
     min_value = iattrib(element, "min", d=0)
@@ -234,7 +240,9 @@ def create_cairo_gauge_donut(element, entry, converters, **kwargs) -> Widget:
             accessor=metric_accessor_from(attrib(element, attr_name)),
             converter=converter,
             formatter=lambda q: q.m,
-            default=0
+            default=0,
+            table=table,
+            key=metric_key(element, attr=attr_name),
         )
 
     if "arc-metric-lower" in element.attrib:
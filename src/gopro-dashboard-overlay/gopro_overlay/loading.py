@@ -1,16 +1,21 @@
 import dataclasses
+import os
 import traceback
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from subprocess import TimeoutExpired
-from typing import Set, Optional
+from typing import Set, Optional, List, Tuple, Iterable
 
 from gopro_overlay import gpx, fit
 from gopro_overlay.ffmpeg_gopro import FFMPEGGoPro, GoproRecording
 from gopro_overlay.framemeta import FrameMeta
-from gopro_overlay.framemeta_gpmd import LoadFlag, parse_gopro
+from gopro_overlay.framemeta_gpmd import LoadFlag, load_gopro, chapters_framemeta, resolve_flags, streams_for, \
+    AcclOptions, timelapse_correction
+from gopro_overlay.gpmf.demux import Demux, StreamingDemultiplexer
 from gopro_overlay.gpmd_filters import GPSLockFilter, NullGPSLockFilter
 from gopro_overlay.log import fatal
 from gopro_overlay.timeseries import Timeseries
+from gopro_overlay.timeunits import Timeunit
 
 
 def load_external(filepath: Path, units) -> Timeseries:
@@ -27,6 +32,29 @@ def load_external(filepath: Path, units) -> Timeseries:
 class GoPro:
     recording: GoproRecording
     framemeta: FrameMeta
+    # the duration of the whole GPMF track, even when only part of it was loaded
+    track_duration: Timeunit
+
+    def timelapse_correction(self) -> float:
+        """Time in the metadata per time in the video - more than 1 for a timelapse"""
+        return timelapse_correction(self.track_duration, self.recording.video.duration)
+
+
+@dataclasses.dataclass
+class GoProChapters:
+    recordings: List[GoproRecording]
+    framemeta: FrameMeta
+
+
+def _demux_chapter(ffmpeg_gopro: FFMPEGGoPro, file: Path, wanted: Iterable[str]) -> Tuple[GoproRecording, Demux]:
+    """Runs in a worker process - so the result must be picklable"""
+    recording = ffmpeg_gopro.find_recording(file)
+    if not recording.data:
+        raise IOError(f"Unable to locate metadata stream in '{file}' - is it a GoPro file")
+
+    demuxer = StreamingDemultiplexer(wanted)
+    recording.stream_data(demuxer.feed, show_progress=False)
+    return recording, demuxer.finish()
 
 
 class GoproLoader:
@@ -37,13 +65,21 @@ class GoproLoader:
         units,
         flags: Optional[Set[LoadFlag]] = None,
         gps_lock_filter: GPSLockFilter = NullGPSLockFilter(),
+        accl: AcclOptions = AcclOptions(),
     ):
         self.ffmpeg_gopro = ffmpeg_gopro
         self.units = units
         self.filter = gps_lock_filter
         self.flags = flags if flags is not None else None
+        self.accl = accl
 
-    def load(self, file: Path) -> GoPro:
+    def load(self, file: Path, start: Optional[Timeunit] = None, end: Optional[Timeunit] = None) -> GoPro:
+        """
+        Load the metadata of a GoPro file. If start or end is given, only the part of the GPMF track that
+        covers that part of the video is decoded, which is much quicker for a short clip of a long recording.
+        start and end are times in the video - for a timelapse, they are scaled to times in the track.
+        Raises ValueError if the track doesn't cover any of [start, end].
+        """
         recording = self.ffmpeg_gopro.find_recording(file)
 
         if not recording.data:
@@ -52,15 +88,11 @@ class GoproLoader:
             )
 
         try:
-            frame_meta = parse_gopro(
-                recording.load_data(),
-                self.units,
-                recording.data,
-                flags=self.flags,
-                gps_lock_filter=self.filter,
+            track = load_gopro(
+                recording, self.units, flags=self.flags, gps_lock_filter=self.filter, start=start, end=end,
+                accl=self.accl
             )
-
-            return GoPro(recording=recording, framemeta=frame_meta)
+            return GoPro(recording=recording, framemeta=track.framemeta, track_duration=track.duration)
 
         except TimeoutExpired:
             traceback.print_exc()
@@ -68,3 +100,30 @@ class GoproLoader:
                 f"{file} appears to be located on a slow device. Please ensure both input and output files are on "
                 f"fast disks"
             )
+
+    def load_chapters(self, files: List[Path], workers: Optional[int] = None) -> GoProChapters:
+        """
+        Load the chapters of a single recording (e.g. GX01xxxx.MP4, GX02xxxx.MP4...) as one timeline.
+        The GPMF of each chapter is read and parsed in parallel, in separate processes.
+
+        Converting the packets happens back in this process: entries hold pint quantities, and a quantity
+        that has been pickled comes back in pint's default registry, not ours, so it can't be used with them.
+        """
+        wanted = streams_for(resolve_flags(self.flags))
+        workers = workers if workers is not None else min(len(files), os.cpu_count() or 1)
+
+        try:
+            with ProcessPoolExecutor(max_workers=max(1, workers)) as pool:
+                chapters = list(pool.map(_demux_chapter, [self.ffmpeg_gopro] * len(files), files, [wanted] * len(files)))
+        except TimeoutExpired:
+            traceback.print_exc()
+            fatal(
+                f"{files} appear to be located on a slow device. Please ensure both input and output files are on "
+                f"fast disks"
+            )
+
+        framemeta = chapters_framemeta(
+            chapters, self.units, flags=self.flags, gps_lock_filter=self.filter, accl=self.accl
+        )
+
+        return GoProChapters(recordings=[r for r, _ in chapters], framemeta=framemeta)
@@ -0,0 +1,188 @@
+import dataclasses
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .framemeta import FrameMeta
+from .gpmf import GPS_FIXED_VALUES, GPSFix
+from .kinematics import Track, calculate_accel, calculate_gradient, calculate_odo, calculate_speeds, track_fields
+from .log import log
+from .point import Point
+from .smoothing import kalman, simple_exponential
+from .timing import PoorTimer
+
+# the entry fields that are in a Track when it is gathered
+gathered = frozenset(track_fields)
+
+# masks that stages can use by name - each is worked out once, from the track's columns
+masks: Dict[str, Callable[[Track], np.ndarray]] = {
+    "locked_2d": lambda track: np.isin(track.gpsfix, list(GPS_FIXED_VALUES)),
+    "locked_3d": lambda track: track.gpsfix == GPSFix.LOCK_3D.value,
+}
+
+
+@dataclasses.dataclass(frozen=True)
+class Stage:
+    """
+    One step of processing a Track. process is given the track, and the named mask (or None, if there isn't one).
+    needs are the fields it reads, and makes the fields it sets.
+    """
+    name: str
+    process: Callable[[Track, Optional[np.ndarray]], None]
+    needs: Tuple[str, ...] = ()
+    makes: Tuple[str, ...] = ()
+    mask: Optional[str] = None
+
+
+class Pipeline:
+    """
+    Processing for a whole FrameMeta, given as a list of stages, run in the order given. Rather than each stage being
+    a pass over all the entries, the fields that are needed are gathered once, each mask is worked out once, the
+    stages work on the gathered columns, and the entries are updated once at the end.
+
+    The order of the stages is checked when the pipeline is made, against the fields a Track can gather. In run,
+    a stage is skipped if the data doesn't have what it needs, and no earlier stage that ran makes it - e.g. accel,
+    for a GPX file with no speeds.
+
+    After run, report has a timer for each part that ran.
+    """
+
+    def __init__(self, stages: Sequence[Stage], named_masks: Optional[Dict[str, Callable[[Track], np.ndarray]]] = None):
+        self.stages = list(stages)
+        self.masks = masks if named_masks is None else named_masks
+        self.report: List[PoorTimer] = []
+        self._check()
+
+    def _check(self):
+        available = set(gathered)
+        for stage in self.stages:
+            if stage.mask is not None and stage.mask not in self.masks:
+                raise ValueError(f"Stage '{stage.name}' uses mask '{stage.mask}', but there is no such mask")
+            missing = set(stage.needs) - available
+            if missing:
+                raise ValueError(f"Stage '{stage.name}' needs {sorted(missing)}, which no earlier stage makes")
+            available.update(stage.makes)
+
+    def run(self, framemeta: FrameMeta) -> List[PoorTimer]:
+        gather = PoorTimer("gather")
+        track = gather.time(lambda: Track.of(framemeta))
+
+        mask_timer = PoorTimer("masks")
+        computed: Dict[str, np.ndarray] = {}
+
+        def mask_for(name: Optional[str]) -> Optional[np.ndarray]:
+            if name is None:
+                return None
+            if name not in computed:
+                computed[name] = mask_timer.time(lambda: self.masks[name](track))
+            return computed[name]
+
+        available = set(track.columns.columns.keys())
+        timers = []
+        for stage in self.stages:
+            missing = set(stage.needs) - available
+            if missing:
+                log(f"Skipping '{stage.name}' - the data has no {', '.join(sorted(missing))}")
+                continue
+            available.update(stage.makes)
+
+            mask = mask_for(stage.mask)
+            timer = PoorTimer(stage.name)
+            timer.time(lambda: stage.process(track, mask))
+            timers.append(timer)
+
+        write = PoorTimer("write")
+        write.time(track.write)
+
+        self.report = [gather, mask_timer, *timers, write]
+        for timer in self.report:
+            log(timer)
+        return self.report
+
+
+def _indexes(track: Track, mask: Optional[np.ndarray]) -> np.ndarray:
+    return np.arange(len(track)) if mask is None else np.nonzero(mask)[0]
+
+
+def smooth_point(alpha: float, mask: Optional[str] = None) -> Stage:
+    """As timeseries_process.smooth_ses(..., "point", lambda e: e.point, alpha)"""
+
+    def process(track: Track, m: Optional[np.ndarray]):
+        indexes = _indexes(track, m)
+        if not len(indexes) or np.isnan(track.lat[indexes]).all():
+            return
+        lat = simple_exponential(track.lat[indexes], alpha, reset_on_zero=False)
+        lon = simple_exponential(track.lon[indexes], alpha, reset_on_zero=False)
+
+        track.lat[indexes], track.lon[indexes] = lat, lon
+        track.moved()
+        track.set(indexes, point=[Point(a, b) for a, b in zip(lat.tolist(), lon.tolist())])
+
+    return Stage("smooth point", process, needs=("point",), makes=("point",), mask=mask)
+
+
+def speeds(skip: int, mask: Optional[str] = None, method: str = "vincenty") -> Stage:
+    return Stage(
+        "speeds", lambda track, m: calculate_speeds(track, skip, m, method),
+        needs=("point",), makes=("cspeed", "cspeed.k", "cspeed.raw", "dist", "time", "azi", "cog"), mask=mask
+    )
+
+
+def odo(mask: Optional[str] = None) -> Stage:
+    return Stage("odo", lambda track, m: calculate_odo(track, m), needs=("dist",), makes=("codo",), mask=mask)
+
+
+def accel(skip: int) -> Stage:
+    return Stage("accel", lambda track, m: calculate_accel(track, skip), needs=("speed",), makes=("accel",))
+
+
+def gradient(skip: int, mask: Optional[str] = None, method: str = "vincenty") -> Stage:
+    return Stage(
+        "gradient", lambda track, m: calculate_gradient(track, skip, m, method),
+        needs=("point", "alt"),
+        makes=("cgrad", "bad_grad", "grad_gain", "grad_dist", "grad_other_packet", "grad_other_packet_index"),
+        mask=mask
+    )
+
+
+def smooth_speed(mask: Optional[str] = None) -> Stage:
+    """As timeseries_process.smooth_kalman(..., "speed", lambda e: e.speed) - the speeds are smoothed in m/s"""
+
+    def process(track: Track, m: Optional[np.ndarray]):
+        indexes = _indexes(track, m)
+        indexes = indexes[~np.isnan(track.speed[indexes])]
+        if not len(indexes):
+            return
+        smoothed = kalman(track.speed[indexes])
+        track.speed[indexes] = smoothed
+        track.set(indexes, speed=smoothed)
+
+    return Stage("smooth speed", process, needs=("speed",), makes=("speed",), mask=mask)
+
+
+locked_fields = ("speed", "cspeed", "accel", "azi", "cog", "time", "dist", "grad", "cgrad", "alt")
+
+
+def filter_locked(mask: str = "locked_2d") -> Stage:
+    """As timeseries_process.filter_locked() - clears the fields that need a GPS lock, where the mask is not set"""
+
+    def process(track: Track, m: np.ndarray):
+        indexes = np.nonzero(~m)[0]
+        track.speed[indexes] = track.dist[indexes] = track.alt[indexes] = np.nan
+        track.set(indexes, **{f: None for f in locked_fields})
+
+    return Stage("filter locked", process, needs=("gpsfix",), makes=locked_fields, mask=mask)
+
+
+def gopro_processing(packets_per_second: int, method: str = "vincenty") -> Pipeline:
+    """The processing that gopro-dashboard does, once the timeseries is loaded"""
+    skip = packets_per_second * 3
+    return Pipeline([
+        smooth_point(alpha=0.45, mask="locked_2d"),
+        speeds(skip, mask="locked_2d", method=method),
+        odo(mask="locked_2d"),
+        accel(18 * 3),
+        gradient(skip, mask="locked_3d", method=method),  # hack
+        smooth_speed(),
+        filter_locked("locked_2d"),
+    ])
@@ -2,6 +2,8 @@ import dataclasses
 import math
 from typing import Tuple
 
+from pint import Quantity
+
 from gopro_overlay.units import units
 
 
@@ -131,6 +133,13 @@ class EulerRadians:
     yaw: float
 
 
+@dataclasses.dataclass(frozen=True)
+class Orientation:
+    roll: Quantity
+    pitch: Quantity
+    yaw: Quantity
+
+
 class Quaternion:
     '''
     quaternion implementation based on: https://danceswithcode.net/engineeringnotes/quaternions/quaternions.html
@@ -5,7 +5,7 @@ from gopro_overlay import progress_frames
 
 class ProgressTracker:
 
-    def start(self, count):
+    def start(self, count=None):
         pass
 
     def update(self, processed):
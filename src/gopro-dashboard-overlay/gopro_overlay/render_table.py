@@ -0,0 +1,153 @@
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+import numpy as np
+from pint import Quantity
+
+from gopro_overlay.conversion import Conversion
+from gopro_overlay.entry import Entry
+from gopro_overlay.timeunits import Timeunit
+from gopro_overlay.timing import PoorTimer
+
+
+class TableValue:
+    """
+    A converted metric value, as read from a RenderTable. Has the parts of a pint Quantity that widgets use
+    (m/magnitude and u/units), without the cost of making or converting a Quantity each frame.
+    """
+    __slots__ = ("m", "u")
+
+    def __init__(self, m, u):
+        self.m = m
+        self.u = u
+
+    @property
+    def magnitude(self):
+        return self.m
+
+    @property
+    def units(self):
+        return self.u
+
+    def __repr__(self):
+        return f"TableValue({self.m} {self.u})"
+
+
+class RenderColumn:
+    """
+    One metric, converted, at each step of a render timeline. Magnitudes are in an array, with present marking
+    the steps that have a value. If the converted values don't all have the same units, they are kept as they are.
+    """
+
+    @staticmethod
+    def of(magnitudes: np.ndarray, present: np.ndarray, unit) -> 'RenderColumn':
+        """A column of magnitudes that are all in unit, already converted"""
+        column = RenderColumn.__new__(RenderColumn)
+        column.present = present
+        column.unit = unit
+        column.magnitudes = magnitudes
+        column._values = [TableValue(m, unit) if p else None for m, p in zip(magnitudes.tolist(), present.tolist())]
+        return column
+
+    def __init__(self, converted: List[Optional[Any]]):
+        present = [v is not None for v in converted]
+        values = [v for v in converted if v is not None]
+        unit_set = {v.units for v in values if isinstance(v, Quantity)}
+
+        self.present = np.array(present, dtype=bool)
+        self.unit = None
+        self.magnitudes = None
+
+        uniform = len(unit_set) == 1 and all(isinstance(v, Quantity) for v in values)
+        # ints stay ints, but not when mixed with floats - formatting them would change
+        uniform = uniform and len({type(v.m) for v in values}) == 1
+
+        if uniform:
+            self.unit = unit_set.pop()
+            magnitudes = np.array([v.m for v in values])
+            self.magnitudes = np.zeros(len(converted), dtype=magnitudes.dtype)
+            self.magnitudes[self.present] = magnitudes
+
+            unit = self.unit
+            self._values = [
+                TableValue(m, unit) if p else None for m, p in zip(self.magnitudes.tolist(), present)
+            ]
+        else:
+            self._values = converted
+
+    def __len__(self):
+        return len(self._values)
+
+    def __getitem__(self, index: int):
+        return self._values[index]
+
+
+class RenderTable:
+    """
+    Values of the metrics a layout shows, resampled once at each step of the render timeline (as
+    FrameMeta.stepper(...).steps_us()) and already converted to display units - so drawing a frame is an index into
+    a column, rather than a frame lookup, attribute access and unit conversion for each widget.
+
+    Call at(pts) before drawing each frame. Times that are not on the timeline are looked up as before.
+    """
+
+    def __init__(self, framemeta, steps_us: np.ndarray):
+        self._framemeta = framemeta
+        self.steps_us = np.asarray(steps_us, dtype=np.int64)
+        self._index = {us: index for index, us in enumerate(self.steps_us.tolist())}
+        self._rows: Optional[List[Entry]] = None
+        self._columns: Dict[Hashable, RenderColumn] = {}
+        self._position: Optional[int] = None
+        self.timer = PoorTimer("render table")
+
+    def __len__(self):
+        return len(self.steps_us)
+
+    def __getitem__(self, key: Hashable) -> RenderColumn:
+        return self._columns[key]
+
+    def _entries(self) -> List[Entry]:
+        if self._rows is None:
+            cursor = self._framemeta.cursor()
+            self._rows = [cursor.get(Timeunit(us)) for us in self.steps_us.tolist()]
+        return self._rows
+
+    def column(self, key: Hashable, accessor: Callable[[Entry], Optional[Quantity]],
+               converter: Callable[[Quantity], Optional[Quantity]]) -> RenderColumn:
+        """The column for key, made with accessor and converter the first time it is asked for"""
+        if key not in self._columns:
+            def make():
+                if isinstance(converter, Conversion):
+                    values = [accessor(e) for e in self._entries()]
+                    # a whole column in one unit is converted at once, otherwise each value on its own
+                    converted = converter.column(values)
+                    if converted is not None:
+                        return RenderColumn.of(*converted)
+                    return RenderColumn([converter(v) if v is not None else None for v in values])
+                return RenderColumn([live_value(e, accessor, converter) for e in self._entries()])
+
+            self._columns[key] = self.timer.time(make)
+        return self._columns[key]
+
+    def at(self, pts: Timeunit):
+        self._position = self._index.get(pts.us)
+
+    def reading(self, key: Hashable, entry: Callable[[], Entry], accessor: Callable[[Entry], Optional[Quantity]],
+                converter: Callable[[Quantity], Optional[Quantity]]) -> Callable[[], Optional[Any]]:
+        """The converted value of the metric at the current frame"""
+        column = self.column(key, accessor, converter)
+
+        def value():
+            position = self._position
+            if position is None:
+                return live_value(entry(), accessor, converter)
+            return column[position]
+
+        return value
+
+
+def live_value(entry: Entry, accessor: Callable[[Entry], Optional[Quantity]],
+               converter: Callable[[Quantity], Optional[Quantity]]) -> Optional[Quantity]:
+    value = accessor(entry)
+    if value is not None:
+        return converter(value)
+    return None
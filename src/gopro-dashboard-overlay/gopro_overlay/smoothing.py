@@ -1,3 +1,6 @@
+import numpy as np
+
+
 # No real idea if this is correct implementation!
 # Found on the internet at: https://www.youtube.com/watch?v=ruB917YmtgE
 
@@ -44,3 +47,90 @@ class SimpleExponential:
                 return current
         finally:
             self.previous = current
+
+
+def _recurrence(x: np.ndarray, c: float, y0: float, block: int = 64) -> np.ndarray:
+    """
+    y[n] = c * y[n - 1] + x[n], with y[-1] = y0, for a whole array at once.
+    Each block is a matrix product with the filter's impulse response; the values carried from one block to the
+    next are the same recurrence again, over the block ends.
+    """
+    count = len(x)
+    if count == 0:
+        return np.empty(0)
+
+    blocks = -(-count // block)
+    padded = np.zeros(blocks * block)
+    padded[:count] = x
+
+    powers = c ** np.arange(block + 1)
+    i = np.arange(block)
+    lag = i[:, None] - i[None, :]
+    response = np.where(lag >= 0, powers[np.abs(lag)], 0.0)
+
+    local = padded.reshape(blocks, block) @ response.T
+
+    if blocks == 1:
+        carried = np.array([y0])
+    else:
+        ends = _recurrence(local[:, -1], powers[block], y0, block)
+        carried = np.concatenate([[y0], ends[:-1]])
+
+    return (local + carried[:, None] * powers[1:][None, :]).reshape(-1)[:count]
+
+
+def _zero_for_none(values) -> np.ndarray:
+    x = np.array(values, dtype=np.float64)
+    x[np.isnan(x)] = 0.0
+    return x
+
+
+def kalman(values) -> np.ndarray:
+    """
+    Kalman.update applied to each of values in turn, for a whole array at once. NaN is taken as None (so 0.0).
+    The gain only depends on how many values have been seen, and soon settles - up to there, values are
+    run through Kalman, and after it, the filter is a fixed linear one. Results are the same, to rounding.
+    """
+    x = _zero_for_none(values)
+    y = np.empty(len(x))
+
+    k = Kalman()
+    index = 0
+    while index < len(x):
+        before = k.P
+        y[index] = k.update(float(x[index]))
+        index += 1
+        if k.P == before or index >= 1000:
+            break
+
+    if index < len(x):
+        gain = k.K
+        y[index:] = _recurrence(gain * x[index:], 1 - gain * k.H, y[index - 1])
+
+    return y
+
+
+def simple_exponential(values, alpha: float = 0.4, reset_on_zero: bool = True) -> np.ndarray:
+    """
+    SimpleExponential.update applied to each of values in turn, for a whole array at once. NaN is taken as None
+    (so 0.0). As SimpleExponential, values are passed through until there is a non-zero forecast, unless
+    reset_on_zero is False (as for a Point, which is never zero). Results are the same, to rounding.
+    """
+    x = _zero_for_none(values)
+    y = x.copy()
+
+    if reset_on_zero:
+        non_zero = np.flatnonzero(x)
+        start = non_zero[0] if len(non_zero) else len(x)
+    else:
+        start = 0
+
+    if start < len(x) - 1:
+        y[start + 1:] = _recurrence(alpha * x[start:-1], 1 - alpha, x[start])
+
+        if reset_on_zero and np.any(y[start + 1:] == 0):
+            # the forecast has come back to zero, which resets SimpleExponential - very unlikely, so do it slowly
+            ses = SimpleExponential(alpha=alpha)
+            y = np.array([ses.update(v) for v in x.tolist()])
+
+    return y
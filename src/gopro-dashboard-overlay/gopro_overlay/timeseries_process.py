@@ -1,8 +1,14 @@
+from typing import Callable, List
+
+import numpy as np
+import pint
 from geographiclib.geodesic import Geodesic
 
+from .conversion import magnitudes_in
+from .entry import Entry
 from .gpmf import GPS_FIXED_VALUES
 from .point import PintPoint3, Point
-from .smoothing import Kalman, SimpleExponential
+from .smoothing import Kalman, SimpleExponential, kalman, simple_exponential
 from .units import units
 
 
@@ -43,6 +49,70 @@ def process_ses(new, key, alpha=0.4):
     return process
 
 
+def _entries(framemeta, filter_fn: Callable[[Entry], bool]) -> List[Entry]:
+    framemeta.check_modified()
+    return [e for e in (framemeta.frames[t] for t in framemeta.framelist) if filter_fn(e)]
+
+
+def _column(values):
+    """Magnitudes of values (NaN for None), in the units of the first quantity, if they are quantities"""
+    unit = next((v.units for v in values if isinstance(v, pint.Quantity)), None)
+    if unit is None:
+        return np.array([np.nan if v is None else v for v in values], dtype=np.float64), None
+    return magnitudes_in(values, unit), unit
+
+
+def _values(column: np.ndarray, unit):
+    if unit is None:
+        return column.tolist()
+    return [units.Quantity(v, unit) for v in column.tolist()]
+
+
+def smooth_kalman(framemeta, new, key, filter_fn: Callable[[Entry], bool] = lambda e: True):
+    """As framemeta.process(process_kalman(new, key), filter_fn), but filtering the whole series at once"""
+    entries = [(e, v) for e, v in ((e, key(e)) for e in _entries(framemeta, filter_fn)) if v is not None]
+    if not entries:
+        return
+    column, unit = _column([v for _, v in entries])
+    for (entry, _), value in zip(entries, _values(kalman(column), unit)):
+        entry.update(**{new: value})
+
+
+def smooth_kalman_pp3(framemeta, new, key, filter_fn: Callable[[Entry], bool] = lambda e: True):
+    """As framemeta.process(process_kalman_pp3(new, key), filter_fn), but filtering the whole series at once"""
+    entries = _entries(framemeta, filter_fn)
+    if not entries:
+        return
+    xyz = [key(e) for e in entries]
+    x, y, z = (_values(kalman(column), unit) for column, unit in (
+        _column([p.x for p in xyz]), _column([p.y for p in xyz]), _column([p.z for p in xyz])
+    ))
+    for entry, values in zip(entries, zip(x, y, z)):
+        entry.update(**{new: PintPoint3(*values)})
+
+
+def smooth_ses(framemeta, new, key, alpha=0.4, filter_fn: Callable[[Entry], bool] = lambda e: True):
+    """
+    As framemeta.process(process_ses(new, key, alpha), filter_fn), but smoothing the whole series at once.
+    Points are smoothed as lat and lon.
+    """
+    entries = _entries(framemeta, filter_fn)
+    if not entries:
+        return
+    values = [key(e) for e in entries]
+
+    if any(isinstance(v, Point) for v in values):
+        lat = simple_exponential([np.nan if v is None else v.lat for v in values], alpha, reset_on_zero=False)
+        lon = simple_exponential([np.nan if v is None else v.lon for v in values], alpha, reset_on_zero=False)
+        smoothed = [Point(a, b) for a, b in zip(lat.tolist(), lon.tolist())]
+    else:
+        column, unit = _column(values)
+        smoothed = _values(simple_exponential(column, alpha), unit)
+
+    for entry, value in zip(entries, smoothed):
+        entry.update(**{new: value})
+
+
 def distance_azi_between(a: Point, b: Point):
     inverse = Geodesic.WGS84.Inverse(a.lat, a.lon, b.lat, b.lon)
     dist = units.Quantity(inverse['s12'], units.m)
@@ -2,6 +2,12 @@ import datetime
 
 
 class Timeunit:
+    """
+    A time, or duration, in whole microseconds. This is the API type - inner loops should work with .us
+    (or arrays of it) directly, as every operation here allocates a new Timeunit.
+    """
+    __slots__ = ("us",)
+
     def __init__(self, us):
         self.us = int(us)
 
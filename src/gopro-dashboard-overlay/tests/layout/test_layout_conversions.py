@@ -1,6 +1,8 @@
+import numpy as np
 import pytest
 from pint import UndefinedUnitError, DimensionalityError
 
+from gopro_overlay.conversion import conversion_to, magnitudes_in
 from gopro_overlay.layout_xml import Converters, FloatRange
 from gopro_overlay.units import units
 
@@ -145,3 +147,65 @@ def test_spm_conversions_defaults():
     converters = Converters()
     assert converters.converter("spm")(units.Quantity('5 rpm')) == units.Quantity(10, "spm")
     assert converters.converter("spm")(units.Quantity('5.5 rpm')) == units.Quantity(11, "spm")
+
+
+@pytest.mark.parametrize("name,start,expected", [
+    ("mph", speed, lambda q: q.to("MPH")),
+    ("kph", speed, lambda q: q.to("KPH")),
+    ("knots", speed, lambda q: q.to("knot")),
+    ("pace_km", speed, lambda q: (1 / q).to("pace_km")),
+    ("pace_kt", units.Quantity(3.3, units.mps), lambda q: (1 / q).to("pace_kt")),
+    ("spm", units.Quantity(5.5, units.rpm), lambda q: q.to("spm")),
+    ("feet", altitude, lambda q: q.to("international_feet")),
+    ("temp", units.Quantity(55.5, units.degF), lambda q: q.to("degC")),
+    ("G", units.Quantity(12.0, "m/s**2"), lambda q: q.to("gravity")),
+    ("hp", units.Quantity(150.5, units.W), lambda q: q.to("hp")),
+])
+def test_conversions_are_same_as_pint(name, start, expected):
+    actual = converters.converter(name)(start)
+    assert actual.units == expected(start).units
+    assert actual.m == pytest.approx(expected(start).m, rel=1e-14)
+
+
+def test_conversion_to_same_unit_keeps_magnitude():
+    assert type(converters.converter("metres")(units.Quantity(5, units.m)).m) is int
+
+
+def test_pint_conversions_are_made_once():
+    assert converters.converter("hp") is converters.converter("hp")
+
+
+def test_unknown_conversion():
+    with pytest.raises(IOError):
+        converters.converter("not-a-unit")
+
+
+def test_column_is_same_as_each_value():
+    values = [units.Quantity(v, units.mps) for v in [0.0, 0.00000001, 1.5, 10.0]] + [None]
+
+    for name in ["kph", "pace", "knots", "speed"]:
+        conversion = converters.converter(name)
+        magnitudes, present, unit = conversion.column(values)
+        each = [conversion(v) for v in values]
+
+        assert present.tolist() == [v is not None for v in each]
+        assert [m for m, p in zip(magnitudes.tolist(), present) if p] == [v.m for v in each if v is not None]
+        assert all(v.units == unit for v in each if v is not None)
+
+
+def test_column_of_mixed_units_is_not_converted_at_once():
+    conversion = converters.converter("kph")
+
+    assert conversion.column([units.Quantity(1.0, units.mps), units.Quantity(1.0, units.kph)]) is None
+    assert conversion.column([units.Quantity(1, units.mps)]) is None
+
+
+def test_magnitudes_in_a_unit():
+    values = [units.Quantity(1.0, units.km), None, units.Quantity(2, units.m), 3.0]
+
+    magnitudes = magnitudes_in(values, units.m)
+
+    assert magnitudes[0] == pytest.approx(1000.0)
+    assert np.isnan(magnitudes[1])
+    assert magnitudes[2:].tolist() == [2.0, 3.0]
+    assert conversion_to(units.m) is conversion_to(units.m)
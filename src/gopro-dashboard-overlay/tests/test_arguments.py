@@ -225,3 +225,17 @@ def do_args(*args, input: Optional[str] = "input", output: Optional[str] = "outp
     all_args = [a for a in [input, output, *args] if a]
     print(all_args)
     return gopro_dashboard_arguments(all_args)
+
+
+def test_accl_options():
+    assert do_args().accl_decimation == 10
+    assert do_args().accl_filter is None
+    assert do_args("--accl-decimation", "5").accl_decimation == 5
+    assert do_args("--accl-filter", "fir").accl_filter == "fir"
+
+
+def test_accl_options_invalid():
+    with pytest.raises(SystemExit):
+        do_args("--accl-filter", "magic")
+    with pytest.raises(SystemExit):
+        do_args("--accl-decimation", "0")
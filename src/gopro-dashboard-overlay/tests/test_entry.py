@@ -1,6 +1,7 @@
 from datetime import timedelta
 
 from gopro_overlay.entry import Entry
+from gopro_overlay.units import units
 from tests.test_timeseries import datetime_of, metres
 
 
@@ -26,3 +27,41 @@ def test_interpolating_quantity():
     e2 = Entry(datetime_of(10), alt=metres(20))
 
     assert e1.interpolate(e2, datetime_of(1)).alt == metres(11)
+
+
+def test_entry_with_units_makes_quantities_when_used():
+    entry = Entry.with_units(datetime_of(0), speed=10.0, alt=12, packet=3, gpsfix=3)
+
+    assert entry.speed == units.Quantity(10.0, units.mps)
+    assert entry.alt == metres(12)
+    assert entry.packet == units.Quantity(3, units.number)
+    assert entry.gpsfix == 3
+    assert entry.lat is None
+
+
+def test_entry_with_units_items_are_quantities_in_order():
+    entry = Entry.with_units(datetime_of(0), timestamp=1.5, lat=1.0, dop=2.0)
+
+    assert list(entry.items.keys()) == ["timestamp", "lat", "dop"]
+    assert entry.items["timestamp"] == units.Quantity(1.5, units.number)
+    assert entry.items["lat"] == 1.0
+
+
+def test_entry_with_units_update_replaces_raw_value():
+    entry = Entry.with_units(datetime_of(0), speed=10.0)
+    entry.update(speed=units.Quantity(5, units.kph))
+
+    assert entry.speed == units.Quantity(5, units.kph)
+
+
+def test_entry_update_with_units_keeps_numbers():
+    entry = Entry(datetime_of(0), dist=metres(2))
+    entry.update_with_units(dist=5.0, cog=90.0, other=1.0)
+
+    assert entry.dist == metres(5.0)
+    assert entry.cog == units.Quantity(90.0, units.degree)
+    assert entry.other == 1.0
+
+
+def test_entry_is_compact():
+    assert not hasattr(Entry(datetime_of(0), lat=1.0), "__dict__")
@@ -1,5 +1,8 @@
 import dataclasses
+import datetime
 import os
+import sys
+import time
 from io import BytesIO
 from os import stat_result
 from pathlib import Path
@@ -265,6 +268,44 @@ def test_ffmpeg_overlay_execute_options():
     ]
 
 
+
+def test_ffmpeg_overlay_execute_clip():
+    fake = FakeExecution()
+
+    ffmpeg = FFMPEGOverlayVideo(
+        ffmpeg=FFMPEG(),
+        input=Path("input"),
+        output=Path("output"),
+        overlay_size=Dimension(3, 4),
+        execution=fake,
+        creation_time=datetime_of(1231233223.12344),
+        start=timeunits(seconds=30),
+        end=timeunits(seconds=62.5),
+    )
+
+    with ffmpeg.generate():
+        pass
+
+    assert fake.args == [
+        "ffmpeg",
+        "-y",
+        "-hide_banner",
+        "-loglevel", "info",
+        "-ss", "30.000",  # seek input 0 to the start of the clip
+        "-to", "62.500",
+        "-i", "input",  # input 0
+        "-f", "rawvideo",
+        "-framerate", "10.0",
+        "-s", "3x4",
+        "-pix_fmt", "rgba",
+        "-i", "-",  # input 1
+        "-filter_complex", "[0:v][1:v]overlay",  # overlay input 1 on input 0
+        "-vcodec", "libx264",
+        "-preset", "veryfast",
+        '-metadata', 'creation_time=2009-01-06T09:13:43.123440+00:00',
+        "output"
+    ]
+
 mydir = Path(os.path.dirname(__file__))
 top = mydir.parent
 clip = top / "render" / "clip.MP4"
@@ -283,3 +324,23 @@ def test_extract_frame():
 def test_flatten():
     l = ["a", ["b", "c"], "d", ["e", "f", "g"]]
     assert functional.flatten(l) == ["a", "b", "c", "d", "e", "f", "g"]
+
+
+def test_stream_timeout_does_not_count_time_spent_in_callback():
+    python = FFMPEG(binary=sys.executable)
+    chunks = []
+
+    def slow(chunk):
+        time.sleep(0.5)
+        chunks.append(chunk)
+
+    code = "import sys; sys.stdout.buffer.write(bytes(3 * 1024 * 1024))"
+    assert python.stream(["-c", code], cb=slow, timeout=datetime.timedelta(seconds=0.3)) == 0
+    assert sum(len(c) for c in chunks) == 3 * 1024 * 1024
+
+
+def test_stream_times_out_waiting_for_output():
+    python = FFMPEG(binary=sys.executable)
+
+    with pytest.raises(TimeoutError):
+        python.stream(["-c", "import time; time.sleep(0.5)"], cb=lambda c: None, timeout=datetime.timedelta(seconds=0.1))
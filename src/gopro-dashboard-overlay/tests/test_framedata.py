@@ -1,17 +1,23 @@
 import datetime
 import inspect
+import pickle
 from pathlib import Path
+from types import SimpleNamespace
 
 import pytest
 
 from gopro_overlay.dimensions import Dimension
 from gopro_overlay.ffmpeg import FFMPEG
-from gopro_overlay.ffmpeg_gopro import FFMPEGGoPro
+from gopro_overlay.ffmpeg_gopro import FFMPEGGoPro, DataStream, GoproRecording, VideoStream, filestat
 from gopro_overlay.framemeta import FrameMeta
-from gopro_overlay.framemeta_gpmd import gps_framemeta, accl_framemeta, grav_framemeta, cori_framemeta, merge_frame_meta
+from gopro_overlay.framemeta_gpmd import gps_framemeta, accl_framemeta, grav_framemeta, cori_framemeta, merge_frame_meta, \
+    chapters_framemeta, LoadFlag, parse_gopro, clip_devcs, AcclOptions
+from gopro_overlay.gpmf.demux import demultiplex
 from gopro_overlay.gpmf.calc import PacketTimeCalculator
 from gopro_overlay.gpmf.visitors.gps import GPS9EntryConverter, GPS9Visitor
 from gopro_overlay.gpmf.gpmf import GPMD
+from gopro_overlay.loading import GoproLoader
+from gopro_overlay.gpmf.timeindex import DEVCTimeIndex
 from gopro_overlay.timeunits import timeunits
 from gopro_overlay.units import units
 
@@ -153,3 +159,164 @@ def test_loading_gps_and_accl():
     for item in gps_frame_meta.items():
         assert item.accl
         assert item.point
+
+
+def test_stitching_chapters_onto_one_timeline():
+    data = file_path_of_test_asset("accel/rotation-example.gpmd").read_bytes()
+    datastream = DataStream(stream=3, frame_count=44, timebase=1000, frame_duration=1001)
+
+    def chapter(name):
+        recording = SimpleNamespace(location=name, data=datastream, video=SimpleNamespace(duration=timeunits(seconds=60)))
+        # chapters are demultiplexed in worker processes, so must survive pickling
+        return recording, pickle.loads(pickle.dumps(demultiplex(GPMD.parse(data))))
+
+    single = chapters_framemeta([chapter("GX01")], units, flags={LoadFlag.ACCL})
+    stitched = chapters_framemeta([chapter("GX01"), chapter("GX02")], units, flags={LoadFlag.ACCL})
+
+    assert len(stitched) == len(single) * 2
+    assert stitched.min == single.min
+    assert stitched.max == single.max + timeunits(seconds=60)
+
+    second = stitched.get(single.min + timeunits(seconds=60))
+    assert second.timestamp.magnitude == (single.min + timeunits(seconds=60)).millis()
+    assert second.accl == single.get(single.min).accl
+
+
+class GPMDFileFFMPEG(FFMPEG):
+    """Gives the content of a .gpmd file as though it were the data track of a recording"""
+
+    def stream(self, args, cb, timeout=None):
+        cb(Path(args[args.index("-i") + 1]).read_bytes())
+        return 0
+
+
+class GPMDFileGoPro(FFMPEGGoPro):
+    """Chapters are .gpmd files here, each a minute of video - passed to the worker processes, so at module level"""
+
+    def find_recording(self, filepath):
+        return GoproRecording(
+            ffmpeg=self.exe,
+            location=filepath,
+            file=filestat(filepath),
+            audio=None,
+            video=VideoStream(0, Dimension(1920, 1080), timeunits(seconds=60), 1800, 30000, 1001),
+            data=DataStream(stream=3, frame_count=44, timebase=1000, frame_duration=1001)
+        )
+
+
+def test_loading_chapters_in_worker_processes(tmp_path):
+    data = file_path_of_test_asset("accel/rotation-example.gpmd").read_bytes()
+    files = [tmp_path / "GX010001.gpmd", tmp_path / "GX020001.gpmd"]
+    for file in files:
+        file.write_bytes(data)
+
+    loader = GoproLoader(GPMDFileGoPro(GPMDFileFFMPEG()), units, flags={LoadFlag.ACCL})
+    single = loader.load_chapters(files[:1], workers=1).framemeta
+    chapters = loader.load_chapters(files, workers=2)
+
+    assert [r.location for r in chapters.recordings] == files
+    assert len(chapters.framemeta) == len(single) * 2
+    assert chapters.framemeta.max == single.max + timeunits(seconds=60)
+    assert chapters.framemeta.get(single.min + timeunits(seconds=60)).accl == single.get(single.min).accl
+
+
+def test_accl_options_reach_accl_conversion():
+    data = file_path_of_test_asset("accel/rotation-example.gpmd").read_bytes()
+    datastream = DataStream(stream=3, frame_count=44, timebase=1000, frame_duration=1001)
+
+    def accl(options):
+        framemeta = parse_gopro(data, units, datastream, flags={LoadFlag.ACCL}, accl=options)
+        return [e.accl.x.m for e in framemeta.items()]
+
+    default, filtered, every_fifth = accl(AcclOptions()), accl(AcclOptions(low_pass="fir")), accl(AcclOptions(5))
+
+    assert len(default) == len(filtered) == len(every_fifth)
+    assert filtered != default
+    assert every_fifth != default
+
+
+def test_indexing_devcs_by_time():
+    data = file_path_of_test_asset("accel/rotation-example.gpmd").read_bytes()
+    datastream = DataStream(stream=3, frame_count=44, timebase=1000, frame_duration=1001)
+
+    index = DEVCTimeIndex.from_demux(demultiplex(GPMD.lazy(data)), datastream)
+
+    assert len(index) == 44
+    start, end = index.span(10)
+    assert index.span(11)[0] == end
+
+    inside = end - timeunits(millis=1)
+    assert index.devcs_between(start, inside, pad=0) == range(10, 11)
+    assert index.devcs_between(start, inside) == range(9, 12)
+    assert index.devcs_between() == range(0, 44)
+
+
+def test_loading_a_time_range_only_converts_packets_in_range():
+    data = file_path_of_test_asset("accel/rotation-example.gpmd").read_bytes()
+    datastream = DataStream(stream=3, frame_count=44, timebase=1000, frame_duration=1001)
+
+    start, end = timeunits(seconds=10), timeunits(seconds=15)
+
+    whole = parse_gopro(data, units, datastream, flags={LoadFlag.ACCL})
+    part = parse_gopro(data, units, datastream, flags={LoadFlag.ACCL}, start=start, end=end)
+
+    assert len(part) < len(whole) / 4
+    assert part.min <= start
+    assert part.max >= end
+
+    # timings and values are the same as when the whole track is converted
+    for t in part.framelist:
+        assert t in whole.frames
+        assert part.frames[t].point == whole.frames[t].point
+        assert part.frames[t].speed == whole.frames[t].speed
+
+
+def test_clipping_outside_the_track_is_an_error():
+    data = file_path_of_test_asset("accel/rotation-example.gpmd").read_bytes()
+    datastream = DataStream(stream=3, frame_count=44, timebase=1000, frame_duration=1001)
+    index = DEVCTimeIndex.from_demux(demultiplex(GPMD.lazy(data)), datastream)
+
+    assert clip_devcs(index, start=index.end - timeunits(seconds=1)).stop == len(index)
+    assert clip_devcs(index, end=timeunits(seconds=1)).start == 0
+
+    with pytest.raises(ValueError, match="after the end"):
+        clip_devcs(index, start=index.end)
+    with pytest.raises(ValueError, match="before the start"):
+        clip_devcs(index, end=index.start)
+    with pytest.raises(ValueError, match="not after start"):
+        clip_devcs(index, start=timeunits(seconds=5), end=timeunits(seconds=5))
+
+
+def test_loading_part_of_a_recording_keeps_duration_of_whole_track(tmp_path):
+    file = tmp_path / "GX010001.gpmd"
+    file.write_bytes(file_path_of_test_asset("accel/rotation-example.gpmd").read_bytes())
+    loader = GoproLoader(GPMDFileGoPro(GPMDFileFFMPEG()), units, flags={LoadFlag.ACCL})
+
+    whole = loader.load(file)
+    part = loader.load(file, start=timeunits(seconds=10), end=timeunits(seconds=15))
+
+    assert len(part.framemeta) < len(whole.framemeta)
+    assert part.track_duration == whole.track_duration
+    assert part.track_duration.millis() == pytest.approx(whole.framemeta.duration().millis(), abs=1100)
+    assert part.timelapse_correction() == whole.timelapse_correction()
+
+    with pytest.raises(ValueError):
+        loader.load(file, start=timeunits(minutes=2))
+
+
+def test_loading_part_of_a_recording_scales_video_times_to_track_times(tmp_path):
+    file = tmp_path / "GX010001.gpmd"
+    file.write_bytes(file_path_of_test_asset("accel/rotation-example.gpmd").read_bytes())
+    loader = GoproLoader(GPMDFileGoPro(GPMDFileFFMPEG()), units, flags={LoadFlag.ACCL})
+
+    # the "video" is a minute long, but the track is 44 payloads - so here the track runs slower than the video
+    whole = loader.load(file)
+    correction = whole.timelapse_correction()
+    assert correction < 0.8
+
+    start, end = timeunits(seconds=30), timeunits(seconds=40)
+    part = loader.load(file, start=start, end=end).framemeta
+
+    assert part.min <= start * correction
+    assert part.max >= end * correction
+    assert part.max < end
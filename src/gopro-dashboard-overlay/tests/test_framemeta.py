@@ -145,6 +145,46 @@ def test_stepping_through_time():
     assert steps[1] == timeunits(minutes=1)
     assert steps[10] == timeunits(minutes=10)
 
+
+def test_stepping_through_part_of_time():
+    ts = fake.fake_framemeta(timedelta(minutes=10), step=timedelta(seconds=1))
+    stepper = ts.stepper(timeunits(minutes=1), start=timeunits(minutes=2), end=timeunits(minutes=5))
+
+    assert len(stepper) == 4
+    assert list(stepper.steps()) == [timeunits(minutes=m) for m in [2, 3, 4, 5]]
+
+
+def test_stepping_through_time_as_array():
+    ts = fake.fake_framemeta(timedelta(minutes=10), step=timedelta(seconds=1))
+    stepper = ts.stepper(timeunits(millis=333), start=timeunits(seconds=7), end=timeunits(minutes=4))
+
+    assert stepper.steps_us().tolist() == [t.us for t in stepper.steps()]
+    assert len(stepper.steps_us()) == len(stepper)
+    assert ts.framelist_us().tolist() == [t.us for t in ts.framelist]
+
+
+def test_cursor_gets_same_as_get_in_any_direction():
+    ts = fake.fake_framemeta(timedelta(minutes=10), step=timedelta(seconds=1))
+    cursor = ts.cursor()
+
+    forwards = [timeunits(millis=ms) for ms in range(-2000, 602000, 333)]
+    backwards = list(reversed(forwards))[::7]
+    jumps = [timeunits(seconds=s) for s in [5, 400, 3, 3, 601, 0, 599.5]]
+
+    for t in forwards + backwards + jumps:
+        assert cursor.get(t) is ts.get(t)
+
+
+def test_cursor_sees_added_items():
+    fm = FrameMeta()
+    fm.add(timeunits(seconds=1), Entry(datetime_of(1), lat=1.0))
+    cursor = fm.cursor()
+    assert cursor.get(timeunits(seconds=5)).lat == 1.0
+
+    fm.add(timeunits(seconds=3), Entry(datetime_of(3), lat=3.0))
+    assert cursor.get(timeunits(seconds=5)).lat == 3.0
+
+
 def test_skipping_items():
     fm = FrameMeta()
     fm.add(timeunits(seconds=0), Entry(datetime_of(0), lat=1.0))
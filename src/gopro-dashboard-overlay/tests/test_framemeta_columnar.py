@@ -0,0 +1,188 @@
+import random
+from datetime import timedelta
+
+import numpy as np
+import pytest
+
+from gopro_overlay import fake
+from gopro_overlay.entry import Entry
+from gopro_overlay.framemeta import FrameMeta
+from gopro_overlay.framemeta_columnar import ColumnarFrameMeta, asof_indices
+from gopro_overlay.framemeta_gpmd import merge_frame_meta
+from gopro_overlay.point import Point
+from gopro_overlay.timeunits import timeunits
+from gopro_overlay.units import units
+from tests.test_timeseries import datetime_of
+
+
+def same(a, b):
+    # values are stored as floats, so compare them as values, not as strings
+    return a.dt == b.dt and a.items == b.items
+
+
+def fake_pair():
+    fm = fake.fake_framemeta(timedelta(minutes=2), step=timedelta(seconds=0.1), rng=random.Random(7))
+    return fm, ColumnarFrameMeta.from_framemeta(fm)
+
+
+def test_columns_have_one_unit_each():
+    _, columnar = fake_pair()
+
+    assert columnar.column("speed").dtype == np.float64
+    assert columnar.unit("speed") == units.Quantity(1, "mps").units
+    assert columnar.column("point").shape == (len(columnar), 2)
+
+
+def test_get_is_same_as_framemeta():
+    fm, columnar = fake_pair()
+
+    assert len(columnar) == len(fm)
+    assert columnar.min == fm.min
+    assert columnar.max == fm.max
+
+    for ms in range(-1000, 125000, 77):
+        at = timeunits(millis=ms)
+        assert same(columnar.get(at), fm.get(at))
+
+
+def test_items_and_stepper_are_same_as_framemeta():
+    fm, columnar = fake_pair()
+
+    expected = list(fm.items(step=timedelta(seconds=1)))
+    actual = list(columnar.items(step=timedelta(seconds=1)))
+    assert len(actual) == len(expected)
+    assert all(same(a, e) for a, e in zip(actual, expected))
+
+    step = timeunits(seconds=0.1)
+    assert list(columnar.stepper(step).steps()) == list(fm.stepper(step).steps())
+
+
+def test_row_view_reads_like_an_entry():
+    fm = FrameMeta()
+    fm.add(timeunits(seconds=1), Entry(datetime_of(0), point=Point(lat=1.0, lon=2.0), gpsfix=3))
+    fm.add(timeunits(seconds=2), Entry(datetime_of(1), speed=units.Quantity(5, units.mps)))
+
+    columnar = ColumnarFrameMeta.from_framemeta(fm)
+
+    first = columnar.get(timeunits(seconds=1))
+    assert first.dt == datetime_of(0)
+    assert first.point == Point(lat=1.0, lon=2.0)
+    assert first.gpsfix == 3
+    assert first.speed is None
+
+    second = columnar.get(timeunits(seconds=2))
+    assert second.point is None
+    assert second.speed == units.Quantity(5, units.mps)
+
+
+def test_updating_row_view_writes_to_columns():
+    fm, columnar = fake_pair()
+
+    columnar.process(lambda e: {"speed": e.speed * 2, "doubled": units.Quantity(1, units.m)})
+
+    assert np.allclose(columnar.column("speed"), ColumnarFrameMeta.from_framemeta(fm).column("speed") * 2)
+    assert columnar[0].doubled == units.Quantity(1, units.m)
+
+
+def test_round_trip_to_framemeta():
+    fm, columnar = fake_pair()
+
+    back = columnar.to_framemeta()
+
+    assert len(back) == len(fm)
+    assert back.framelist == fm.framelist
+    for t in fm.framelist:
+        assert same(back.frames[t], fm.frames[t])
+
+
+def test_asof_indices():
+    right = np.array([100, 200, 300])
+    left = np.array([0, 100, 140, 160, 200, 300, 400])
+
+    assert asof_indices(left, right, "previous")[0].tolist() == [0, 0, 0, 0, 1, 2, 2]
+    assert asof_indices(left, right, "nearest")[0].tolist() == [0, 0, 0, 1, 1, 2, 2]
+
+    indices, weight = asof_indices(left, right, "linear")
+    assert indices.tolist() == [0, 0, 0, 0, 1, 2, 2]
+    assert weight.tolist() == pytest.approx([0, 0, 0.4, 0.6, 0, 0, 0])
+
+    with pytest.raises(ValueError):
+        asof_indices(left, right, "magic")
+
+
+def test_asof_previous_is_same_as_get():
+    fm, columnar = fake_pair()
+
+    times = np.arange(-1000, 125000, 77) * 1000
+    joined = columnar.asof(times)
+
+    for index, us in enumerate(times.tolist()):
+        assert same(joined[index], fm.get(timeunits(micros=us)))
+
+
+def test_asof_linear_interpolates_floats_only():
+    fm = FrameMeta()
+    fm.add(timeunits(seconds=1), Entry(datetime_of(0), speed=units.Quantity(2.0, units.mps), gpsfix=2))
+    fm.add(timeunits(seconds=2), Entry(datetime_of(1), speed=units.Quantity(4.0, units.mps), gpsfix=3))
+
+    joined = ColumnarFrameMeta.from_framemeta(fm).asof(np.array([1_250_000]), "linear")
+
+    assert joined[0].speed == units.Quantity(2.5, units.mps)
+    assert joined[0].gpsfix == 2
+    assert joined[0].dt == datetime_of(0.25)
+
+
+def test_merging_frame_meta_is_same_as_looking_up_each_item():
+    gps, _ = fake_pair()
+    other = fake.fake_framemeta(timedelta(minutes=2), step=timedelta(seconds=0.35), rng=random.Random(3))
+
+    expected = [other.get(timeunits(millis=item.timestamp.magnitude)).speed for item in gps.items()]
+
+    merge_frame_meta(gps, other, lambda e: {"other_speed": e.speed})
+
+    assert [item.other_speed for item in gps.items()] == expected
+
+
+@pytest.mark.parametrize("mode", ["previous", "nearest", "linear"])
+def test_merging_from_columnar_frame_meta_is_same_as_from_frame_meta(mode):
+    expected, _ = fake_pair()
+    actual, _ = fake_pair()
+    other = fake.fake_framemeta(timedelta(minutes=2), step=timedelta(seconds=0.35), rng=random.Random(3))
+
+    merge_frame_meta(expected, other, lambda e: {"other_speed": e.speed}, mode=mode)
+    merge_frame_meta(actual, ColumnarFrameMeta.from_framemeta(other), lambda e: {"other_speed": e.speed}, mode=mode)
+
+    assert [e.other_speed for e in expected.items()] == [a.other_speed for a in actual.items()]
+
+
+@pytest.mark.parametrize("mode", ["previous", "nearest", "linear"])
+@pytest.mark.parametrize("columnar", [False, True])
+def test_merging_named_fields_is_same_as_merging_with_update(mode, columnar):
+    expected, _ = fake_pair()
+    actual, _ = fake_pair()
+    other = fake.fake_framemeta(timedelta(minutes=2), step=timedelta(seconds=0.35), rng=random.Random(3))
+    source = ColumnarFrameMeta.from_framemeta(other) if columnar else other
+
+    merge_frame_meta(expected, source, lambda e: {"speed": e.speed, "gpsfix": e.gpsfix}, mode=mode)
+    merge_frame_meta(actual, source, mode=mode, fields=("speed", "gpsfix"))
+
+    assert [(e.speed, e.gpsfix) for e in expected.items()] == [(a.speed, a.gpsfix) for a in actual.items()]
+
+
+def test_merging_needs_one_of_update_or_fields():
+    gps, other = fake_pair()
+
+    with pytest.raises(ValueError):
+        merge_frame_meta(gps, other)
+
+    with pytest.raises(ValueError):
+        merge_frame_meta(gps, other, lambda e: {}, fields=("speed",))
+
+
+def test_columns_of_named_fields_only():
+    fm, _ = fake_pair()
+
+    columnar = ColumnarFrameMeta.from_framemeta(fm, names=["speed", "nothing"])
+
+    assert list(columnar.columns) == ["speed"]
+    assert np.allclose(columnar.columns["speed"].magnitudes(units.kph), [e.speed.m_as(units.kph) for e in fm.items()])
@@ -1,6 +1,7 @@
 import datetime
 import inspect
 import os
+import struct
 from array import array
 from pathlib import Path
 from typing import Tuple
@@ -8,10 +9,11 @@ from typing import Tuple
 import pytest
 
 from gopro_overlay.ffmpeg import FFMPEG
-from gopro_overlay.ffmpeg_gopro import GoproRecording, FFMPEGGoPro
+from gopro_overlay.ffmpeg_gopro import GoproRecording, FFMPEGGoPro, DataStream
 from gopro_overlay.gpmf import GPSFix, GPS5, XYZ, GPMDItem, interpret_item
 from gopro_overlay.gpmf.calc import CorrectionFactors, CoriTimestampPacketTimeCalculator, CorrectionFactorsPacketTimeCalculator, CalculateCorrectionFactorsVisitor
-from gopro_overlay.gpmf.gpmf import GPMD, GPS9, QUATERNION
+from gopro_overlay.gpmf.demux import DemuxStreamVisitor, demultiplex, StreamingDemultiplexer
+from gopro_overlay.gpmf.gpmf import GPMD, GPS9, QUATERNION, interpret_array, dispatch_table
 from gopro_overlay.gpmf.visitors.debug import DebuggingVisitor
 from gopro_overlay.gpmf.visitors.find import DetermineTimestampOfFirstSHUTVisitor
 from gopro_overlay.gpmf.visitors.gps import GPS5EntryConverter, GPS5Visitor, DetermineFirstLockedGPSUVisitor
@@ -449,6 +451,62 @@ def test_correction_factors_calculator():
     assert calculator.next_packet(-1000, 20, 20)(0) == (timeunits(millis=2000), timeunits(millis=0))
 
 
+
+def test_correction_factors_calculator_in_bulk():
+    factors = CorrectionFactors(first_frame=timeunits(seconds=1), last_frame=timeunits(seconds=10), frames_s=199.87)
+
+    one_by_one = CorrectionFactorsPacketTimeCalculator(factors)
+    bulk = CorrectionFactorsPacketTimeCalculator(factors)
+
+    for before, count in [(0, 197), (197, 203), (400, 199)]:
+        calculator = one_by_one.next_packet(None, before, count)
+        frame_us, offset_us = bulk.next_packet_us(None, before, count)
+
+        assert frame_us.tolist() == [calculator(i)[0].us for i in range(count)]
+        assert offset_us.tolist() == [calculator(i)[1].us for i in range(count)]
+
+
+def test_cori_timestamp_calculator_in_bulk():
+    one_by_one = CoriTimestampPacketTimeCalculator(timeunits(millis=15))
+    bulk = CoriTimestampPacketTimeCalculator(timeunits(millis=15))
+
+    packets = [(timeunits(millis=20), 18), (timeunits(millis=1021), 18), (timeunits(millis=2023), 17), (timeunits(millis=3024), 18)]
+
+    expected = []
+    for timestamp, count in packets:
+        calculator = one_by_one.next_packet(timestamp, 0, count)
+        expected.extend(calculator(i)[0].us for i in range(count))
+
+    frame_us, _ = bulk.stream_us(packets)
+    assert frame_us.tolist() == expected
+
+
+def test_skipping_packets_keeps_later_timings():
+    packets = [(timeunits(millis=20), 18), (timeunits(millis=1021), 0), (timeunits(millis=2023), 17), (timeunits(millis=3024), 18)]
+
+    converted = CoriTimestampPacketTimeCalculator(timeunits(millis=15))
+    expected, _ = converted.stream_us(packets)
+
+    skipping = CoriTimestampPacketTimeCalculator(timeunits(millis=15))
+    samples = 0
+    for timestamp, count in packets[:3]:
+        # an empty packet has no samples to divide its time between
+        samples = skipping.skip(timestamp, samples, count)
+    assert samples == 35
+
+    frame_us, _ = skipping.next_packet_us(*packets[3], samples)
+    assert frame_us.tolist() == expected[35:].tolist()
+
+
+def test_xyz_converter_skips_empty_packets():
+    converter = XYZComponentConverter(
+        frame_calculator=CoriTimestampPacketTimeCalculator(timeunits(millis=15)), units=units, on_item=lambda c, e: None
+    )
+
+    converter.skip(timeunits(millis=20), 0)
+    converter.skip(timeunits(millis=1021), 18)
+
+
 class CountingVisitor:
     def __init__(self):
         self.count = 0
@@ -468,3 +526,245 @@ class CountingVisitor:
 
 def test_interpreting_strings():
     assert interpret_item(GPMDItem("SIUN", 143, 4, 1, 12, bytes([0x6d, 0x2f, 0x73, 0xb2]))) == "m/s²"
+
+
+def test_parsed_items_are_views_on_the_data():
+    data = bytearray(load_meta("hero6.raw"))
+    meta = GPMD.parse(data)
+
+    dvnm = meta[0].with_type("DVNM")[0]
+    assert isinstance(dvnm.rawdata, memoryview)
+    assert dvnm.rawdata.obj is data
+    assert dvnm.interpret() == "Hero6 Black"
+    assert dvnm.fourcc is meta[0].with_type("DVNM")[0].fourcc
+
+
+def klv(fourcc: bytes, type_char: int, size: int, repeat: int, payload: bytes) -> bytes:
+    return struct.pack(">4sBBH", fourcc, type_char, size, repeat) + payload
+
+
+def test_item_longer_than_the_data_is_an_error():
+    data = klv(b"DVNM", ord("c"), 8, 1, b"Hero")
+
+    with pytest.raises(ValueError, match="DVNM"):
+        GPMD.parse(data)
+    with pytest.raises(ValueError, match="DVNM"):
+        GPMD.lazy(data)
+
+
+def test_item_longer_than_its_container_is_an_error():
+    # the item fits in the data, but not in the DEVC it is in
+    data = klv(b"DEVC", 0, 4, 3, klv(b"DVNM", ord("c"), 8, 1, b"Hero")) + b"Black\0\0\0"
+
+    with pytest.raises(ValueError, match="DVNM"):
+        GPMD.parse(data)
+    with pytest.raises(ValueError, match="DVNM"):
+        GPMD.lazy(data)
+
+
+def test_truncated_stream_is_an_error():
+    data = bytes(load_meta("hero6.raw"))
+
+    demuxer = StreamingDemultiplexer()
+    demuxer.feed(data[:-4])
+    with pytest.raises(ValueError):
+        demuxer.finish()
+
+
+def test_lazy_gpmd_visits_same_items_as_full_parse():
+    data = load_meta("hero6.raw")
+
+    full = GPMD.parse(data).accept(CountingVisitor())
+    lazy = GPMD.lazy(data).accept(CountingVisitor())
+
+    assert full.count == lazy.count
+
+
+def test_lazy_gpmd_only_includes_wanted_streams():
+    gpmd = GPMD.lazy(load_meta("hero6.raw"), fourccs=["GPS5"])
+
+    assert gpmd.index.has("ACCL")
+    assert [s.itemset for s in gpmd[0].with_type("STRM") if "ACCL" in s.itemset] == []
+    assert len(gpmd[0].with_type("STRM")) == 1
+    assert gpmd[0].with_type("DVNM")[0].interpret() == "Hero6 Black"
+
+
+def test_interpreting_xyz_as_array():
+    meta = load("hero6.raw")
+    strm = [s for s in meta[0].with_type("STRM") if "ACCL" in s.itemset][0]
+    scale = strm.with_type("SCAL")[0].interpret()
+    item = strm.with_type("ACCL")[0]
+
+    array = interpret_array(item, scale=scale)
+
+    assert array.shape == (204, 3)
+    assert array[0].tolist() == [9.97846889952153, 0.05502392344497608, 3.145933014354067]
+    assert item.interpret(scale)[0] == XYZ(*array[0].tolist())
+
+
+def test_interpreting_array_with_fewer_scales_than_elements():
+    item = GPMDItem("ACCL", ord("s"), 6, 2, 12, struct.pack(">hhhhhh", 10, 20, 30, 40, 50, 60))
+
+    assert interpret_array(item, scale=(10, 2)).tolist() == [[1.0, 10.0, 30.0], [4.0, 25.0, 60.0]]
+    assert interpret_array(item, scale=(10,)).tolist() == [[1.0, 2.0, 3.0], [4.0, 5.0, 6.0]]
+    assert interpret_array(item, scale=10).tolist() == [[1.0, 2.0, 3.0], [4.0, 5.0, 6.0]]
+
+
+def test_interpreting_gps9_with_mixed_types():
+    types = "lllllllSS"
+    scale = (10000000, 10000000, 1000, 1000, 100, 1, 1000, 100, 1)
+    values = [[331264969, -1173273542, -20184, 167, 19, 8000, 12345678, 606, 3],
+              [331264970, -1173273543, -20185, 168, 20, 8000, 12345778, 607, 2]]
+    packed = b"".join(struct.pack(">lllllllHH", *v) for v in values)
+
+    item = GPMDItem("GPS9", ord("?"), len(packed) // 2, 2, len(packed), packed)
+
+    points = interpret_item(item, scale=scale, types=list(types))
+
+    assert len(points) == 2
+    assert points[1] == GPS9(*[float(v) / s for v, s in zip(values[1], scale)])
+    assert points.array.dtype.kind == "f"
+
+
+def test_demultiplexing_streams_in_one_pass():
+    demux = demultiplex(load("hero6.raw"))
+
+    assert not demux.has("GPS9")
+    assert len(demux.stream("GPS5")) == 1
+
+    accl = demux.stream("ACCL")[0]
+    assert accl.devc == 0
+    assert accl.samples == 204
+    assert accl.samples_total == 806
+    assert accl.scale == (418,)
+    assert accl.item.interpret(accl.scale)[0] == XYZ(x=9.97846889952153, y=0.05502392344497608, z=3.145933014354067)
+
+
+def test_demultiplexed_metadata_is_the_last_of_each_type_in_the_stream():
+    accl = klv(b"ACCL", ord("s"), 6, 1, struct.pack(">hhh", 1, 2, 3) + b"\0\0")
+    strm = klv(b"SCAL", ord("s"), 2, 1, struct.pack(">h", 10) + b"\0\0") \
+        + klv(b"SCAL", ord("s"), 2, 1, struct.pack(">h", 20) + b"\0\0") \
+        + accl
+    data = klv(b"DEVC", 0, 4, (len(strm) + 8) // 4, klv(b"STRM", 0, 4, len(strm) // 4, strm))
+
+    packet = demultiplex(GPMD.parse(data)).stream("ACCL")[0]
+
+    assert packet.metadata["SCAL"].interpret() == (20,)
+
+
+def test_demultiplexed_shut_timestamp_matches_visitor():
+    meta = load("accel/rotation-example.gpmd")
+
+    assert demultiplex(meta).first_shut_timestamp == meta.accept(DetermineTimestampOfFirstSHUTVisitor()).timestamp
+
+
+def test_dispatch_table_is_compiled_once_per_visitor_class():
+    assert dispatch_table(GPS5Visitor(converter=None)) is dispatch_table(GPS5Visitor(converter=None))
+    assert set(dispatch_table(DetermineTimestampOfFirstSHUTVisitor()).containers) == {"DEVC", "STRM"}
+
+
+def test_correction_factors_table_is_compiled_once_per_packet_type():
+    datastream = DataStream(3, 10, 1000, 1001)
+
+    accl = dispatch_table(CalculateCorrectionFactorsVisitor("ACCL", datastream))
+
+    assert dispatch_table(CalculateCorrectionFactorsVisitor("ACCL", datastream)) is accl
+    assert dispatch_table(CalculateCorrectionFactorsVisitor("GYRO", datastream)) is not accl
+    assert list(dispatch_table(CalculateCorrectionFactorsVisitor("GYRO", datastream)).items) == ["GYRO"]
+
+
+def test_demux_streams_share_one_table_with_a_default_handler():
+    table = dispatch_table(DemuxStreamVisitor(0, {"ACCL"}, on_end=None))
+
+    assert table is dispatch_table(DemuxStreamVisitor(1, {"GYRO"}, on_end=None))
+    assert table.default is not None
+    assert not table.containers
+
+
+def test_dispatch_to_visitors_with_dynamic_handlers():
+    index = GPMD.lazy(load_meta("hero6.raw")).index
+
+    assert load("hero6.raw").accept(CountingVisitor()).count == len([e for e in index.entries if not e.is_container])
+    assert len(dispatch_table(CalculateCorrectionFactorsVisitor("ACCL", DataStream(3, 10, 1000, 1001))).items) == 1
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 1000, 1024 * 1024])
+def test_streaming_demultiplex_matches_whole_track(chunk_size):
+    data = bytes(load_meta("accel/rotation-example.gpmd"))
+
+    demuxer = StreamingDemultiplexer()
+    for start in range(0, len(data), chunk_size):
+        demuxer.feed(data[start:start + chunk_size])
+    streamed = demuxer.finish()
+
+    whole = demultiplex(GPMD.parse(data))
+
+    assert streamed.packets.keys() == whole.packets.keys()
+    for fourcc in whole.packets:
+        assert [(p.devc, p.timestamp, bytes(p.item.rawdata)) for p in streamed.stream(fourcc)] == \
+               [(p.devc, p.timestamp, bytes(p.item.rawdata)) for p in whole.stream(fourcc)]
+
+
+def test_interpreting_simple_image_streams_as_arrays():
+    wbal = GPMDItem("WBAL", ord("S"), 2, 3, 8, struct.pack(">HHH", 5100, 5200, 5300) + b"\0\0")
+    assert interpret_item(wbal).tolist() == [[5100.0], [5200.0], [5300.0]]
+
+    wrgb = GPMDItem("WRGB", ord("f"), 12, 1, 12, struct.pack(">fff", 1.5, 1.0, 2.0))
+    assert interpret_item(wrgb).tolist() == [[1.5, 1.0, 2.0]]
+
+    unif = GPMDItem("UNIF", ord("B"), 1, 2, 4, bytes([255, 51, 0, 0]))
+    assert interpret_item(unif, scale=(255,)).tolist() == [[1.0], [0.2]]
+
+
+def test_interpreting_compound_scene_classification():
+    scenes = [(b"SNOW", 0.25), (b"URBA", 0.5), (b"INDO", 0.125)]
+    sample = b"".join(struct.pack(">4sf", f, p) for f, p in scenes)
+    scen = GPMDItem("SCEN", ord("?"), len(sample), 2, len(sample) * 2, sample * 2)
+
+    records = interpret_item(scen, types=list("Ff"))
+
+    assert records.shape == (2, 3)
+    assert records[1, 1]["f0"] == b"URBA"
+    assert records[1, 1]["f1"] == 0.5
+
+
+def stream_of(fourcc: bytes, types: bytes, sample: bytes, repeat: int) -> bytes:
+    strm = klv(b"TYPE", ord("c"), 1, len(types), types + b"\0" * (-len(types) % 4)) \
+        + klv(fourcc, ord("?"), len(sample), repeat, sample * repeat + b"\0" * (-(len(sample) * repeat) % 4))
+    return klv(b"DEVC", 0, 4, (len(strm) + 8) // 4, klv(b"STRM", 0, 4, len(strm) // 4, strm))
+
+
+def test_interpreting_scene_classification_with_the_type_of_its_stream():
+    sample = b"".join(struct.pack(">4sf", f, p) for f, p in [(b"SNOW", 0.25), (b"URBA", 0.5)])
+
+    packet = demultiplex(GPMD.parse(stream_of(b"SCEN", b"Ff", sample, 3)), wanted={"SCEN"}).stream("SCEN")[0]
+
+    with pytest.raises(ValueError):
+        packet.item.interpret()
+
+    records = packet.item.interpret(types=packet.types)
+    assert records.shape == (3, 2)
+    assert records[2, 1]["f0"] == b"URBA"
+    assert records[2, 1]["f1"] == 0.5
+    assert (packet.interpret() == records).all()
+
+
+def test_interpreting_hues_with_the_type_of_their_stream():
+    sample = struct.pack(">BBBB", 10, 100, 200, 50)
+
+    packet = demultiplex(GPMD.parse(stream_of(b"HUES", b"BB", sample, 2)), wanted={"HUES"}).stream("HUES")[0]
+
+    records = packet.interpret()
+    assert records.shape == (2, 2)
+    assert records[1]["f0"].tolist() == [10.0, 200.0]
+    assert records[1]["f1"].tolist() == [100.0, 50.0]
+
+
+def test_interpreting_wind_and_water_gives_tuples():
+    assert interpret_item(GPMDItem("WNDM", ord("B"), 1, 4, 4, bytes([1, 2, 3, 4]))) == (1, 2, 3, 4)
+    assert interpret_item(GPMDItem("MWET", ord("B"), 1, 3, 4, bytes([1, 0, 1, 0]))) == (1, 0, 1)
+
+
+def test_interpreting_types_with_counts():
+    item = GPMDItem("TYPE", ord("c"), 1, 4, 4, b"f[3]")
+    assert interpret_item(item) == ["f", "f", "f"]
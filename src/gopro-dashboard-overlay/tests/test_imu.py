@@ -0,0 +1,115 @@
+import numpy as np
+import pytest
+
+from gopro_overlay.ffmpeg_gopro import DataStream
+from gopro_overlay.framemeta import FrameMeta
+from gopro_overlay.gpmf.calc import timestamp_calculator_for_packet_type
+from gopro_overlay.gpmf.demux import demultiplex
+from gopro_overlay.gpmf.gpmf import GPMD
+from gopro_overlay.gpmf.visitors.xyz import XYZComponentConverter, xyz_components, xyz_counter
+from gopro_overlay.imu import imu_columns, accl_entries, lowpass_taps, fir_lowpass, IMUColumns
+from gopro_overlay.units import units
+from tests.test_gpmd import path_of_meta
+
+datastream = DataStream(stream=3, frame_count=44, timebase=1000, frame_duration=1001)
+
+
+def load_demux():
+    return demultiplex(GPMD.lazy(path_of_meta("accel/rotation-example.gpmd").read_bytes()))
+
+
+def columns_of(xyz: np.ndarray, rate=200) -> IMUColumns:
+    n = len(xyz)
+    index = np.arange(n, dtype=np.int64)
+    return IMUColumns("ACCL", "m/s²", index * 1_000_000 // rate, xyz, np.zeros(n, dtype=np.int64), index)
+
+
+def test_full_rate_columns_have_every_sample():
+    demux = load_demux()
+    columns = imu_columns(demux, timestamp_calculator_for_packet_type(demux, datastream, "ACCL"))
+
+    assert len(columns) == sum(p.samples for p in demux.stream("ACCL"))
+    assert columns.xyz.shape == (len(columns), 3)
+    assert columns.time_us[0] < columns.time_us[-1]
+    assert columns.rate == pytest.approx(200, rel=0.05)
+
+
+def test_unfiltered_decimation_is_same_as_converter():
+    demux = load_demux()
+
+    expected = FrameMeta()
+    converter = XYZComponentConverter(
+        frame_calculator=timestamp_calculator_for_packet_type(demux, datastream, "ACCL"),
+        units=units,
+        on_item=expected.add,
+    )
+    for packet in demux.stream("ACCL"):
+        converter.convert(xyz_counter(packet), xyz_components(packet))
+
+    actual = FrameMeta()
+    columns = imu_columns(demux, timestamp_calculator_for_packet_type(demux, datastream, "ACCL"))
+    accl_entries(columns.decimate(10, low_pass=None), units, on_item=actual.add)
+
+    assert actual.framelist == expected.framelist
+    for t in expected.framelist:
+        assert actual.frames[t].items == expected.frames[t].items
+
+
+def test_converter_decimation_is_configurable():
+    demux = load_demux()
+
+    def converted(decimation):
+        framemeta = FrameMeta()
+        converter = XYZComponentConverter(
+            frame_calculator=timestamp_calculator_for_packet_type(demux, datastream, "ACCL"),
+            units=units,
+            on_item=framemeta.add,
+            decimation=decimation,
+        )
+        for packet in demux.stream("ACCL"):
+            converter.convert(xyz_counter(packet), xyz_components(packet))
+        return framemeta
+
+    assert len(converted(1)) == sum(p.samples for p in demux.stream("ACCL"))
+    assert len(converted(5)) == pytest.approx(len(converted(10)) * 2, abs=len(demux.stream("ACCL")))
+
+
+def test_lowpass_taps_have_unity_gain():
+    taps = lowpass_taps(0.05)
+    assert taps.sum() == pytest.approx(1)
+    assert np.allclose(taps, taps[::-1])
+
+
+def test_fir_filter_removes_aliasing_vibration():
+    t = np.arange(2000) / 200
+    slow = np.sin(2 * np.pi * 0.5 * t)
+    # 95Hz vibration would alias to 5Hz when decimated to 20Hz
+    vibration = np.sin(2 * np.pi * 95 * t)
+    xyz = np.column_stack([slow + vibration, slow, np.ones_like(t)])
+
+    unfiltered = columns_of(xyz).decimate(10, low_pass=None)
+    filtered = columns_of(xyz).decimate(10, low_pass="fir")
+
+    assert np.abs(unfiltered.xyz[:, 0] - unfiltered.xyz[:, 1]).max() > 0.5
+    assert np.abs(filtered.xyz[:, 0] - filtered.xyz[:, 1]).max() < 0.05
+    assert np.allclose(filtered.xyz[:, 2], 1)
+
+
+def test_fir_filter_keeps_shape():
+    xyz = np.random.default_rng(1).normal(size=(500, 3))
+    assert fir_lowpass(xyz, 0.1).shape == xyz.shape
+
+
+def test_iir_filter_removes_vibration():
+    pytest.importorskip("scipy")
+
+    t = np.arange(2000) / 200
+    xyz = np.column_stack([np.sin(2 * np.pi * 95 * t)] * 3)
+
+    filtered = columns_of(xyz).decimate(10, low_pass="iir")
+    assert np.abs(filtered.xyz).max() < 0.05
+
+
+def test_unknown_filter():
+    with pytest.raises(ValueError):
+        columns_of(np.zeros((100, 3))).decimate(10, low_pass="magic")
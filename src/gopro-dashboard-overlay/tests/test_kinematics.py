@@ -0,0 +1,117 @@
+import random
+from datetime import timedelta
+
+import numpy as np
+import pytest
+from geographiclib.geodesic import Geodesic
+
+from gopro_overlay import fake, timeseries_process
+from gopro_overlay.entry import Entry
+from gopro_overlay.framemeta import FrameMeta
+from gopro_overlay.kinematics import inverse, process_kinematics, Track
+from gopro_overlay.point import Point
+from gopro_overlay.timeunits import timeunits
+from gopro_overlay.units import units
+from tests.test_timeseries import datetime_of
+
+
+def random_pairs(count, spread):
+    rng = np.random.default_rng(1)
+    lat1 = rng.uniform(-80, 80, count)
+    lon1 = rng.uniform(-180, 180, count)
+    return lat1, lon1, lat1 + rng.uniform(-spread, spread, count), lon1 + rng.uniform(-spread, spread, count)
+
+
+def geographiclib(lat1, lon1, lat2, lon2):
+    results = [Geodesic.WGS84.Inverse(*p) for p in zip(lat1, lon1, lat2, lon2)]
+    return np.array([r["s12"] for r in results]), np.array([r["azi1"] for r in results])
+
+
+@pytest.mark.parametrize("spread", [0.0001, 0.01, 5])
+def test_vincenty_is_same_as_geographiclib(spread):
+    points = random_pairs(1000, spread)
+
+    dist, azi = inverse(*points)
+    expected_dist, expected_azi = geographiclib(*points)
+
+    assert np.abs(dist - expected_dist).max() < 0.001
+    assert np.abs(azi - expected_azi).max() < 1e-5
+
+
+def test_haversine_is_close():
+    points = random_pairs(1000, 0.01)
+
+    dist, _ = inverse(*points, method="haversine")
+    expected_dist, _ = geographiclib(*points)
+
+    assert np.allclose(dist, expected_dist, rtol=0.006)
+
+
+def test_exact_is_geographiclib():
+    points = random_pairs(50, 0.01)
+    assert np.array_equal(inverse(*points, method="exact")[0], geographiclib(*points)[0])
+
+
+def test_same_point_is_same_as_geographiclib():
+    lat = np.array([51.5, -33.9, 0.0])
+    lon = np.array([-0.1, 18.4, 0.0])
+
+    dist, azi = inverse(lat, lon, lat, lon)
+
+    assert dist.tolist() == [0, 0, 0]
+    assert azi.tolist() == geographiclib(lat, lon, lat, lon)[1].tolist()
+
+
+def test_unknown_method():
+    with pytest.raises(ValueError):
+        inverse(0, 0, 1, 1, method="flat")
+
+
+def test_process_delta_speeds():
+    fm = FrameMeta()
+    fm.add(timeunits(seconds=1), Entry(datetime_of(1), point=Point(51.50186, -0.14056)))
+    fm.add(timeunits(seconds=61), Entry(datetime_of(61), point=Point(51.50665, -0.12895)))
+
+    process_kinematics(fm, skip=1, accel_skip=1)
+
+    entry = fm.get(timeunits(seconds=1))
+    assert entry.time == units.Quantity(60, units.s)
+    assert "{0.magnitude:.2f} {0.units}".format(entry.dist) == "966.36 meter"
+    assert "{0.magnitude:.2f} {0.units:~P}".format(entry.cspeed) == "16.11 m/s"
+    assert "{0.magnitude:.2f} {0.units:~P}".format(entry.azi) == "56.53 deg"
+    assert "{0.magnitude:.2f} {0.units:~P}".format(entry.cog) == "56.53 deg"
+    assert entry.codo == entry.dist
+
+
+def test_exact_kinematics_are_same_as_processing_each_entry():
+    def make():
+        return fake.fake_framemeta(timedelta(minutes=3), step=timedelta(seconds=0.1), rng=random.Random(5))
+
+    every_other = lambda e: int(e.dt.timestamp() * 10) % 7 != 0
+
+    expected = make()
+    expected.process_deltas(timeseries_process.calculate_speeds(), skip=54, filter_fn=every_other)
+    expected.process(timeseries_process.calculate_odo(), filter_fn=every_other)
+    expected.process_accel(timeseries_process.calculate_accel(), skip=54)
+    expected.process_deltas(timeseries_process.calculate_gradient(), skip=54)
+
+    actual = make()
+    process_kinematics(actual, skip=54, accel_skip=54, speed_filter=every_other, method="exact")
+
+    for e, a in zip(expected.frames.values(), actual.frames.values()):
+        assert e.items.keys() == a.items.keys()
+        for key in ["cspeed", "dist", "time", "azi", "cog", "codo", "accel", "cgrad", "grad_dist"]:
+            if e.items.get(key) is not None and e.items[key].m != 0:
+                assert e.items[key] == a.items[key]
+
+
+def test_track_pairs_are_both_in_mask():
+    fm = fake.fake_framemeta(timedelta(seconds=10), step=timedelta(seconds=1))
+    track = Track.of(fm)
+
+    mask = np.ones(len(track), dtype=bool)
+    mask[3] = False
+
+    a, b = track.pairs(2, mask)
+    assert a.tolist() == [0, 2, 4, 5, 6, 7, 8]
+    assert (b - a).tolist() == [2] * 7
@@ -0,0 +1,160 @@
+import random
+from datetime import timedelta
+
+import numpy as np
+import pint
+import pytest
+
+from gopro_overlay import fake, fit, timeseries_process
+from gopro_overlay.entry import Entry
+from gopro_overlay.framemeta import FrameMeta
+from gopro_overlay.gpmf import GPS_FIXED_VALUES, GPSFix
+from gopro_overlay.kinematics import Track
+from gopro_overlay.pipeline import Pipeline, Stage, accel, gopro_processing, odo, speeds
+from gopro_overlay.point import Point
+from gopro_overlay.timeunits import timeunits
+from gopro_overlay.units import units
+from tests.test_gpx import file_path_of_test_asset
+
+
+def framemeta_with_some_lock():
+    framemeta = fake.fake_framemeta(timedelta(minutes=2), step=timedelta(seconds=0.1), rng=random.Random(3))
+    rng = random.Random(9)
+    for entry in framemeta.frames.values():
+        entry.update(gpsfix=rng.choice([0, 2, 3, 3, 3, None]))
+    return framemeta
+
+
+def same_value(expected, actual):
+    if isinstance(expected, pint.Quantity):
+        if not isinstance(actual, pint.Quantity):
+            return False
+        return actual.m_as(expected.units) == pytest.approx(expected.m, rel=1e-7, abs=1e-7)
+    if isinstance(expected, Point):
+        return (actual.lat, actual.lon) == pytest.approx((expected.lat, expected.lon), abs=1e-9)
+    if isinstance(expected, float):
+        return actual == pytest.approx(expected, rel=1e-7, abs=1e-7)
+    return actual == expected
+
+
+def test_gopro_processing_is_same_as_processing_each_entry():
+    # the processing gopro-dashboard did, entry by entry, with the closures in timeseries_process
+    locked_2d = lambda e: e.gpsfix in GPS_FIXED_VALUES
+    locked_3d = lambda e: e.gpsfix == GPSFix.LOCK_3D.value
+    packets_per_second = 10
+
+    expected = framemeta_with_some_lock()
+    expected.process(timeseries_process.process_ses("point", lambda i: i.point, alpha=0.45), filter_fn=locked_2d)
+    expected.process_deltas(timeseries_process.calculate_speeds(), skip=packets_per_second * 3, filter_fn=locked_2d)
+    expected.process(timeseries_process.calculate_odo(), filter_fn=locked_2d)
+    expected.process_accel(timeseries_process.calculate_accel(), skip=18 * 3)
+    expected.process_deltas(timeseries_process.calculate_gradient(), skip=packets_per_second * 3, filter_fn=locked_3d)
+    expected.process(timeseries_process.process_kalman("speed", lambda e: e.speed))
+    expected.process(timeseries_process.filter_locked())
+
+    actual = framemeta_with_some_lock()
+    gopro_processing(packets_per_second=packets_per_second).run(actual)
+
+    for e, a in zip(expected.frames.values(), actual.frames.values()):
+        assert e.items.keys() == a.items.keys()
+        for key, value in e.items.items():
+            assert same_value(value, a.items[key]), f"{key} {value} {a.items[key]}"
+
+
+def framemeta_of(entries):
+    framemeta = FrameMeta()
+    for entry in entries:
+        framemeta.add(timeunits(seconds=(entry.dt - entries[0].dt).total_seconds()), Entry(entry.dt, **entry.items))
+    return framemeta
+
+
+def test_accel_is_zero_where_speeds_are_missing():
+    # the first 200 points of this file have no speed at 0 and 18, and a speed of 0 at 119-122
+    entries = fit.load_timeseries(file_path_of_test_asset("fit-file-no-power.fit", in_dir="fit"), units).items()[:200]
+
+    expected = framemeta_of(entries)
+    expected.process_accel(timeseries_process.calculate_accel(), skip=3)
+
+    actual = framemeta_of(entries)
+    Pipeline([accel(3)]).run(actual)
+
+    missing = 0
+    for e, a in zip(expected.frames.values(), actual.frames.values()):
+        if e.accel is None:
+            assert a.accel is None
+        elif e.accel.units == units.mps:
+            # the entry by entry closure gave these as 0 m/s - they are now 0 m/s^2, as every other accel is
+            assert a.accel == units.Quantity(0, "m/s^2")
+            missing += 1
+        else:
+            assert same_value(e.accel, a.accel)
+
+    assert missing == 10
+
+
+def test_stage_is_skipped_when_the_data_does_not_have_what_it_needs():
+    framemeta = fake.fake_framemeta(timedelta(seconds=10), step=timedelta(seconds=1))
+    for entry in framemeta.frames.values():
+        entry.items.pop("speed", None)
+    seen = []
+
+    report = Pipeline([
+        Stage("use speed", lambda track, mask: seen.append("speed"), needs=("speed",), makes=("made",)),
+        Stage("use made", lambda track, mask: seen.append("made"), needs=("made",)),
+        Stage("use point", lambda track, mask: seen.append("point"), needs=("point",)),
+    ]).run(framemeta)
+
+    assert seen == ["point"]
+    assert [t.name for t in report] == ["gather", "masks", "use point", "write"]
+
+
+def test_report_has_timer_for_each_stage():
+    pipeline = gopro_processing(packets_per_second=10)
+    report = pipeline.run(framemeta_with_some_lock())
+
+    assert [t.name for t in report] == [
+        "gather", "masks",
+        "smooth point", "speeds", "odo", "accel", "gradient", "smooth speed", "filter locked",
+        "write"
+    ]
+    assert report is pipeline.report
+
+
+def test_stages_must_have_what_they_need():
+    with pytest.raises(ValueError):
+        Pipeline([Stage("use speeds", lambda track, mask: None, needs=("cspeed",)), speeds(skip=1)])
+
+    Pipeline([speeds(skip=1), Stage("use speeds", lambda track, mask: None, needs=("cspeed",)), odo()])
+
+
+def test_stages_must_use_known_masks():
+    with pytest.raises(ValueError):
+        Pipeline([speeds(skip=1, mask="locked_4d")])
+
+
+def test_mask_is_given_to_stage():
+    framemeta = framemeta_with_some_lock()
+    seen = []
+
+    Pipeline(
+        [Stage("look", lambda track, mask: seen.append(mask), mask="odd")],
+        named_masks={"odd": lambda track: np.arange(len(track)) % 2 == 1}
+    ).run(framemeta)
+
+    assert seen[0].tolist() == [i % 2 == 1 for i in range(len(framemeta))]
+
+
+def test_track_writes_each_entry_once_with_later_values_winning():
+    framemeta = fake.fake_framemeta(timedelta(seconds=5), step=timedelta(seconds=1))
+    track = Track.of(framemeta)
+
+    track.set(np.array([0, 1, 2]), grad_dist=np.array([1.0, 2.0, 3.0]), tag=7)
+    track.set(np.array([1]), grad_dist=None)
+
+    assert framemeta.get(framemeta.min).grad_dist is None
+
+    track.write()
+
+    entries = [framemeta.frames[t] for t in framemeta.framelist]
+    assert [e.grad_dist.m if e.grad_dist is not None else None for e in entries[:4]] == [1.0, None, 3.0, None]
+    assert [e.tag for e in entries[:4]] == [7, 7, 7, None]
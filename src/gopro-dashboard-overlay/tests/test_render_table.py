@@ -0,0 +1,78 @@
+import random
+from datetime import timedelta
+
+from gopro_overlay import fake
+from gopro_overlay.entry import Entry
+from gopro_overlay.framemeta import FrameMeta
+from gopro_overlay.layout_components import metric_value
+from gopro_overlay.layout_xml import Converters, metric_accessor_from
+from gopro_overlay.render_table import RenderTable, RenderColumn
+from gopro_overlay.timeunits import timeunits
+from gopro_overlay.units import units
+from tests.test_timeseries import datetime_of
+
+converters = Converters()
+
+
+def values_of(framemeta, name, unit, formatter=lambda q: f"{q.m:.3f} {q.u}"):
+    stepper = framemeta.stepper(timeunits(seconds=0.1))
+    table = RenderTable(framemeta, stepper.steps_us())
+
+    current = {}
+    entry = lambda: current["entry"]
+
+    accessor = metric_accessor_from(name)
+    converter = converters.converter(unit)
+
+    live = metric_value(entry, accessor, converter, formatter)
+    tabled = metric_value(entry, accessor, converter, formatter, table=table, key=(name, unit))
+
+    for step in stepper.steps():
+        current["entry"] = framemeta.get(step)
+        table.at(step)
+        yield live(), tabled()
+
+
+def test_table_gives_same_as_live():
+    framemeta = fake.fake_framemeta(timedelta(minutes=2), step=timedelta(seconds=1), rng=random.Random(4))
+
+    for name, unit in [("speed", "kph"), ("speed", "pace_km"), ("alt", "feet"), ("hr", None), ("cadence", None)]:
+        for live, tabled in values_of(framemeta, name, unit):
+            assert live == tabled
+
+
+def test_missing_values_use_default():
+    framemeta = FrameMeta()
+    framemeta.add(timeunits(seconds=0), Entry(datetime_of(0), speed=units.Quantity(1, units.mps)))
+    framemeta.add(timeunits(seconds=1), Entry(datetime_of(1)))
+
+    assert [tabled for _, tabled in values_of(framemeta, "hr", None)] == ["-"] * 11
+
+
+def test_times_off_the_timeline_are_looked_up():
+    framemeta = fake.fake_framemeta(timedelta(minutes=1), step=timedelta(seconds=1), rng=random.Random(4))
+    table = RenderTable(framemeta, framemeta.stepper(timeunits(seconds=1)).steps_us())
+
+    at = timeunits(seconds=10.5)
+    reading = table.reading(("alt", None), lambda: framemeta.get(at), metric_accessor_from("alt"), lambda q: q)
+
+    table.at(at)
+    assert reading() == framemeta.get(at).alt
+
+
+def test_column_keeps_magnitudes_in_an_array():
+    column = RenderColumn([units.Quantity(1.5, units.m), None, units.Quantity(2.5, units.m)])
+
+    assert column.magnitudes.tolist() == [1.5, 0, 2.5]
+    assert column.present.tolist() == [True, False, True]
+    assert column[0].m == 1.5
+    assert column[0].u == units.m
+    assert column[1] is None
+
+
+def test_column_with_mixed_units_keeps_values():
+    values = [units.Quantity(1.5, units.m), units.Quantity(2, units.km)]
+    column = RenderColumn(values)
+
+    assert column.magnitudes is None
+    assert column[1] is values[1]
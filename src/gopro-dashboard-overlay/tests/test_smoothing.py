@@ -1,6 +1,12 @@
+import random
+from datetime import timedelta
+
+import numpy as np
 import pytest
 
-from gopro_overlay.smoothing import SimpleExponential, Kalman
+from gopro_overlay import fake
+from gopro_overlay.smoothing import SimpleExponential, Kalman, kalman, simple_exponential
+from gopro_overlay.timeseries_process import process_ses, process_kalman, smooth_ses, smooth_kalman
 from gopro_overlay.units import units
 
 
@@ -32,3 +38,53 @@ def test_kalman_units_and_nones():
     assert k.update(units.Quantity(1, "mps")).m == pytest.approx(0.2366, abs=0.001)
     assert k.update(None).m == pytest.approx(0.1878, abs=0.001)
     assert k.update(units.Quantity(1, "mps")).m == pytest.approx(0.3783, abs=0.001)
+
+
+def scalar(f, values):
+    return np.array([f.update(None if np.isnan(v) else v) for v in values])
+
+
+def test_kalman_array_is_same_as_kalman():
+    values = np.random.default_rng(1).normal(size=10000) * 5 + 3
+    values[[0, 10, 500]] = np.nan
+
+    assert kalman(values) == pytest.approx(scalar(Kalman(), values), rel=1e-12)
+    assert kalman([1.0, 2.0, 3.0, -1.0]).tolist() == [1.0, 1.0909090909090908, 1.3969465648854962, 0.9018776499091459]
+
+
+def test_ses_array_is_same_as_ses():
+    values = np.random.default_rng(2).normal(size=10000) * 5 + 3
+
+    assert simple_exponential(values, alpha=0.3) == pytest.approx(scalar(SimpleExponential(alpha=0.3), values), rel=1e-12)
+    assert simple_exponential([3.0, 5.0, 9.0, 20.0]) == pytest.approx([3.0, 3.0, 3.8, 5.88])
+
+
+def test_ses_array_passes_through_until_forecast_is_not_zero():
+    values = np.array([0.0, np.nan, 0.0, 4.0, 2.0, 8.0])
+
+    assert simple_exponential(values) == pytest.approx(scalar(SimpleExponential(), values))
+    assert simple_exponential(values, reset_on_zero=False)[:4].tolist() == [0.0, 0.0, 0.0, 0.0]
+
+
+def test_smoothing_arrays_of_nothing():
+    assert len(kalman([])) == 0
+    assert len(simple_exponential([])) == 0
+
+
+def test_smoothing_framemeta_is_same_as_processing_each_entry():
+    def make():
+        return fake.fake_framemeta(timedelta(minutes=2), step=timedelta(seconds=0.1), rng=random.Random(3))
+
+    expected = make()
+    expected.process(process_ses("point", lambda e: e.point, alpha=0.45))
+    expected.process(process_kalman("speed", lambda e: e.speed))
+
+    actual = make()
+    smooth_ses(actual, "point", lambda e: e.point, alpha=0.45)
+    smooth_kalman(actual, "speed", lambda e: e.speed)
+
+    for e, a in zip(expected.frames.values(), actual.frames.values()):
+        assert a.point.lat == pytest.approx(e.point.lat, rel=1e-12)
+        assert a.point.lon == pytest.approx(e.point.lon, rel=1e-12)
+        assert a.speed.units == e.speed.units
+        assert a.speed.m == pytest.approx(e.speed.m, rel=1e-12)
@@ -55,3 +55,7 @@ def test_dict_keys():
         timeunits(seconds=1): "goodbye",
     }
     assert a[timeunits(seconds=10)] == "hello"
+
+
+def test_is_small():
+    assert not hasattr(timeunits(seconds=1), "__dict__")
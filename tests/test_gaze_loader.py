@@ -0,0 +1,236 @@
+import datetime
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from src.GazeData.loader import TimeIndexedColumns, join_framemeta, load_csv, load_glasses_data
+
+# the overlay isn't installed as a package, it is used from its own directory
+sys.path.append(str(Path(__file__).parents[1] / "src" / "gopro-dashboard-overlay"))
+
+
+def gaze():
+    return TimeIndexedColumns(
+        "gaze",
+        np.array([100, 200, 300, 400]),
+        {
+            "x": np.array([1.0, 2.0, 3.0, 4.0]),
+            "blink": np.array([0, 1, 0, 1]),
+            "worn": np.array([True, False, True, True]),
+            "label": np.array(["a", "b", "c", "d"]),
+        },
+        {"x": "px"}
+    )
+
+
+def test_samples_are_sorted_by_timestamp():
+    data = TimeIndexedColumns("d", np.array([300, 100, 200]), {"v": np.array([3, 1, 2])})
+
+    assert data.timestamps.tolist() == [100, 200, 300]
+    assert data["v"].tolist() == [1, 2, 3]
+    assert (data.start, data.end) == (100, 300)
+
+
+def test_columns_must_match_timestamps():
+    with pytest.raises(ValueError):
+        TimeIndexedColumns("d", np.array([1, 2]), {"v": np.array([1.0])})
+
+
+def test_index_range_is_inclusive():
+    data = gaze()
+
+    assert data.index_range(200, 300) == (1, 3)
+    assert data.index_range(150, 350) == (1, 3)
+    assert data.index_range(0, 50) == (0, 0)
+    assert data.index_range(500, 600) == (4, 4)
+
+
+def test_between():
+    data = gaze().between(200, 350)
+
+    assert data.timestamps.tolist() == [200, 300]
+    assert data["x"].tolist() == [2.0, 3.0]
+    assert data["label"].tolist() == ["b", "c"]
+    assert data.units == {"x": "px"}
+
+
+def test_between_shares_data():
+    data = gaze()
+    data.between(200, 300)["x"][0] = 20.0
+
+    assert data["x"][1] == 20.0
+
+
+def test_asof_takes_last_sample_at_or_before():
+    result = gaze().asof(np.array([100, 250, 400, 1000]))
+
+    assert result["x"].tolist() == [1.0, 2.0, 4.0, 4.0]
+    assert result["blink"].tolist() == [0, 1, 1, 1]
+    assert result["label"].tolist() == ["a", "b", "d", "d"]
+
+
+def test_asof_missing_values():
+    result = gaze().asof(np.array([50, 250]))
+
+    assert np.isnan(result["x"][0]) and result["x"][1] == 2.0
+    assert result["blink"].dtype == np.float64
+    assert np.isnan(result["blink"][0]) and result["blink"][1] == 1.0
+    assert np.isnan(result["worn"][0]) and result["worn"][1] == 0.0
+    assert result["label"].tolist() == [None, "b"]
+
+
+def test_asof_tolerance():
+    result = gaze().asof(np.array([110, 180, 400]), tolerance_us=20)
+
+    assert result["x"][0] == 1.0
+    assert np.isnan(result["x"][1])
+    assert result["x"][2] == 4.0
+    assert result["label"].tolist() == ["a", None, "d"]
+
+
+def test_asof_of_nothing():
+    empty = TimeIndexedColumns("e", np.array([], dtype=np.int64), {"v": np.array([]), "s": np.array([], dtype=str)})
+
+    result = empty.asof(np.array([1, 2]), tolerance_us=5)
+
+    assert np.isnan(result["v"]).all()
+    assert result["s"].tolist() == [None, None]
+
+
+def test_join_asof():
+    video = TimeIndexedColumns("video", np.array([150, 250, 50]), {"frame": np.array([1, 2, 0])}, {"frame": "count"})
+
+    joined = video.join_asof(gaze(), tolerance_us=60)
+
+    assert joined.timestamps.tolist() == [50, 150, 250]
+    assert list(joined.columns) == ["frame", "gaze.x", "gaze.blink", "gaze.worn", "gaze.label"]
+    assert joined["frame"].tolist() == [0, 1, 2]
+    assert joined["gaze.x"][1:].tolist() == [1.0, 2.0]
+    assert np.isnan(joined["gaze.x"][0])
+    assert joined["gaze.label"].tolist() == [None, "a", "b"]
+    assert joined.units == {"frame": "count", "gaze.x": "px"}
+
+
+def test_join_asof_prefix():
+    video = TimeIndexedColumns("video", np.array([300]), {})
+
+    assert list(video.join_asof(gaze(), prefix="").columns) == ["x", "blink", "worn", "label"]
+
+
+def test_shift():
+    shifted = gaze().shift(1000)
+
+    assert shifted.timestamps.tolist() == [1100, 1200, 1300, 1400]
+    assert shifted.asof(np.array([1250]))["x"].tolist() == [2.0]
+
+
+def write(path, text):
+    path.write_text(text)
+    return path
+
+
+def test_load_csv(tmp_path):
+    path = write(tmp_path / "gaze.csv", "\n".join([
+        "recording id,timestamp [ns],gaze x [px],worn",
+        "abc,1700000000123456789,10.5,1",
+        "abc,1700000000223456789,,1",
+        "abc,1700000000323456789,12.5,0",
+    ]))
+
+    data = load_csv(path, "timestamp [ns]", 1000)
+
+    assert data.name == "gaze"
+    # nanoseconds that don't fit a float are still exact
+    assert data.timestamps.tolist() == [1700000000123456, 1700000000223456, 1700000000323456]
+    assert list(data.columns) == ["gaze_x_px", "worn"]
+    assert data["gaze_x_px"][[0, 2]].tolist() == [10.5, 12.5]
+    assert np.isnan(data["gaze_x_px"][1])
+    assert data["worn"].tolist() == [1.0, 1.0, 0.0]
+
+
+def test_load_csv_skips_rows_without_usable_timestamp(tmp_path, capsys):
+    path = write(tmp_path / "gaze.csv", "\n".join([
+        "tracking_timestamp_us,yaw",
+        "100,1.0",
+        ",2.0",
+        "300.0,3.0",
+        "x,4.0",
+        "500",
+        "600,6.0",
+    ]))
+
+    data = load_csv(path, "tracking_timestamp_us")
+
+    assert data.timestamps.tolist() == [100, 300, 600]
+    assert data["yaw"].tolist() == [1.0, 3.0, 6.0]
+    assert "skipped 3 of 6 rows" in capsys.readouterr().out
+
+
+def test_load_csv_without_rows(tmp_path):
+    data = load_csv(write(tmp_path / "gaze.csv", "tracking_timestamp_us,yaw\n"), "tracking_timestamp_us")
+
+    assert len(data) == 0
+    assert list(data.columns) == ["yaw"]
+
+
+def test_load_csv_needs_timestamp_column(tmp_path):
+    with pytest.raises(IOError):
+        load_csv(write(tmp_path / "gaze.csv", "time,yaw\n1,2\n"), "tracking_timestamp_us")
+
+
+def test_cache_is_reused_only_while_csv_is_unchanged(tmp_path):
+    path = write(tmp_path / "general_eye_gaze.csv", "tracking_timestamp_us,yaw\n100,1.0\n200,2.0\n")
+
+    assert load_glasses_data(tmp_path)["general_eye_gaze"]["yaw"].tolist() == [1.0, 2.0]
+    assert (tmp_path / "general_eye_gaze.npz").exists()
+
+    # same modification time, but a different size
+    stat = path.stat()
+    write(path, "tracking_timestamp_us,yaw\n100,1.0\n200,2.0\n300,3.0\n")
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+    assert load_glasses_data(tmp_path)["general_eye_gaze"]["yaw"].tolist() == [1.0, 2.0, 3.0]
+
+
+def test_cache_is_used(tmp_path):
+    write(tmp_path / "general_eye_gaze.csv", "tracking_timestamp_us,yaw\n100,1.0\n")
+    first = load_glasses_data(tmp_path)["general_eye_gaze"]
+    TimeIndexedColumns(first.name, first.timestamps, {"yaw": np.array([5.0])}).save(
+        tmp_path / "general_eye_gaze.npz", TimeIndexedColumns.source_of(tmp_path / "general_eye_gaze.npz")
+    )
+
+    assert load_glasses_data(tmp_path)["general_eye_gaze"]["yaw"].tolist() == [5.0]
+
+
+def gopro_framemeta():
+    from gopro_overlay.entry import Entry
+    from gopro_overlay.framemeta import FrameMeta
+    from gopro_overlay.timeunits import timeunits
+
+    start = datetime.datetime(2024, 5, 1, 10, 0, 0, tzinfo=datetime.timezone.utc)
+    framemeta = FrameMeta()
+    for ms in [0, 100, 200]:
+        framemeta.add(timeunits(millis=ms), Entry(start + datetime.timedelta(milliseconds=ms)))
+    return framemeta
+
+
+@pytest.mark.parametrize("columnar", [False, True])
+def test_join_framemeta(columnar):
+    from gopro_overlay.framemeta_columnar import ColumnarFrameMeta
+
+    framemeta = gopro_framemeta()
+    if columnar:
+        framemeta = ColumnarFrameMeta.from_framemeta(framemeta)
+
+    start_us = int(datetime.datetime(2024, 5, 1, 10, 0, 0, tzinfo=datetime.timezone.utc).timestamp()) * 1_000_000
+    gaze = TimeIndexedColumns("gaze", start_us + np.array([-10_000, 90_000, 150_000]), {"x": np.array([1.0, 2.0, 3.0])})
+
+    joined = join_framemeta(framemeta, gaze, tolerance_us=30_000)
+
+    assert joined.timestamps.tolist() == [start_us, start_us + 100_000, start_us + 200_000]
+    assert joined["frame_us"].tolist() == [0, 100_000, 200_000]
+    assert joined["gaze.x"][:2].tolist() == [1.0, 2.0]
+    assert np.isnan(joined["gaze.x"][2])
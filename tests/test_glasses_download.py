@@ -0,0 +1,339 @@
+import io
+import json
+import os
+import random
+import threading
+import zipfile
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from GlassesDownload import (
+    BatchState, Downloader, DownloadProgress, StreamingZipExtractor, download_and_extract_pupil, download_aria_batch,
+    download_pupil_by_date,
+)
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Serves server.content, honouring 'Range: bytes=N-' if server.ranges, as a file download would"""
+
+    def do_GET(self):
+        server = self.server
+        requested = self.headers.get("Range")
+        server.ranges_seen.append(requested)
+
+        content = server.content
+        start = 0
+        if requested and server.ranges:
+            start = int(requested[len("bytes="):].rstrip("-"))
+            if start >= len(content):
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{len(content)}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{len(content) - 1}/{len(content)}")
+        else:
+            self.send_response(200)
+
+        body = content[start:]
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+
+        if server.cut_after is not None:
+            # connection dropped part way through
+            self.wfile.write(body[:server.cut_after])
+            server.cut_after = None
+            self.close_connection = True
+            return
+
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.content = b""
+    server.ranges = True
+    server.cut_after = None
+    server.ranges_seen = []
+    server.url = f"http://127.0.0.1:{server.server_address[1]}/file"
+
+    thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def downloaded(server, tmp_path, partial=None, **kwargs):
+    filename = str(tmp_path / "file.bin")
+    if partial is not None:
+        with open(f"{filename}.part", "wb") as f:
+            f.write(partial)
+
+    with Downloader(retries=3, timeout=5, **kwargs) as downloader:
+        success = downloader.download(server.url, filename)
+
+    assert not os.path.exists(f"{filename}.part")
+    with open(filename, "rb") as f:
+        return success, f.read()
+
+
+content = bytes(range(256)) * 1000
+
+
+def test_download(server, tmp_path):
+    server.content = content
+
+    assert downloaded(server, tmp_path) == (True, content)
+    assert server.ranges_seen == [None]
+
+
+def test_partial_file_is_resumed_with_range(server, tmp_path):
+    server.content = content
+
+    assert downloaded(server, tmp_path, partial=content[:1000]) == (True, content)
+    assert server.ranges_seen == ["bytes=1000-"]
+
+
+def test_interrupted_download_is_resumed(server, tmp_path):
+    server.content = content
+    server.cut_after = 50000
+
+    assert downloaded(server, tmp_path, chunk_size=1024) == (True, content)
+    assert server.ranges_seen[0] is None
+    assert server.ranges_seen[1].startswith("bytes=")
+
+
+def test_complete_partial_file_is_kept_on_416(server, tmp_path):
+    server.content = content
+
+    assert downloaded(server, tmp_path, partial=content) == (True, content)
+    assert server.ranges_seen == [f"bytes={len(content)}-"]
+
+
+def test_partial_file_longer_than_server_file_is_restarted(server, tmp_path):
+    server.content = content
+
+    assert downloaded(server, tmp_path, partial=content + b"junk") == (True, content)
+    assert server.ranges_seen == [f"bytes={len(content) + 4}-", None]
+
+
+def test_server_without_ranges_restarts_from_zero(server, tmp_path):
+    server.content = content
+    server.ranges = False
+
+    assert downloaded(server, tmp_path, partial=b"not the start") == (True, content)
+
+
+class Unseekable(io.RawIOBase):
+    """Somewhere ZipFile can't seek back to, so it writes a data descriptor after each member, as servers do"""
+
+    def __init__(self):
+        self.data = bytearray()
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self.data += b
+        return len(b)
+
+
+def members(seed):
+    rng = random.Random(seed)
+    return {
+        "gaze.csv": "".join(f"{i},{rng.random()}\n" for i in range(20000)).encode(),
+        "info.json": b'{"id": "%d"}' % seed,
+        "video/scene.mp4": rng.randbytes(300000),
+        "empty.txt": b"",
+    }
+
+
+def zip_of(files, descriptors):
+    stream = Unseekable() if descriptors else io.BytesIO()
+    with zipfile.ZipFile(stream, "w") as z:
+        z.writestr("video/", b"")
+        for name, data in files.items():
+            # stored members with a data descriptor can't be streamed, there's no way of finding their end
+            stored = name.endswith(".mp4") and not descriptors
+            method = zipfile.ZIP_STORED if stored else zipfile.ZIP_DEFLATED
+            z.writestr(name, data, compress_type=method)
+    return bytes(stream.data if descriptors else stream.getvalue())
+
+
+def assert_extracted(directory, files):
+    for name, data in files.items():
+        with open(os.path.join(directory, name), "rb") as f:
+            assert f.read() == data, name
+
+
+@pytest.mark.parametrize("descriptors", [False, True])
+def test_zip_is_extracted_while_it_downloads(server, tmp_path, descriptors):
+    files = members(1)
+    server.content = zip_of(files, descriptors)
+    filename = str(tmp_path / "export.zip")
+    extract_dir = str(tmp_path / "export")
+
+    progress = DownloadProgress()
+    extractor = StreamingZipExtractor(filename, extract_dir, progress, workers=2, chunk_size=4096).start()
+    with Downloader(chunk_size=4096, timeout=5) as downloader:
+        assert downloader.download(server.url, filename, on_progress=progress.update)
+    progress.finish()
+    extractor.close()
+
+    # everything came from the local headers, nothing was left for the central directory
+    assert extractor.extracted == set(files) | {"video/"}
+    assert_extracted(extract_dir, files)
+
+
+@pytest.mark.parametrize("descriptors", [False, True])
+def test_download_and_extract_pupil(server, tmp_path, descriptors):
+    files = members(2)
+    server.content = zip_of(files, descriptors)
+    filename = str(tmp_path / "export.zip")
+    extract_dir = str(tmp_path / "export")
+
+    with Downloader(chunk_size=4096, timeout=5) as downloader:
+        assert download_and_extract_pupil(downloader, server.url, filename, extract_dir, workers=2)
+
+    assert_extracted(extract_dir, files)
+    assert os.path.exists(os.path.join(extract_dir, ".extracted"))
+
+
+@pytest.mark.parametrize("descriptors", [False, True])
+def test_restarted_download_is_extracted_from_new_file(server, tmp_path, descriptors):
+    old = zip_of(members(3), descriptors)
+    files = members(4)
+    server.content = zip_of(files, descriptors)
+    server.ranges = False
+
+    filename = str(tmp_path / "export.zip")
+    extract_dir = str(tmp_path / "export")
+    with open(f"{filename}.part", "wb") as f:
+        f.write(old[:len(old) // 2])
+
+    with Downloader(chunk_size=4096, timeout=5) as downloader:
+        assert download_and_extract_pupil(downloader, server.url, filename, extract_dir, workers=2)
+
+    assert_extracted(extract_dir, files)
+
+
+def recordings(server, monkeypatch):
+    monkeypatch.setenv("PUPIL_API_KEY", "key")
+    monkeypatch.setenv("PUPIL_WORKSPACE_ID", "workspace")
+    server.content = json.dumps({"result": [{
+        "id": "abc",
+        "name": "walk",
+        "recorded_at": "2024-05-01T10:00:00Z",
+        "is_processed": True,
+        "download_url": server.url,
+    }]}).encode()
+    return server.url.rpartition("/")[0]
+
+
+def test_existing_pupil_zip_is_extracted_and_marked_complete(server, tmp_path, monkeypatch):
+    base_url = recordings(server, monkeypatch)
+    files = members(5)
+    with open(tmp_path / "walk_abc.zip", "wb") as f:
+        f.write(zip_of(files, False))
+
+    assert download_pupil_by_date("2024-05-01", str(tmp_path), base_url=base_url, delete_zip=True)
+
+    assert_extracted(tmp_path / "walk_abc", files)
+    assert os.path.exists(tmp_path / "walk_abc" / ".extracted")
+    assert not os.path.exists(tmp_path / "walk_abc.zip")
+
+    # complete, so neither downloaded nor extracted again
+    requests_made = len(server.ranges_seen)
+    assert download_pupil_by_date("2024-05-01", str(tmp_path), base_url=base_url, delete_zip=True)
+    assert len(server.ranges_seen) == requests_made + 1
+    assert not os.path.exists(tmp_path / "walk_abc.zip")
+
+
+def test_existing_pupil_zip_that_fails_to_extract_is_reported(server, tmp_path, monkeypatch):
+    base_url = recordings(server, monkeypatch)
+    with open(tmp_path / "walk_abc.zip", "wb") as f:
+        f.write(b"not a zip")
+
+    assert not download_pupil_by_date("2024-05-01", str(tmp_path), base_url=base_url)
+
+    assert not os.path.exists(tmp_path / "walk_abc" / ".extracted")
+
+
+def test_progress_wait_stops_when_download_restarts():
+    progress = DownloadProgress(100)
+    restarts = progress.restarts
+
+    progress.update(0)
+
+    assert progress.restarts == restarts + 1
+    assert not progress.wait_for(50, restarts)
+    progress.update(60)
+    assert progress.wait_for(50, progress.restarts)
+
+
+def test_batch_state_is_resumed_from_file(tmp_path):
+    path = str(tmp_path / "state.json")
+    state = BatchState(path)
+    state.mark("a.vrs", "mp4")
+    state.fail("a.vrs", "mps", FileNotFoundError("aria_mps"))
+
+    resumed = BatchState(path)
+
+    assert resumed.done("a.vrs", "mp4")
+    assert not resumed.done("a.vrs", "mps")
+    assert not resumed.done("b.vrs", "mp4")
+    assert resumed.failure("a.vrs", "mps") == "aria_mps"
+    assert resumed.failed() == ["a.vrs"]
+
+
+def test_batch_state_failure_is_cleared_when_stage_is_done(tmp_path):
+    state = BatchState(str(tmp_path / "state.json"))
+    state.fail("a.vrs", "mps", "mps failed")
+    state.mark("a.vrs", "mps")
+
+    assert state.failure("a.vrs", "mps") is None
+    assert state.failed() == []
+    assert BatchState(state.path).done("a.vrs", "mps")
+
+
+def vrs_files(tmp_path, *names):
+    for name in names:
+        (tmp_path / name).write_bytes(b"")
+    return str(tmp_path)
+
+
+def test_aria_batch_records_errors_raised_by_each_stage(tmp_path, monkeypatch):
+    # neither vrs_to_mp4 nor aria_mps can be found, so both stages raise rather than returning False
+    monkeypatch.setenv("PATH", str(tmp_path / "nowhere"))
+    inputs = vrs_files(tmp_path, "a.vrs", "b.vrs")
+    output_dir = tmp_path / "out"
+    output_dir.mkdir()
+
+    assert not download_aria_batch([inputs], output_dir, workers=2)
+
+    state = BatchState(str(output_dir / "aria_batch_state.json"))
+    for name in ["a.vrs", "b.vrs"]:
+        key = str(tmp_path / name)
+        assert not state.done(key, "mp4") and not state.done(key, "mps")
+        assert "vrs_to_mp4" in state.failure(key, "mp4")
+        assert "aria_mps" in state.failure(key, "mps")
+
+
+def test_aria_batch_skips_stages_already_done(tmp_path, monkeypatch):
+    monkeypatch.setenv("PATH", str(tmp_path / "nowhere"))
+    inputs = vrs_files(tmp_path, "a.vrs")
+    output_dir = tmp_path / "out"
+    output_dir.mkdir()
+
+    state = BatchState(str(output_dir / "aria_batch_state.json"))
+    state.mark(str(tmp_path / "a.vrs"), "mp4")
+    state.mark(str(tmp_path / "a.vrs"), "mps")
+
+    assert download_aria_batch([inputs], output_dir)